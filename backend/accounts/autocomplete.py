@@ -0,0 +1,231 @@
+import bisect
+import threading
+import time
+import unicodedata
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from uploads.images import avatar_url
+from .models import Follow
+
+User = get_user_model()
+
+FOLLOWING_CACHE_TTL = 300
+
+# Entries examined per keystroke; bounds the cost of one-letter prefixes
+SCAN_LIMIT = 200
+
+
+def sync_interval():
+    """Seconds between catching up on users saved by other processes."""
+    return getattr(settings, 'USER_AUTOCOMPLETE_SYNC_SECONDS', 60)
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().strip()
+
+
+def index_keys(username, first_name, last_name):
+    full_name = normalize(f'{first_name} {last_name}')
+    keys = {normalize(username), full_name, *full_name.split()}
+    keys.discard('')
+    return keys
+
+
+class PrefixIndex:
+    """Sorted ``(key, user_id)`` list searched with bisect.
+
+    Keys are the normalized username, the full name and each of its words, so
+    "ann", "smi" and "ann smi" all find Ann Smith. Records hold everything an
+    autocomplete row needs, so a lookup never touches the database.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = []
+        self.records = {}
+        self.built = False
+        self.synced_at = None
+        self.checked_at = 0.0
+
+    def _remove(self, user_id):
+        record = self.records.pop(user_id, None)
+        if record is None:
+            return
+        for key in record['keys']:
+            i = bisect.bisect_left(self.entries, (key, user_id))
+            if i < len(self.entries) and self.entries[i] == (key, user_id):
+                del self.entries[i]
+
+    def _record(self, row):
+        return {
+            'id': row['id'],
+            'username': row['username'],
+            'full_name': f"{row['first_name']} {row['last_name']}".strip() or row['username'],
+            'profile_picture': row['profile_picture'],
+            'keys': index_keys(row['username'], row['first_name'], row['last_name']),
+        }
+
+    def _add(self, row):
+        record = self.records[row['id']] = self._record(row)
+        for key in record['keys']:
+            bisect.insort(self.entries, (key, row['id']))
+
+    def _row(self, user):
+        return {
+            'id': str(user.id),
+            'username': user.username,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'profile_picture': avatar_url(user),
+        }
+
+    def _users(self, queryset):
+        return queryset.only('id', 'username', 'first_name', 'last_name', 'profile_picture', 'profile_picture_variants', 'is_active', 'updated_at')
+
+    def rebuild(self):
+        started = User.objects.order_by('-updated_at').values_list('updated_at', flat=True).first()
+        records = {}
+        entries = []
+        for user in self._users(User.objects.filter(is_active=True)).iterator(chunk_size=2000):
+            row = self._row(user)
+            record = records[row['id']] = self._record(row)
+            entries.extend((key, row['id']) for key in record['keys'])
+        entries.sort()
+        with self.lock:
+            self.entries = entries
+            self.records = records
+            self.built = True
+            self.synced_at = started
+            self.checked_at = time.monotonic()
+
+    def update(self, user):
+        """Re-index one user after a save (inactive users are dropped)."""
+        if not self.built:
+            return
+        row = self._row(user)
+        with self.lock:
+            self._remove(row['id'])
+            if user.is_active:
+                self._add(row)
+
+    def remove(self, user_id):
+        with self.lock:
+            self._remove(str(user_id))
+
+    def sync(self):
+        """Pick up users saved or deleted by other processes since the last build/sync."""
+        if time.monotonic() - self.checked_at < sync_interval():
+            return
+        self.checked_at = time.monotonic()
+        since = self.synced_at
+        queryset = User.objects.all()
+        if since is not None:
+            # Overlap a little so saves committed out of order are not missed
+            queryset = queryset.filter(updated_at__gte=since - timedelta(seconds=5))
+        changed = [(user, self._row(user)) for user in self._users(queryset)]
+        with self.lock:
+            for user, row in changed:
+                self._remove(row['id'])
+                if user.is_active:
+                    self._add(row)
+                if self.synced_at is None or user.updated_at > self.synced_at:
+                    self.synced_at = user.updated_at
+        self._drop_vanished()
+
+    def _drop_vanished(self):
+        # Deleted rows (and bulk deactivations that skip updated_at) leave no
+        # trace to sync from; a count mismatch is the cheap sign to look for them
+        active = User.objects.filter(is_active=True)
+        with self.lock:
+            # Taken first: users indexed while the ids are read are not candidates
+            indexed = set(self.records)
+        if active.count() == len(indexed):
+            return
+        live = {str(pk) for pk in active.values_list('pk', flat=True).iterator(chunk_size=2000)}
+        with self.lock:
+            for user_id in indexed - live:
+                self._remove(user_id)
+
+    def ensure_ready(self):
+        if not self.built:
+            with building:
+                if not self.built:
+                    self.rebuild()
+        else:
+            self.sync()
+
+    def lookup(self, prefix, limit, boost_ids=(), exclude_id=None):
+        """Up to ``limit`` records whose keys start with ``prefix``.
+
+        Followed users (``boost_ids``) rank first, then exact matches, then
+        the shortest matching key. Followed users are always considered, even
+        when the prefix matches more than ``SCAN_LIMIT`` entries.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self.lock:
+            # Length of each candidate's shortest matching key
+            matches = {}
+            start = bisect.bisect_left(self.entries, (prefix,))
+            for key, user_id in self.entries[start:start + SCAN_LIMIT]:
+                if not key.startswith(prefix):
+                    break
+                matches[user_id] = min(len(key), matches.get(user_id, len(key)))
+            for user_id in boost_ids:
+                record = self.records.get(user_id)
+                lengths = [len(key) for key in record['keys'] if key.startswith(prefix)] if record else []
+                if lengths:
+                    matches[user_id] = min(lengths)
+            records = self.records
+            boost_ids = set(boost_ids)
+            ranked = sorted(
+                (user_id for user_id in matches if user_id != exclude_id),
+                key=lambda user_id: (
+                    user_id not in boost_ids,
+                    matches[user_id] != len(prefix),
+                    matches[user_id],
+                    records[user_id]['username'],
+                ),
+            )
+            return [
+                {
+                    'id': user_id,
+                    'username': records[user_id]['username'],
+                    'full_name': records[user_id]['full_name'],
+                    'profile_picture': records[user_id]['profile_picture'],
+                    'is_following': user_id in boost_ids,
+                }
+                for user_id in ranked[:limit]
+            ]
+
+
+building = threading.Lock()
+
+index = PrefixIndex()
+
+
+def following_cache_key(user_id):
+    return f'autocomplete:following:{user_id}'
+
+
+def following_ids(user_id):
+    key = following_cache_key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = [str(pk) for pk in Follow.objects.filter(follower_id=user_id).values_list('following_id', flat=True)]
+        cache.set(key, ids, FOLLOWING_CACHE_TTL)
+    return ids
+
+
+def invalidate_following(user_id):
+    cache.delete(following_cache_key(user_id))
+
+
+def suggest(user, prefix, limit=10):
+    """Autocomplete rows for ``prefix``, boosted toward users ``user`` follows."""
+    index.ensure_ready()
+    return index.lookup(prefix, limit, boost_ids=following_ids(user.pk), exclude_id=str(user.pk))
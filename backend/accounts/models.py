@@ -15,6 +15,8 @@ class CustomUser(AbstractUser):
         blank=True,
         help_text="Upload a profile picture"
     )
+    # Resized copies of ``profile_picture``, written by uploads.images
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
     location = models.CharField(
         max_length=100, 
         null=True, 
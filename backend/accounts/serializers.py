@@ -4,6 +4,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth import authenticate
 from allauth.account.models import EmailAddress
+from uploads.images import avatar_url, variant_urls
 
 User = get_user_model()
 
@@ -69,11 +70,39 @@ class UserSerializer(serializers.ModelSerializer):
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Count
 from .models import Follow
 
 User = get_user_model()
 
 
+def get_profile_context(request, user_ids):
+    """Resolve follow counts and follow state for a batch of users in three queries.
+
+    Pass the result as serializer context so ``UserProfileSerializer`` does not
+    query per user when it is nested in a list (e.g. post authors in a feed page).
+    """
+    user_ids = list(user_ids)
+    followers_counts = dict(
+        Follow.objects.filter(following_id__in=user_ids)
+        .values('following_id').annotate(n=Count('id')).values_list('following_id', 'n')
+    )
+    following_counts = dict(
+        Follow.objects.filter(follower_id__in=user_ids)
+        .values('follower_id').annotate(n=Count('id')).values_list('follower_id', 'n')
+    )
+    followed_ids = set()
+    if request and request.user.is_authenticated:
+        followed_ids = set(
+            Follow.objects.filter(follower=request.user, following_id__in=user_ids).values_list('following_id', flat=True)
+        )
+    return {
+        'followers_counts': {user_id: followers_counts.get(user_id, 0) for user_id in user_ids},
+        'following_counts': {user_id: following_counts.get(user_id, 0) for user_id in user_ids},
+        'followed_ids': followed_ids,
+    }
+
+
 class FollowSerializer(serializers.ModelSerializer):
     """Serializer for Follow model"""
     follower = serializers.StringRelatedField(read_only=True)
@@ -93,11 +122,13 @@ class UserProfileSerializer(serializers.ModelSerializer):
     following_count = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
     profile_picture = serializers.SerializerMethodField()
+    profile_picture_variants = serializers.SerializerMethodField()
+    avatar = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = [
-            'id', 'username', 'email', 'profile_picture', 
+            'id', 'username', 'email', 'profile_picture', 'profile_picture_variants', 'avatar',
             'location', 'bio', 'full_name', 'created_at',
             'followers_count', 'following_count', 'is_following'
         ]
@@ -105,14 +136,23 @@ class UserProfileSerializer(serializers.ModelSerializer):
     
     def get_followers_count(self, obj):
         """Count of users following this user"""
+        followers_counts = self.context.get('followers_counts')
+        if followers_counts is not None and obj.id in followers_counts:
+            return followers_counts[obj.id]
         return obj.followers_set.count()
     
     def get_following_count(self, obj):
         """Count of users this user is following"""
+        following_counts = self.context.get('following_counts')
+        if following_counts is not None and obj.id in following_counts:
+            return following_counts[obj.id]
         return obj.following_set.count()
     
     def get_is_following(self, obj):
         """Check if request user follows this user"""
+        followed_ids = self.context.get('followed_ids')
+        if followed_ids is not None:
+            return obj.id in followed_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Follow.objects.filter(
@@ -128,4 +168,11 @@ class UserProfileSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(obj.profile_picture.url)
             return obj.profile_picture.url
-        return None
\ No newline at end of file
+        return None
+
+    def get_avatar(self, obj):
+        """Return full URL of the avatar-sized profile picture"""
+        return avatar_url(obj, self.context.get('request'))
+    
+    def get_profile_picture_variants(self, obj):
+        return variant_urls(obj.profile_picture, obj.profile_picture_variants, self.context.get('request'))
\ No newline at end of file
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Follow
+from . import autocomplete
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def update_autocomplete_on_save(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete.index.update(instance))
+
+
+@receiver(post_delete, sender=User)
+def drop_autocomplete_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete.index.remove(instance.pk))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_autocomplete_following(sender, instance, **kwargs):
+    autocomplete.invalidate_following(instance.follower_id)
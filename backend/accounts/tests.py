@@ -1,3 +1,84 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIRequestFactory
+from .serializers import UserProfileSerializer
+from . import autocomplete
 
-# Create your tests here.
+User = get_user_model()
+
+
+def make_user(username):
+    return User.objects.create_user(username=username, email=f'{username}@example.com', password='pw')
+
+
+@override_settings(IMAGE_VARIANT_WORKERS=0)
+class UserProfileSerializerTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def serialize(self, user):
+        request = APIRequestFactory().get('/')
+        request.user = AnonymousUser()
+        return UserProfileSerializer(user, context={'request': request}).data
+
+    def test_profile_picture_is_the_original_and_avatar_the_thumbnail(self):
+        user = make_user('alice')
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), (10, 120, 200)).save(buffer, 'PNG')
+        user.profile_picture = SimpleUploadedFile('me.png', buffer.getvalue(), content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        user.refresh_from_db()
+
+        data = self.serialize(user)
+        self.assertEqual(data['profile_picture'], f'http://testserver{user.profile_picture.url}')
+        thumb = user.profile_picture_variants['thumb']['webp']
+        self.assertEqual(data['avatar'], f'http://testserver{user.profile_picture.storage.url(thumb)}')
+        self.assertEqual(data['profile_picture_variants']['thumb']['webp'], data['avatar'])
+
+    def test_no_picture(self):
+        data = self.serialize(make_user('bob'))
+        self.assertIsNone(data['profile_picture'])
+        self.assertIsNone(data['avatar'])
+        self.assertEqual(data['profile_picture_variants'], {})
+
+
+@override_settings(USER_AUTOCOMPLETE_SYNC_SECONDS=0)
+class AutocompleteSyncTests(TestCase):
+    def setUp(self):
+        self.ann = make_user('ann')
+        self.anna = make_user('anna')
+        # A second process's index: this process's signals never reach it
+        self.index = autocomplete.PrefixIndex()
+        self.index.rebuild()
+
+    def usernames(self, prefix='ann'):
+        self.index.sync()
+        return [row['username'] for row in self.index.lookup(prefix, 10)]
+
+    def test_picks_up_users_saved_elsewhere(self):
+        make_user('annie')
+        self.assertEqual(self.usernames(), ['ann', 'anna', 'annie'])
+
+    def test_drops_users_deleted_elsewhere(self):
+        self.anna.delete()
+        self.assertEqual(self.usernames(), ['ann'])
+
+    def test_drops_users_deactivated_without_a_save(self):
+        User.objects.filter(pk=self.anna.pk).update(is_active=False)
+        self.assertEqual(self.usernames(), ['ann'])
+
+    def test_delete_and_create_in_one_interval(self):
+        self.anna.delete()
+        make_user('annie')
+        self.assertEqual(self.usernames(), ['ann', 'annie'])
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import LoginView, LogoutView, PasswordResetView, PasswordResetConfirmView, UserDetailView, FollowUserView, UnfollowUserView, CheckFollowStatusView, FollowersListView, FollowingListView
+from .views import LoginView, LogoutView, PasswordResetView, PasswordResetConfirmView, UserDetailView, FollowUserView, UnfollowUserView, CheckFollowStatusView, FollowersListView, FollowingListView, UserSearchView
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
@@ -12,6 +12,7 @@ urlpatterns = [
     path('unfollow/<uuid:user_id>/', UnfollowUserView.as_view(), name='unfollow-user'),
     path('check-follow/<uuid:user_id>/', CheckFollowStatusView.as_view(), name='check-follow'),
     
+    path('users/search/', UserSearchView.as_view(), name='user-search'),
     path('users/<uuid:user_id>/followers/', FollowersListView.as_view(), name='user-followers'),
     path('users/<uuid:user_id>/following/', FollowingListView.as_view(), name='user-following'),
 ]
\ No newline at end of file
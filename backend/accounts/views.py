@@ -8,6 +8,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.permissions import IsAuthenticated
 from .adapters import CustomAccountAdapter
 from .serializers import UserSerializer
+from uploads.images import avatar_url
 from rest_framework import permissions
 from rest_framework import generics, status
 from django.contrib.auth.tokens import default_token_generator
@@ -235,7 +236,7 @@ class FollowUserView(APIView):
                 'from_user': {
                     'id': str(request.user.id),
                     'username': request.user.username,
-                    'profile_picture': request.user.profile_picture.url if request.user.profile_picture else None,
+                    'profile_picture': avatar_url(request.user),
                 },
                 'message': f'{request.user.username} started following you',
                 'created_at': follow.created_at.isoformat(),
@@ -323,4 +324,21 @@ class CheckFollowStatusView(APIView):
 
         return Response({
             'is_following': is_following
-        })
\ No newline at end of file
+        })
+from . import autocomplete
+
+class UserSearchView(APIView):
+    """``?q=<prefix>&limit=N``: username/name autocomplete, followed users first."""
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 25
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), self.max_limit))
+        except ValueError:
+            limit = 10
+        results = autocomplete.suggest(request.user, request.query_params.get('q', ''), limit=limit)
+        for row in results:
+            if row['profile_picture']:
+                row['profile_picture'] = request.build_absolute_uri(row['profile_picture'])
+        return Response({'results': results})
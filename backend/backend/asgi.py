@@ -10,6 +10,7 @@ from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.security.websocket import AllowedHostsOriginValidator
 import posts.routing
 import chat.routing
+from chat.writer import lifespan as chat_writer_lifespan
 from chat.middleware import JWTAuthMiddleware
 import notifications.routing
 
@@ -22,4 +23,6 @@ application = ProtocolTypeRouter({
             )
         )
     ),
+    # Flushes write-behind chat messages on shutdown (servers that send lifespan events)
+    "lifespan": chat_writer_lifespan,
 })
\ No newline at end of file
@@ -55,6 +55,7 @@ INSTALLED_APPS = [
     'posts',
     'chat',
     'notifications',
+    'uploads',
 ]
 
 MIDDLEWARE = [
@@ -99,6 +100,68 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Home timeline (fan-out on write)
+# Authors with more followers than this are merged into feeds at read time instead of pushed.
+TIMELINE_FANOUT_FOLLOWER_LIMIT = int(os.getenv('TIMELINE_FANOUT_FOLLOWER_LIMIT', 1000))
+TIMELINE_MAX_ENTRIES = int(os.getenv('TIMELINE_MAX_ENTRIES', 800))
+
+# Post like/comment counters. With shards > 0 increments go to one of N shard rows
+# (no single hot row on viral posts) and `rollup_post_counters` folds them in periodically.
+# Post.like_count/comment_count then lag behind; API payloads and ranking add the pending
+# shard rows (posts.counters.pending_counts), so only direct reads of the columns are stale.
+POST_COUNTER_SHARDS = int(os.getenv('POST_COUNTER_SHARDS', 0))
+
+# Ranked feed snapshots (per user) are kept this long and hold this many ranked ids
+RANKED_FEED_CACHE_TTL = int(os.getenv('RANKED_FEED_CACHE_TTL', 300))
+RANKED_FEED_SNAPSHOT_SIZE = int(os.getenv('RANKED_FEED_SNAPSHOT_SIZE', 500))
+
+# Recent-engagement ring buffer per post: ENGAGEMENT_BUCKETS slots of ENGAGEMENT_BUCKET_SECONDS
+ENGAGEMENT_BUCKET_SECONDS = int(os.getenv('ENGAGEMENT_BUCKET_SECONDS', 300))
+ENGAGEMENT_BUCKETS = int(os.getenv('ENGAGEMENT_BUCKETS', 12))
+
+# Number of latest comments embedded in each post of a feed/list payload
+COMMENT_PREVIEW_SIZE = int(os.getenv('COMMENT_PREVIEW_SIZE', 3))
+
+# Seconds a post's (active, author, privacy) metadata stays cached for websocket checks;
+# the LOCAL TTL applies to the per-process LocMem cache, which other workers' saves cannot clear
+POST_META_CACHE_TTL = int(os.getenv('POST_META_CACHE_TTL', 3600))
+POST_META_LOCAL_CACHE_TTL = int(os.getenv('POST_META_LOCAL_CACHE_TTL', 5))
+
+# Worker processes rendering image variants (0 renders inline) and their JPEG/WebP quality
+IMAGE_VARIANT_WORKERS = int(os.getenv('IMAGE_VARIANT_WORKERS', 2))
+IMAGE_VARIANT_QUALITY = int(os.getenv('IMAGE_VARIANT_QUALITY', 82))
+
+# Seconds over which like events on a post are collapsed into one like_update broadcast (0 disables)
+POST_LIKE_BROADCAST_INTERVAL = float(os.getenv('POST_LIKE_BROADCAST_INTERVAL', 0.25))
+
+# Dotted path of the post/comment search backend; empty picks SQLite FTS5 when available
+POST_SEARCH_BACKEND = os.getenv('POST_SEARCH_BACKEND', '')
+
+# Trending hashtags are counted in per-minute cache buckets over this many trailing minutes
+# (aggregated from the tag index instead when the cache is per-process LocMem)
+HASHTAG_TRENDING_WINDOW_MINUTES = int(os.getenv('HASHTAG_TRENDING_WINDOW_MINUTES', 60))
+
+# Each process keeps an in-memory user autocomplete index and pulls in users saved or deleted elsewhere this often
+USER_AUTOCOMPLETE_SYNC_SECONDS = int(os.getenv('USER_AUTOCOMPLETE_SYNC_SECONDS', 60))
+
+# Write-behind chat: socket messages are broadcast first and inserted in batches by a
+# per-process writer, at most CHAT_WRITE_BEHIND_MAX_DELAY_MS after arrival or once a batch is full.
+# Buffers are flushed on ASGI lifespan shutdown (not sent by daphne) or at interpreter exit;
+# a SIGKILL, OOM kill or crash loses whatever was still buffered (up to one delay window)
+CHAT_WRITE_BEHIND = os.getenv('CHAT_WRITE_BEHIND', 'False').lower() == 'true'
+CHAT_WRITE_BEHIND_MAX_DELAY_MS = int(os.getenv('CHAT_WRITE_BEHIND_MAX_DELAY_MS', 50))
+CHAT_WRITE_BEHIND_MAX_BATCH = int(os.getenv('CHAT_WRITE_BEHIND_MAX_BATCH', 500))
+
+# Cache shared by all workers (timeline author flags, ranked feed snapshots, trending hashtags).
+# Falls back to a per-process in-memory cache when REDIS_CACHE_URL is unset.
+if os.getenv('REDIS_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_CACHE_URL'),
+        }
+    }
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -128,6 +191,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'upload-offset',
 ]
 
 CORS_ALLOW_METHODS = [
@@ -202,6 +266,32 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resumable video uploads: total and per-chunk byte limits, where partial files live, and when they expire
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', 2 * 1024 ** 3))
+CHUNKED_UPLOAD_CHUNK_SIZE = int(os.getenv('CHUNKED_UPLOAD_CHUNK_SIZE', 8 * 1024 ** 2))
+CHUNKED_UPLOAD_DIR = os.getenv('CHUNKED_UPLOAD_DIR', '')
+CHUNKED_UPLOAD_EXPIRY_HOURS = int(os.getenv('CHUNKED_UPLOAD_EXPIRY_HOURS', 24))
+
+# Uploads are stored once per unique content under blobs/; see uploads.storage
+STORAGES = {
+    'default': {
+        'BACKEND': os.getenv('MEDIA_STORAGE_BACKEND', 'uploads.storage.ContentAddressedStorage'),
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Where uploads are hashed before being renamed into MEDIA_ROOT/blobs/; must be on the same
+# filesystem as MEDIA_ROOT (empty: a "<MEDIA_ROOT>_staging" directory next to it)
+MEDIA_STAGING_DIR = os.getenv('MEDIA_STAGING_DIR', '')
+
+# Cache lifetime (seconds) of media whose file name is not content-hashed
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 3600))
+# Let Django serve MEDIA_URL (uploads.views.serve_media); defaults to DEBUG.
+# Files are streamed through the Python process, so turn this off when the web server serves MEDIA_ROOT
+SERVE_MEDIA = os.getenv('SERVE_MEDIA', str(DEBUG)).lower() == 'true'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,7 +1,7 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from uploads.views import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,7 +12,12 @@ urlpatterns = [
     path('api/', include('posts.urls')),
     path('api/chat/', include('chat.urls')),
     path('api/notifications/', include('notifications.urls')),
+    path('api/uploads/', include('uploads.urls')),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Range/206 for video seeking, ETag revalidation, and immutable caching of
+# content-hashed files; production setups can serve MEDIA_ROOT from the web server instead
+if settings.SERVE_MEDIA:
+    urlpatterns += [
+        re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.*)$', serve_media, name='media'),
+    ]
\ No newline at end of file
@@ -16,8 +16,8 @@ class ConversationAdmin(admin.ModelAdmin):
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
-    list_display = ['id', 'conversation', 'sender', 'content_preview', 'is_read', 'created_at']
-    list_filter = ['is_read', 'created_at']
+    list_display = ['id', 'conversation', 'sender', 'content_preview', 'created_at']
+    list_filter = ['created_at']
     search_fields = ['content', 'sender__username']
     readonly_fields = ['id', 'created_at', 'updated_at']
     
@@ -2,8 +2,12 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from django.utils import timezone
+import asyncio
 import json
 from .models import Conversation, Message, Call
+from . import messages, unread, writer
+from .writer import message_writer
+from uploads.images import avatar_url
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -108,11 +112,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if not message_content or isinstance(self.scope['user'], AnonymousUser):
             return
         
-        message = await self.create_message(
-            self.conversation, 
-            self.user, 
-            message_content
-        )
+        if writer.enabled():
+            # Broadcast now; the process's writer inserts it within the batch delay
+            message = await message_writer.add(self.conversation, self.user, message_content)
+        else:
+            message = await self.create_message(
+                self.conversation, 
+                self.user, 
+                message_content
+            )
         
         await self.channel_layer.group_send(
             self.conversation_group_name, 
@@ -122,9 +130,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 'message': message_content,
                 'sender_id': str(self.user.id),
                 'sender_username': self.user.username,
-                'sender_profile_picture': self.user.profile_picture.url if self.user.profile_picture else None,
+                'sender_profile_picture': avatar_url(self.user),
                 'timestamp': message.created_at.isoformat(),
-                'is_read': message.is_read
+                'sequence': messages.sequence(message),
+                'is_read': False
             }
         )
     # - Typing handler related
@@ -141,17 +150,34 @@ class ChatConsumer(AsyncWebsocketConsumer):
     
     # - Read status related
     async def handle_mark_read(self, data):
-        message_ids = data.get('message_ids', [])
+        # ``message_id`` is the newest message the client has shown; a legacy
+        # ``message_ids`` list is reduced to its newest entry
+        message_ids = data.get('message_ids') or []
+        if data.get('message_id'):
+            message_ids = [data['message_id']]
         if message_ids:
-            await self.mark_messages_as_read(message_ids, self.user)
-            await self.channel_layer.group_send(
-                self.conversation_group_name, 
-                {
-                    'type': 'messages_read',
-                    'message_ids': message_ids,
-                    'reader_id': str(self.user.id)
-                }
-            )
+            newest, missing = await self.get_newest_message(message_ids)
+            if missing and writer.enabled():
+                # The messages may still be buffered here or in the sender's worker:
+                # write ours, then give the other worker's window time to close
+                await message_writer.flush()
+                for _ in range(writer.READ_RETRIES):
+                    newest, missing = await self.get_newest_message(message_ids)
+                    if not missing:
+                        break
+                    await asyncio.sleep(writer.max_delay())
+            watermark = await self.advance_read_watermark(newest, self.user)
+            if watermark:
+                last_read_at, last_read_message_id = watermark
+                await self.channel_layer.group_send(
+                    self.conversation_group_name, 
+                    {
+                        'type': 'messages_read',
+                        'last_read_message_id': str(last_read_message_id),
+                        'last_read_at': last_read_at.isoformat(),
+                        'reader_id': str(self.user.id)
+                    }
+                )
 # Call handlers
     # - Initiate call
     async def handle_call_initiate(self, data):
@@ -177,7 +203,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 'call_type': call_type,
                 'caller_id': str(self.user.id),
                 'caller_username': self.user.username,
-                'caller_profile_picture': self.user.profile_picture.url if self.user.profile_picture else None,
+                'caller_profile_picture': avatar_url(self.user),
             }
         )
     # - Accept call
@@ -275,6 +301,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'sender_username': event['sender_username'],
             'sender_profile_picture': event['sender_profile_picture'],
             'timestamp': event['timestamp'],
+            'sequence': event['sequence'],
             'is_read': event['is_read']
         }))
     # - Status forwards
@@ -300,7 +327,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
     async def messages_read(self, event):
         await self.send(text_data=json.dumps({
             'type': 'messages_read',
-            'message_ids': event['message_ids'],
+            'last_read_message_id': event['last_read_message_id'],
+            'last_read_at': event['last_read_at'],
             'reader_id': event['reader_id']
         }))
     
@@ -386,18 +414,22 @@ class ChatConsumer(AsyncWebsocketConsumer):
     
     @database_sync_to_async
     def create_message(self, conversation, sender, content):
-        return Message.objects.create(
-            conversation=conversation, 
-            sender=sender, 
-            content=content
-        )
+        return messages.send_message(conversation, sender, content)
     
     @database_sync_to_async
-    def mark_messages_as_read(self, message_ids, user):
-        Message.objects.filter(
+    def get_newest_message(self, message_ids):
+        """The newest of ``message_ids`` in this conversation, and how many were not found."""
+        found = list(Message.objects.filter(
             id__in=message_ids,
             conversation=self.conversation
-        ).exclude(sender=user).update(is_read=True)
+        ).order_by('-created_at', '-id'))
+        return (found[0] if found else None), len(set(map(str, message_ids))) - len(found)
+
+    @database_sync_to_async
+    def advance_read_watermark(self, newest, user):
+        if newest is None:
+            return None
+        return unread.mark_read(self.conversation, user, newest)
     
     @database_sync_to_async
     def create_call(self, conversation, caller, receiver, call_type):
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+from .models import Conversation, Message
+from . import unread
+
+PREVIEW_LENGTH = 255
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def sequence(message):
+    """Integer ordering key sent with each message: microseconds since the epoch of ``created_at``.
+
+    History is ordered by ``(created_at, id)``, so clients can order and
+    de-duplicate live messages with the same key whether or not the row has
+    been written yet.
+    """
+    return (message.created_at - EPOCH) // timedelta(microseconds=1)
+
+
+def record_last_message(conversation, message):
+    """Point the conversation's inbox snapshot at ``message`` unless a newer one is already recorded.
+
+    Also bumps ``updated_at`` so the inbox keeps sorting by latest activity.
+    Call this inside the transaction that inserts the message.
+    """
+    snapshot = {
+        'last_message': message,
+        'last_message_preview': message.content[:PREVIEW_LENGTH],
+        'last_message_sender_id': message.sender_id,
+        'last_message_at': message.created_at,
+        'updated_at': message.created_at,
+    }
+    Conversation.objects.filter(
+        Q(last_message_at__isnull=True) | Q(last_message_at__lte=message.created_at),
+        pk=conversation.pk,
+    ).update(**snapshot)
+    for field, value in snapshot.items():
+        setattr(conversation, field, value)
+
+
+def send_message(conversation, sender, content):
+    """Create a message and update the conversation snapshot atomically."""
+    with transaction.atomic():
+        message = Message.objects.create(conversation=conversation, sender=sender, content=content)
+        record_last_message(conversation, message)
+        unread.message_created(conversation, message)
+    return message
+
+
+def save_batch(messages):
+    """Insert unsaved messages (possibly from many conversations) in one transaction.
+
+    Used by the write-behind writer. Each conversation gets one snapshot update
+    for its newest message and one unread update per recipient, so a batch
+    leaves both exactly as ``send_message`` calls would have.
+    """
+    by_conversation = {}
+    for message in messages:
+        by_conversation.setdefault(message.conversation_id, []).append(message)
+
+    with transaction.atomic():
+        Message.objects.bulk_create(messages)
+        for conversation in Conversation.objects.filter(pk__in=by_conversation):
+            batch = by_conversation[conversation.pk]
+            record_last_message(conversation, max(batch, key=lambda message: (message.created_at, message.pk)))
+            unread.messages_created(conversation, batch)
+    return len(messages)
+
+
+def rebuild_snapshots(conversations=None):
+    """Recompute the snapshot from the messages table (after bulk inserts that skip ``send_message``)."""
+    if conversations is None:
+        conversations = Conversation.objects.all()
+    latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-id')
+    return conversations.update(
+        last_message=Subquery(latest.values('pk')[:1]),
+        last_message_sender=Subquery(latest.values('sender')[:1]),
+        last_message_at=Subquery(latest.values('created_at')[:1]),
+        last_message_preview=Coalesce(
+            Subquery(latest.annotate(preview=Substr('content', 1, PREVIEW_LENGTH)).values('preview')[:1]),
+            Value(''),
+        ),
+    )
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_read_states(apps, schema_editor):
+    Conversation = apps.get_model('chat', 'Conversation')
+    ConversationReadState = apps.get_model('chat', 'ConversationReadState')
+    Message = apps.get_model('chat', 'Message')
+
+    unread_by_sender = {
+        (row['conversation'], row['sender']): row['n']
+        for row in Message.objects.filter(is_read=False).values('conversation', 'sender').annotate(n=models.Count('pk'))
+    }
+    states = []
+    for conversation_id, participant1_id, participant2_id in Conversation.objects.values_list('id', 'participant1', 'participant2').iterator():
+        for reader_id, sender_id in ((participant1_id, participant2_id), (participant2_id, participant1_id)):
+            states.append(ConversationReadState(
+                conversation_id=conversation_id,
+                user_id=reader_id,
+                unread_count=unread_by_sender.get((conversation_id, sender_id), 0),
+            ))
+    ConversationReadState.objects.bulk_create(states, batch_size=2000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_conversation_last_message'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to='chat.conversation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_read_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'unread_count'], name='chat_conver_user_id_c526a1_idx')],
+                'unique_together': {('conversation', 'user')},
+            },
+        ),
+        migrations.RunPython(backfill_read_states, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_conversation_read_state'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at', 'id'], name='chat_messag_convers_d98477_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_watermarks(apps, schema_editor):
+    ConversationReadState = apps.get_model('chat', 'ConversationReadState')
+    Message = apps.get_model('chat', 'Message')
+
+    # Newest message the participant had already flagged as read
+    newest_read = Message.objects.filter(
+        conversation=OuterRef('conversation'), is_read=True
+    ).exclude(sender=OuterRef('user')).order_by('-created_at', '-id')
+    ConversationReadState.objects.update(
+        last_read_message=Subquery(newest_read.values('pk')[:1]),
+        last_read_at=Subquery(newest_read.values('created_at')[:1]),
+    )
+
+    incoming = Message.objects.filter(conversation=OuterRef('conversation')).exclude(sender=OuterRef('user'))
+    ConversationReadState.objects.filter(last_read_at__isnull=True).update(
+        unread_count=Coalesce(Subquery(incoming.values('conversation').annotate(n=Count('pk')).values('n')), Value(0))
+    )
+    after_watermark = incoming.filter(
+        Q(created_at__gt=OuterRef('last_read_at'))
+        | Q(created_at=OuterRef('last_read_at'), id__gt=OuterRef('last_read_message'))
+    )
+    ConversationReadState.objects.filter(last_read_at__isnull=False).update(
+        unread_count=Coalesce(Subquery(after_watermark.values('conversation').annotate(n=Count('pk')).values('n')), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_message_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationreadstate',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, help_text='created_at of last_read_message', null=True),
+        ),
+        migrations.AddField(
+            model_name='conversationreadstate',
+            name='last_read_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message'),
+        ),
+        migrations.RunPython(backfill_watermarks, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_read',
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from uuid import uuid4
 from django.contrib.auth import get_user_model
 
@@ -16,6 +17,26 @@ class Conversation(models.Model):
         related_name='conversations_as_participant2', 
         on_delete=models.CASCADE
     )
+    # Snapshot of the newest message, written by chat.messages in the same
+    # transaction as the insert so the inbox needs no per-row message lookups
+    last_message = models.ForeignKey(
+        'Message',
+        related_name='+',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        editable=False
+    )
+    last_message_preview = models.CharField(max_length=255, blank=True, editable=False)
+    last_message_sender = models.ForeignKey(
+        User,
+        related_name='+',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        editable=False
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -56,16 +77,58 @@ class Message(models.Model):
         on_delete=models.CASCADE
     )
     content = models.TextField()
-    is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add so the write-behind writer can keep
+    # the time a message was accepted when it is inserted later in a batch
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # History pages are keyset range scans over this index
+            models.Index(fields=['conversation', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username} at {self.created_at}"
 
+class ConversationReadState(models.Model):
+    """Per-participant read watermark and unread counter, maintained by chat.unread.
+
+    Messages from the other participant up to ``(last_read_at, last_read_message)``
+    are read; everything after it is unread.
+    """
+    conversation = models.ForeignKey(
+        Conversation,
+        related_name='read_states',
+        on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(
+        User,
+        related_name='conversation_read_states',
+        on_delete=models.CASCADE
+    )
+    last_read_message = models.ForeignKey(
+        Message,
+        related_name='+',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    last_read_at = models.DateTimeField(null=True, blank=True, help_text="created_at of last_read_message")
+    unread_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['conversation', 'user']
+        indexes = [
+            # Covers the per-user SUM behind the unread badge
+            models.Index(fields=['user', 'unread_count']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} has {self.unread_count} unread in {self.conversation_id}"
+
 class Call(models.Model):
     CALL_TYPE_CHOICES = [
         ('video', 'Video Call'),
@@ -0,0 +1,18 @@
+from posts.pagination import KeysetPagination
+
+
+class MessagePagination(KeysetPagination):
+    """Pages of a conversation's history, newest page first; ``before`` walks back in time.
+
+    Served from the ``['conversation', 'created_at', 'id']`` index. Each page
+    is returned oldest-first so clients can prepend it as is.
+    """
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'before'
+    page_size_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = super().paginate_queryset(queryset, request, view=view)
+        page.reverse()
+        return page
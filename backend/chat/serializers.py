@@ -1,19 +1,28 @@
 from rest_framework import serializers
 from .models import Conversation, Message
 from django.contrib.auth import get_user_model
+from uploads.images import avatar_url
+from . import unread
+from .pagination import MessagePagination
 
 User = get_user_model()
 
 
 class UserSerializer(serializers.ModelSerializer):
+    profile_picture = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'profile_picture', 'bio']
         read_only_fields = ['id', 'username', 'email']
 
+    def get_profile_picture(self, obj):
+        return avatar_url(obj, self.context.get('request'))
+
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
+    is_read = serializers.SerializerMethodField()
     
     class Meta:
         model = Message
@@ -28,6 +37,10 @@ class MessageSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'sender']
 
+    def get_is_read(self, obj):
+        # Derived from the participants' read watermarks (see chat.unread)
+        return unread.is_read(obj, self.context.get('read_watermarks', {}))
+
 
 class ConversationSerializer(serializers.ModelSerializer):
     participant1 = UserSerializer(read_only=True)
@@ -58,29 +71,36 @@ class ConversationSerializer(serializers.ModelSerializer):
         return None
 
     def get_last_message(self, obj):
-        last_message = obj.messages.last()
-        if last_message:
+        # Served from the conversation's snapshot; select_related('last_message_sender')
+        # and the last_message_read_* annotations keep this free of extra queries
+        if obj.last_message_id:
+            watermark = (getattr(obj, 'last_message_read_at', None), getattr(obj, 'last_message_read_id', None))
             return {
-                'id': str(last_message.id),
-                'content': last_message.content,
-                'sender_username': last_message.sender.username,
-                'created_at': last_message.created_at,
-                'is_read': last_message.is_read
+                'id': str(obj.last_message_id),
+                'content': obj.last_message_preview,
+                'sender_username': obj.last_message_sender.username if obj.last_message_sender else None,
+                'created_at': obj.last_message_at,
+                'is_read': unread.covers(watermark, (obj.last_message_at, obj.last_message_id))
             }
         return None
 
     def get_unread_count(self, obj):
+        if hasattr(obj, 'unread_messages'):
+            return obj.unread_messages
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.messages.exclude(sender=request.user).filter(is_read=False).count()
+            return unread.conversation_unread(obj.pk, request.user.pk)
         return 0
 
 
 class ConversationDetailSerializer(serializers.ModelSerializer):
+    """Conversation metadata plus only the newest page of messages.
+
+    Older pages come from ``conversations/<id>/messages/?before=<messages_next_cursor>``.
+    """
     participant1 = UserSerializer(read_only=True)
     participant2 = UserSerializer(read_only=True)
     other_participant = serializers.SerializerMethodField()
-    messages = MessageSerializer(many=True, read_only=True)
     
     class Meta:
         model = Conversation
@@ -89,7 +109,6 @@ class ConversationDetailSerializer(serializers.ModelSerializer):
             'participant1', 
             'participant2', 
             'other_participant',
-            'messages',
             'created_at', 
             'updated_at'
         ]
@@ -100,4 +119,13 @@ class ConversationDetailSerializer(serializers.ModelSerializer):
         if request and request.user.is_authenticated:
             other_user = obj.get_other_participant(request.user)
             return UserSerializer(other_user).data
-        return None
\ No newline at end of file
+        return None
+
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        paginator = MessagePagination()
+        page = paginator.paginate_queryset(obj.messages.select_related('sender'), self.context['request'])
+        context = {**self.context, 'read_watermarks': unread.watermarks(obj.pk)}
+        data['messages'] = MessageSerializer(page, many=True, context=context).data
+        data['messages_next_cursor'] = paginator.get_next_cursor()
+        return data
@@ -1,3 +1,348 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import Conversation, ConversationReadState, Message
+from .routing import websocket_urlpatterns
+from . import messages, unread, writer
 
-# Create your tests here.
+User = get_user_model()
+
+# Unread counts are pushed over the channel layer; keep them in memory
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+def make_user(username):
+    return User.objects.create_user(username=username, email=f'{username}@example.com', password='pw')
+
+
+class ChatTestCase(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        self.conversation, _ = Conversation.get_or_create_conversation(self.alice, self.bob)
+        self.client = APIClient()
+
+    def refresh(self):
+        self.conversation.refresh_from_db()
+        return self.conversation
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class InboxSnapshotTests(ChatTestCase):
+    def assertSnapshot(self, message):
+        conversation = self.refresh()
+        self.assertEqual(conversation.last_message_id, message.pk)
+        self.assertEqual(conversation.last_message_preview, message.content[:messages.PREVIEW_LENGTH])
+        self.assertEqual(conversation.last_message_sender_id, message.sender_id)
+        self.assertEqual(conversation.last_message_at, message.created_at)
+
+    def test_send_message_updates_the_snapshot(self):
+        messages.send_message(self.conversation, self.alice, 'hi')
+        latest = messages.send_message(self.conversation, self.bob, 'x' * 300)
+        self.assertSnapshot(latest)
+        self.assertEqual(len(self.refresh().last_message_preview), messages.PREVIEW_LENGTH)
+        self.assertEqual(self.conversation.updated_at, latest.created_at)
+
+    def test_older_message_does_not_replace_a_newer_snapshot(self):
+        newer = messages.send_message(self.conversation, self.alice, 'newer')
+        older = Message.objects.create(
+            conversation=self.conversation, sender=self.bob, content='older',
+            created_at=newer.created_at - timedelta(seconds=5),
+        )
+        messages.record_last_message(self.conversation, older)
+        self.assertSnapshot(newer)
+
+    def test_save_batch_records_the_newest_message_per_conversation(self):
+        carol = make_user('carol')
+        other, _ = Conversation.get_or_create_conversation(self.alice, carol)
+        now = timezone.now()
+        batch = [
+            Message(conversation_id=self.conversation.pk, sender_id=self.alice.pk, content='a1', created_at=now),
+            Message(conversation_id=other.pk, sender_id=carol.pk, content='c1', created_at=now + timedelta(microseconds=1)),
+            Message(conversation_id=self.conversation.pk, sender_id=self.bob.pk, content='b1', created_at=now + timedelta(microseconds=2)),
+        ]
+        self.assertEqual(messages.save_batch(batch), 3)
+        self.assertSnapshot(batch[2])
+        other.refresh_from_db()
+        self.assertEqual(other.last_message_id, batch[1].pk)
+
+    def test_rebuild_snapshots_after_bulk_inserts(self):
+        now = timezone.now()
+        Message.objects.bulk_create([
+            Message(conversation=self.conversation, sender=self.alice, content=f'm{i}', created_at=now + timedelta(seconds=i))
+            for i in range(3)
+        ])
+        self.assertIsNone(self.refresh().last_message_id)
+        messages.rebuild_snapshots()
+        self.assertSnapshot(Message.objects.get(content='m2'))
+
+    def test_inbox_lists_snapshots_in_constant_queries(self):
+        def inbox_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/chat/conversations/')
+            self.assertEqual(response.status_code, 200)
+            return response.data, len(queries)
+
+        self.client.force_authenticate(self.alice)
+        messages.send_message(self.conversation, self.bob, 'hello')
+        data, one_conversation = inbox_queries()
+        self.assertEqual(data[0]['last_message']['content'], 'hello')
+        self.assertEqual(data[0]['last_message']['sender_username'], 'bob')
+        self.assertEqual(data[0]['unread_count'], 1)
+
+        for i in range(5):
+            other, _ = Conversation.get_or_create_conversation(self.alice, make_user(f'friend{i}'))
+            messages.send_message(other, self.alice, f'ping {i}')
+        data, six_conversations = inbox_queries()
+        self.assertEqual(len(data), 6)
+        self.assertEqual(data[0]['last_message']['content'], 'ping 4')
+        self.assertEqual(six_conversations, one_conversation)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class UnreadCounterTests(ChatTestCase):
+    def counts(self, conversation=None):
+        conversation = conversation or self.conversation
+        return {
+            user.username: unread.conversation_unread(conversation.pk, user.pk)
+            for user in (conversation.participant1, conversation.participant2)
+        }
+
+    def test_messages_count_for_the_recipient_only(self):
+        for i in range(3):
+            messages.send_message(self.conversation, self.alice, f'hi {i}')
+        messages.send_message(self.conversation, self.bob, 'hey')
+        self.assertEqual(self.counts(), {'alice': 1, 'bob': 3})
+
+        other, _ = Conversation.get_or_create_conversation(self.bob, make_user('carol'))
+        messages.send_message(other, other.get_other_participant(self.bob), 'yo')
+        self.assertEqual(unread.total_unread(self.bob.pk), 4)
+
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.get('/api/chat/unread-count/').data, {'unread_count': 4})
+
+    def test_first_message_seeds_a_missing_row_from_history(self):
+        Message.objects.create(conversation=self.conversation, sender=self.alice, content='before tracking')
+        ConversationReadState.objects.all().delete()
+        messages.send_message(self.conversation, self.alice, 'tracked')
+        self.assertEqual(self.counts()['bob'], 2)
+
+    def test_rebuild_matches_incremental_counts(self):
+        for i in range(4):
+            messages.send_message(self.conversation, self.alice if i % 3 else self.bob, f'm{i}')
+        unread.mark_read(self.conversation, self.bob, upto=Message.objects.get(content='m1'))
+        expected = self.counts()
+
+        ConversationReadState.objects.update(unread_count=0)
+        unread.rebuild([self.conversation.pk])
+        self.assertEqual(self.counts(), expected)
+        self.assertEqual(expected, {'alice': 2, 'bob': 1})
+
+    def test_new_counts_are_pushed_after_commit(self):
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f'notifications_{self.bob.id}', channel)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            messages.send_message(self.conversation, self.alice, 'hi')
+        self.assertEqual(len(callbacks), 1)
+
+        event = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(event['type'], 'chat_unread')
+        self.assertEqual(
+            (event['conversation_id'], event['conversation_unread'], event['unread_count']),
+            (str(self.conversation.pk), 1, 1),
+        )
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class HistoryPaginationTests(ChatTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        # Two messages share a timestamp: the id breaks the tie
+        times = [now + timedelta(seconds=i) for i in range(6)] + [now + timedelta(seconds=5)]
+        Message.objects.bulk_create([
+            Message(conversation=self.conversation, sender=self.alice if i % 2 else self.bob, content=f'm{i}', created_at=created_at)
+            for i, created_at in enumerate(times)
+        ])
+        self.history = [
+            str(pk) for pk in Message.objects.filter(conversation=self.conversation).order_by('created_at', 'id').values_list('pk', flat=True)
+        ]
+        self.url = f'/api/chat/conversations/{self.conversation.pk}/messages/'
+        self.client.force_authenticate(self.alice)
+
+    def test_before_cursor_walks_back_in_oldest_first_pages(self):
+        pages, before = [], None
+        while True:
+            response = self.client.get(self.url, {'limit': 3, **({'before': before} if before else {})})
+            self.assertEqual(response.status_code, 200)
+            pages.append([message['id'] for message in response.data['results']])
+            before = response.data['next_cursor']
+            if before is None:
+                break
+        self.assertEqual(pages, [self.history[4:], self.history[1:4], self.history[:1]])
+
+    def test_new_messages_do_not_shift_older_pages(self):
+        first = self.client.get(self.url, {'limit': 3}).data
+        messages.send_message(self.conversation, self.bob, 'newest')
+        second = self.client.get(self.url, {'limit': 3, 'before': first['next_cursor']}).data
+        self.assertEqual([message['id'] for message in second['results']], self.history[1:4])
+
+    def test_detail_embeds_the_newest_page_and_its_cursor(self):
+        data = self.client.get(f'/api/chat/conversations/{self.conversation.pk}/', {'limit': 2}).data
+        self.assertEqual([message['id'] for message in data['messages']], self.history[-2:])
+        older = self.client.get(self.url, {'limit': 10, 'before': data['messages_next_cursor']}).data
+        self.assertEqual([message['id'] for message in older['results']], self.history[:-2])
+
+    def test_outsiders_and_bad_cursors_are_rejected(self):
+        self.client.force_authenticate(make_user('mallory'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.get(self.url, {'before': 'garbage'}).status_code, 404)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class WatermarkTests(ChatTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        # m2 and m3 share a timestamp: the watermark orders them by id
+        Message.objects.bulk_create([
+            Message(conversation=self.conversation, sender=self.alice, content=f'm{i}', created_at=now + timedelta(seconds=min(i, 2)))
+            for i in range(4)
+        ])
+        self.history = list(Message.objects.filter(conversation=self.conversation).order_by('created_at', 'id'))
+        unread.rebuild([self.conversation.pk])
+        self.state = ConversationReadState.objects.filter(conversation=self.conversation, user=self.bob)
+
+    def test_mark_read_recounts_what_is_left_in_the_same_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            watermark = unread.mark_read(self.conversation, self.bob, upto=self.history[1])
+        self.assertEqual(watermark, (self.history[1].created_at, self.history[1].pk))
+        self.assertEqual(self.state.get().unread_count, 2)
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT COUNT')])
+
+    def test_watermark_only_moves_forward(self):
+        unread.mark_read(self.conversation, self.bob)
+        self.assertEqual(self.state.get().unread_count, 0)
+        self.assertIsNone(unread.mark_read(self.conversation, self.bob, upto=self.history[0]))
+        self.assertEqual(self.state.get().last_read_message_id, self.history[-1].pk)
+
+    def test_missing_row_is_created(self):
+        self.state.delete()
+        unread.mark_read(self.conversation, self.bob, upto=self.history[0])
+        self.assertEqual(self.state.get().unread_count, 3)
+
+    def test_same_timestamp_messages_are_ordered_by_id(self):
+        unread.mark_read(self.conversation, self.bob, upto=self.history[2])
+        self.assertEqual(self.state.get().unread_count, 1)
+        watermarks = unread.watermarks(self.conversation.pk)
+        self.assertEqual([unread.is_read(message, watermarks) for message in self.history], [True, True, True, False])
+
+        # The inbox tick agrees with the per-message flag on a timestamp tie
+        self.client.force_authenticate(self.alice)
+        messages.record_last_message(self.conversation, self.history[3])
+        inbox = self.client.get('/api/chat/conversations/').data
+        self.assertFalse(inbox[0]['last_message']['is_read'])
+        unread.mark_read(self.conversation, self.bob)
+        inbox = self.client.get('/api/chat/conversations/').data
+        self.assertTrue(inbox[0]['last_message']['is_read'])
+
+    def test_deleted_watermark_message_still_covers_its_time(self):
+        unread.mark_read(self.conversation, self.bob, upto=self.history[1])
+        self.history[1].delete()
+        watermarks = unread.watermarks(self.conversation.pk)
+        self.assertEqual([unread.is_read(message, watermarks) for message in self.history[:1] + self.history[2:]], [True, False, False])
+
+
+@override_settings(
+    CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+    CHAT_WRITE_BEHIND=True, CHAT_WRITE_BEHIND_MAX_DELAY_MS=20, CHAT_WRITE_BEHIND_MAX_BATCH=3,
+)
+class WriteBehindTests(ChatTestCase):
+    def setUp(self):
+        super().setUp()
+        self.writer = writer.MessageWriter()
+
+    async def stored(self):
+        return [message.content async for message in Message.objects.order_by('created_at', 'id')]
+
+    async def test_window_closes_after_the_delay(self):
+        sent = await self.writer.add(self.conversation, self.alice, 'one')
+        self.assertEqual(await self.stored(), [])
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(await self.stored(), ['one'])
+        conversation = await Conversation.objects.aget(pk=self.conversation.pk)
+        self.assertEqual((conversation.last_message_id, conversation.last_message_at), (sent.pk, sent.created_at))
+        self.assertEqual(await database_sync_to_async(unread.conversation_unread)(self.conversation.pk, self.bob.pk), 1)
+
+    async def test_full_batch_is_written_at_once(self):
+        sent = [await self.writer.add(self.conversation, self.alice, f'm{i}') for i in range(3)]
+        self.assertEqual(await self.stored(), ['m0', 'm1', 'm2'])
+        self.assertIsNone(self.writer._task)
+        # Stamps are strictly increasing, so the batch keeps its arrival order
+        self.assertEqual(sorted(sent, key=messages.sequence), sent)
+
+    def test_write_drops_only_the_rows_that_fail(self):
+        existing = messages.send_message(self.conversation, self.alice, 'existing')
+        now = timezone.now()
+        batch = [
+            Message(conversation_id=self.conversation.pk, sender_id=self.bob.pk, content='ok', created_at=now),
+            Message(id=existing.pk, conversation_id=self.conversation.pk, sender_id=self.bob.pk, content='dup', created_at=now),
+        ]
+        with self.assertLogs('chat.writer', level='ERROR') as logs:
+            self.assertEqual(self.writer.write(batch), 1)
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(
+            list(Message.objects.order_by('created_at', 'id').values_list('content', flat=True)),
+            ['existing', 'ok'],
+        )
+        self.assertEqual(unread.conversation_unread(self.conversation.pk, self.alice.pk), 1)
+
+    def test_save_batch_counts_each_recipient_once_per_conversation(self):
+        carol = make_user('carol')
+        other, _ = Conversation.get_or_create_conversation(self.bob, carol)
+        now = timezone.now()
+        batch = [
+            Message(conversation_id=self.conversation.pk, sender_id=self.alice.pk, content='a1', created_at=now),
+            Message(conversation_id=self.conversation.pk, sender_id=self.alice.pk, content='a2', created_at=now + timedelta(microseconds=1)),
+            Message(conversation_id=other.pk, sender_id=carol.pk, content='c1', created_at=now + timedelta(microseconds=2)),
+            Message(conversation_id=self.conversation.pk, sender_id=self.bob.pk, content='b1', created_at=now + timedelta(microseconds=3)),
+        ]
+        with self.captureOnCommitCallbacks() as callbacks:
+            messages.save_batch(batch)
+        # One push per recipient per conversation: bob twice, alice once
+        self.assertEqual(len(callbacks), 3)
+        self.assertEqual(unread.conversation_unread(self.conversation.pk, self.bob.pk), 2)
+        self.assertEqual(unread.conversation_unread(self.conversation.pk, self.alice.pk), 1)
+        self.assertEqual(unread.total_unread(self.bob.pk), 3)
+
+    async def test_read_receipt_waits_for_a_message_buffered_in_another_worker(self):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/chat/{self.conversation.pk}/')
+        communicator.scope['user'] = self.bob
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()  # own user_status
+
+        # The sender's worker has accepted the message but not written it yet
+        sender_worker = writer.MessageWriter()
+        sent = await sender_worker.add(self.conversation, self.alice, 'hi')
+        await communicator.send_json_to({'action': 'mark_read', 'message_id': str(sent.pk)})
+
+        event = await communicator.receive_json_from(timeout=2)
+        self.assertEqual((event['type'], event['last_read_message_id']), ('messages_read', str(sent.pk)))
+        await communicator.disconnect()
+        state = await ConversationReadState.objects.aget(conversation=self.conversation, user=self.bob)
+        self.assertEqual((state.last_read_message_id, state.unread_count), (sent.pk, 0))
@@ -0,0 +1,174 @@
+from collections import Counter
+from functools import partial
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from posts.pagination import keyset_filter
+from .models import Conversation, ConversationReadState, Message
+
+
+def _other_participant_id(conversation, user_id):
+    return conversation.participant2_id if conversation.participant1_id == user_id else conversation.participant1_id
+
+
+def _incoming(conversation_id, user_id, watermark=None):
+    """Messages ``user_id`` received in the conversation after ``watermark`` (a ``(created_at, id)`` pair)."""
+    messages = Message.objects.filter(conversation_id=conversation_id).exclude(sender_id=user_id)
+    if watermark is not None and watermark[0] is not None:
+        messages = messages.filter(keyset_filter(watermark, descending=False))
+    return messages
+
+
+def _count(messages):
+    """``COUNT`` of ``messages`` as a subquery expression, 0 when there are none."""
+    return Coalesce(Subquery(messages.values('conversation').annotate(n=Count('pk')).values('n')), Value(0))
+
+
+def _get_state(conversation, user_id):
+    try:
+        with transaction.atomic():
+            state, _ = ConversationReadState.objects.get_or_create(conversation=conversation, user_id=user_id)
+    except IntegrityError:
+        # A concurrent writer created the row first
+        state = ConversationReadState.objects.get(conversation=conversation, user_id=user_id)
+    return state
+
+
+def message_created(conversation, message):
+    """Count ``message`` as unread for the recipient. Call inside the insert's transaction."""
+    messages_created(conversation, [message])
+
+
+def messages_created(conversation, messages):
+    """Count a batch of the conversation's new messages as unread: one update per recipient."""
+    received = Counter(_other_participant_id(conversation, message.sender_id) for message in messages)
+    for recipient_id, count in received.items():
+        states = ConversationReadState.objects.filter(conversation=conversation, user_id=recipient_id)
+        if not states.update(unread_count=F('unread_count') + count):
+            # First message to this participant: seed the row from the messages table
+            state = _get_state(conversation, recipient_id)
+            states.update(unread_count=_incoming(conversation.pk, recipient_id, (state.last_read_at, state.last_read_message_id)).count())
+        transaction.on_commit(partial(push, recipient_id, conversation.pk))
+
+
+def mark_read(conversation, user, upto=None):
+    """Advance ``user``'s read watermark to message ``upto`` (default: the newest message).
+
+    A single-row write; the unread counter is recomputed from the index range
+    after the new watermark inside the same UPDATE, so a message counted by a
+    concurrent ``message_created`` is not lost between two statements.
+    Returns the new ``(created_at, message_id)`` watermark, or None when it
+    did not move forward.
+    """
+    if upto is None:
+        upto = Message.objects.filter(conversation=conversation).order_by('-created_at', '-id').first()
+        if upto is None:
+            return None
+    watermark = (upto.created_at, upto.pk)
+
+    states = ConversationReadState.objects.filter(conversation=conversation, user=user)
+    behind = Q(last_read_at__isnull=True) | keyset_filter(watermark, created_field='last_read_at', pk_field='last_read_message_id')
+
+    def advance():
+        return states.filter(behind).update(
+            last_read_message=upto,
+            last_read_at=upto.created_at,
+            unread_count=_count(_incoming(conversation.pk, user.pk, watermark)),
+        )
+
+    advanced = advance()
+    if not advanced and not states.exists():
+        _get_state(conversation, user.pk)
+        advanced = advance()
+    if not advanced:
+        return None
+    transaction.on_commit(lambda: push(user.pk, conversation.pk))
+    return watermark
+
+
+def watermarks(conversation_id):
+    """``{user_id: (last_read_at, last_read_message_id)}`` for the conversation's participants."""
+    return {
+        user_id: (last_read_at, message_id)
+        for user_id, last_read_at, message_id in ConversationReadState.objects.filter(
+            conversation_id=conversation_id, last_read_at__isnull=False
+        ).values_list('user_id', 'last_read_at', 'last_read_message_id')
+    }
+
+
+def covers(watermark, position):
+    """Whether a ``(last_read_at, last_read_message_id)`` watermark is at or past ``(created_at, id)``.
+
+    The same order as the keyset filters: by time, then id. A watermark whose
+    message was deleted (id None) covers everything up to its time.
+    """
+    read_at, read_id = watermark
+    if read_at is None:
+        return False
+    created_at, message_id = position
+    if created_at != read_at:
+        return created_at < read_at
+    return read_id is None or message_id <= read_id
+
+
+def is_read(message, read_watermarks):
+    """Whether a participant other than the sender has read up to ``message``."""
+    position = (message.created_at, message.pk)
+    return any(
+        user_id != message.sender_id and covers(watermark, position)
+        for user_id, watermark in read_watermarks.items()
+    )
+
+
+def conversation_unread(conversation_id, user_id):
+    return ConversationReadState.objects.filter(
+        conversation_id=conversation_id, user_id=user_id
+    ).values_list('unread_count', flat=True).first() or 0
+
+
+def total_unread(user_id):
+    """Unread messages across all of the user's conversations (one indexed SUM)."""
+    return ConversationReadState.objects.filter(user_id=user_id).aggregate(total=Sum('unread_count'))['total'] or 0
+
+
+def rebuild(conversation_ids=None):
+    """Recount both participants' counters from their watermarks (after bulk inserts)."""
+    conversations = Conversation.objects.all()
+    if conversation_ids is not None:
+        conversations = conversations.filter(id__in=conversation_ids)
+    states = [
+        ConversationReadState(conversation_id=conversation_id, user_id=user_id)
+        for conversation_id, participant1_id, participant2_id in conversations.values_list('id', 'participant1', 'participant2').iterator()
+        for user_id in (participant1_id, participant2_id)
+    ]
+    ConversationReadState.objects.bulk_create(states, batch_size=2000, ignore_conflicts=True)
+
+    states = ConversationReadState.objects.filter(conversation__in=conversations)
+    incoming = Message.objects.filter(conversation=OuterRef('conversation')).exclude(sender=OuterRef('user'))
+    after_watermark = incoming.filter(
+        Q(created_at__gt=OuterRef('last_read_at'))
+        | Q(created_at=OuterRef('last_read_at'), id__gt=OuterRef('last_read_message'))
+    )
+
+    return (
+        states.filter(last_read_at__isnull=True).update(unread_count=_count(incoming))
+        + states.filter(last_read_at__isnull=False).update(unread_count=_count(after_watermark))
+    )
+
+
+def push(user_id, conversation_id):
+    """Send the new counts to the user's notification socket so clients need not poll."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(
+        f"notifications_{user_id}",
+        {
+            'type': 'chat_unread',
+            'conversation_id': str(conversation_id),
+            'conversation_unread': conversation_unread(conversation_id, user_id),
+            'unread_count': total_unread(user_id),
+        }
+    )
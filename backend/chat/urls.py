@@ -3,7 +3,7 @@ from .views import (
     ConversationListView,
     ConversationDetailView,
     StartConversationView,
-    SendMessageView,
+    ConversationMessagesView,
     UnreadCountView
 )
 
@@ -11,6 +11,6 @@ urlpatterns = [
     path('conversations/', ConversationListView.as_view(), name='conversation-list'),
     path('conversations/<uuid:conversation_id>/', ConversationDetailView.as_view(), name='conversation-detail'),
     path('conversations/start/', StartConversationView.as_view(), name='start-conversation'),
-    path('conversations/<uuid:conversation_id>/messages/', SendMessageView.as_view(), name='send-message'),
+    path('conversations/<uuid:conversation_id>/messages/', ConversationMessagesView.as_view(), name='conversation-messages'),
     path('unread-count/', UnreadCountView.as_view(), name='unread-count'),
 ]
\ No newline at end of file
@@ -4,8 +4,11 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-from django.db.models import Q
-from .models import Conversation, Message
+from django.db.models import OuterRef, Q, Subquery, UUIDField
+from django.db.models.functions import Coalesce
+from .models import Conversation, ConversationReadState, Message
+from . import messages, unread
+from .pagination import MessagePagination
 from .serializers import (
     ConversationSerializer, 
     ConversationDetailSerializer,
@@ -19,8 +22,21 @@ class ConversationListView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
+        unread_count = ConversationReadState.objects.filter(
+            conversation=OuterRef('pk'), user=request.user
+        ).values('unread_count')[:1]
+        # Watermark of whoever received the last message, for its read tick
+        recipient_state = ConversationReadState.objects.filter(
+            conversation=OuterRef('pk')
+        ).exclude(user=OuterRef('last_message_sender'))
         conversations = Conversation.objects.filter(
             Q(participant1=request.user) | Q(participant2=request.user)
+        ).select_related(
+            'participant1', 'participant2', 'last_message_sender'
+        ).annotate(
+            unread_messages=Coalesce(Subquery(unread_count), 0),
+            last_message_read_at=Subquery(recipient_state.values('last_read_at')[:1]),
+            last_message_read_id=Subquery(recipient_state.values('last_read_message')[:1], output_field=UUIDField())
         ).order_by('-updated_at')
         
         serializer = ConversationSerializer(
@@ -36,17 +52,17 @@ class ConversationDetailView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request, conversation_id):
-        conversation = get_object_or_404(Conversation, id=conversation_id)
+        conversation = get_object_or_404(
+            Conversation.objects.select_related('participant1', 'participant2'), id=conversation_id
+        )
         
-        if conversation.participant1 != request.user and conversation.participant2 != request.user:
+        if request.user.pk not in (conversation.participant1_id, conversation.participant2_id):
             return Response(
                 {'error': 'You are not a participant in this conversation'}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        Message.objects.filter(
-            conversation=conversation
-        ).exclude(sender=request.user).update(is_read=True)
+        unread.mark_read(conversation, request.user)
         
         serializer = ConversationDetailSerializer(
             conversation, 
@@ -93,13 +109,36 @@ class StartConversationView(APIView):
         )
 
 
-class SendMessageView(APIView):
+class ConversationMessagesView(APIView):
+    """GET ``?before=<cursor>&limit=N`` pages back through history; POST sends a message."""
     permission_classes = [IsAuthenticated]
     
+    def get(self, request, conversation_id):
+        conversation = get_object_or_404(Conversation, id=conversation_id)
+        
+        if request.user.pk not in (conversation.participant1_id, conversation.participant2_id):
+            return Response(
+                {'error': 'You are not a participant in this conversation'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        paginator = MessagePagination()
+        page = paginator.paginate_queryset(
+            Message.objects.filter(conversation=conversation).select_related('sender'),
+            request,
+            view=self
+        )
+        serializer = MessageSerializer(
+            page,
+            many=True,
+            context={'request': request, 'read_watermarks': unread.watermarks(conversation.pk)}
+        )
+        return paginator.get_paginated_response(serializer.data)
+    
     def post(self, request, conversation_id):
         conversation = get_object_or_404(Conversation, id=conversation_id)
         
-        if conversation.participant1 != request.user and conversation.participant2 != request.user:
+        if request.user.pk not in (conversation.participant1_id, conversation.participant2_id):
             return Response(
                 {'error': 'You are not a participant in this conversation'}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -113,11 +152,7 @@ class SendMessageView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        message = Message.objects.create(
-            conversation=conversation,
-            sender=request.user,
-            content=content
-        )
+        message = messages.send_message(conversation, request.user, content)
         
         serializer = MessageSerializer(message)
         
@@ -128,9 +163,4 @@ class UnreadCountView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        unread_count = Message.objects.filter(
-            Q(conversation__participant1=request.user) | Q(conversation__participant2=request.user),
-            is_read=False
-        ).exclude(sender=request.user).count()
-        
-        return Response({'unread_count': unread_count})
\ No newline at end of file
+        return Response({'unread_count': unread.total_unread(request.user.pk)})
\ No newline at end of file
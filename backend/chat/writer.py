@@ -0,0 +1,124 @@
+import asyncio
+import atexit
+import logging
+from datetime import timedelta
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from .models import Message
+from . import messages
+
+logger = logging.getLogger(__name__)
+
+# Batch windows a read receipt waits for a message still buffered in another worker
+READ_RETRIES = 3
+
+
+def enabled():
+    return getattr(settings, 'CHAT_WRITE_BEHIND', False)
+
+
+def max_delay():
+    """Seconds a message may wait in memory before its batch is written."""
+    return getattr(settings, 'CHAT_WRITE_BEHIND_MAX_DELAY_MS', 50) / 1000
+
+
+def max_batch():
+    return getattr(settings, 'CHAT_WRITE_BEHIND_MAX_BATCH', 500)
+
+
+class MessageWriter:
+    """Write-behind buffer for chat messages received on sockets.
+
+    ``add`` stamps a message with its id and ``created_at`` and returns it
+    unsaved, so the consumer can broadcast straight away. The first message of
+    a batch opens a window of ``max_delay()``. The batch is written with one
+    ``bulk_create`` when that window closes or when it reaches ``max_batch()``
+    messages, whichever comes first. State lives in the worker's event loop, so
+    each worker process writes its own messages. Pending messages are flushed
+    on ASGI lifespan shutdown (servers such as uvicorn; daphne sends no
+    lifespan events), or at interpreter exit as a fallback. Nothing runs on
+    SIGKILL or a crash, so up to ``max_delay()`` of accepted messages is lost.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._task = None
+        self._lock = None
+        self._last_created_at = None
+
+    def _now(self):
+        # Strictly increasing per process, so sequence numbers never tie
+        now = timezone.now()
+        if self._last_created_at is not None and now <= self._last_created_at:
+            now = self._last_created_at + timedelta(microseconds=1)
+        self._last_created_at = now
+        return now
+
+    async def add(self, conversation, sender, content):
+        message = Message(conversation_id=conversation.pk, sender_id=sender.pk, content=content, created_at=self._now())
+        self._pending.append(message)
+        if len(self._pending) >= max_batch():
+            await self.flush()
+        elif self._task is None:
+            self._task = asyncio.ensure_future(self._flush_later(max_delay()))
+        return message
+
+    async def _flush_later(self, delay):
+        await asyncio.sleep(delay)
+        self._task = None
+        await self.flush()
+
+    async def flush(self):
+        """Write everything pending now; returns the number of messages written."""
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        self._task = None
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # Batches are written one at a time so they commit in the order accepted
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            return await database_sync_to_async(self.write)(batch)
+
+    def write(self, batch):
+        try:
+            return messages.save_batch(batch)
+        except Exception:
+            logger.exception('Batch insert of %s chat messages failed; retrying one by one', len(batch))
+
+        # Isolate the rows that cannot be written (e.g. their conversation was deleted)
+        written = 0
+        for message in batch:
+            try:
+                written += messages.save_batch([message])
+            except Exception:
+                logger.exception('Dropping chat message %s in conversation %s', message.pk, message.conversation_id)
+        return written
+
+    def flush_sync(self):
+        """Write pending messages without an event loop (process exit)."""
+        # The loop is gone by now, so the window task is dropped, not cancelled
+        self._task = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.write(batch)
+
+
+message_writer = MessageWriter()
+
+atexit.register(message_writer.flush_sync)
+
+
+async def lifespan(scope, receive, send):
+    """ASGI lifespan app: flush buffered chat messages when the server shuts down."""
+    while True:
+        event = await receive()
+        if event['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif event['type'] == 'lifespan.shutdown':
+            await message_writer.flush()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
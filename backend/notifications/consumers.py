@@ -55,6 +55,14 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'notification': notification
         }))
     
+    async def chat_unread(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'chat_unread',
+            'conversation_id': event['conversation_id'],
+            'conversation_unread': event['conversation_unread'],
+            'unread_count': event['unread_count']
+        }))
+    
     @database_sync_to_async
     def mark_notification_read(self, notification_id):
         from notifications.models import Notification
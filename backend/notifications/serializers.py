@@ -1,16 +1,22 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import Notification
+from uploads.images import avatar_url
 
 User = get_user_model()
 
 
 
 class NotificationSenderSerializer(serializers.ModelSerializer):
+    profile_picture = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = ['id', 'username', 'profile_picture']
 
+    def get_profile_picture(self, obj):
+        return avatar_url(obj, self.context.get('request'))
+
 
 class NotificationSerializer(serializers.ModelSerializer):
     sender = NotificationSenderSerializer(read_only=True)
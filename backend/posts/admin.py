@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Post, Comment
+from .models import Post, Comment, Hashtag
 
 admin.site.register(Post)
-admin.site.register(Comment)
\ No newline at end of file
+admin.site.register(Comment)
+admin.site.register(Hashtag)
\ No newline at end of file
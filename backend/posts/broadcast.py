@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from channels.db import database_sync_to_async
+from django.conf import settings
+from .models import Post
+from . import counters
+
+logger = logging.getLogger(__name__)
+
+LIKER_SAMPLE_SIZE = 5
+
+
+def flush_interval():
+    return getattr(settings, 'POST_LIKE_BROADCAST_INTERVAL', 0.25)
+
+
+class LikeBroadcaster:
+    """Collapse like events per post into one ``like_update`` per flush interval.
+
+    The first like on a post opens a window; likes arriving before it closes only
+    update the pending entry, and a single group message then carries the fresh
+    count plus the most recent likers. State lives in the worker's event loop, so
+    each worker process coalesces its own events.
+    """
+
+    def __init__(self):
+        self._pending = {}
+
+    async def add(self, channel_layer, post_id, user_id, username, liked):
+        # Key by UUID so callers passing the URL string coalesce with the rest
+        # and the counter lookup (keyed by UUID) finds the post
+        post_id = Post._meta.pk.to_python(post_id)
+        pending = self._pending.get(post_id)
+        if pending is None:
+            pending = self._pending[post_id] = {'channel_layer': channel_layer, 'events': 0, 'likers': {}}
+            interval = flush_interval()
+            if interval > 0:
+                pending['task'] = asyncio.ensure_future(self._flush_later(post_id, interval))
+
+        pending['events'] += 1
+        likers = pending['likers']
+        likers.pop(user_id, None)
+        likers[user_id] = (username, liked)
+        if len(likers) > LIKER_SAMPLE_SIZE:
+            del likers[next(iter(likers))]
+
+        if 'task' not in pending:
+            await self.flush(post_id)
+
+    async def _flush_later(self, post_id, interval):
+        await asyncio.sleep(interval)
+        try:
+            await self.flush(post_id)
+        except Exception:
+            # Nothing awaits this task, so log here rather than lose the error
+            logger.exception('like_update broadcast failed for post %s', post_id)
+
+    async def flush(self, post_id):
+        pending = self._pending.pop(post_id, None)
+        if pending is None:
+            return
+
+        like_count = await database_sync_to_async(counters.get_like_count)(post_id)
+        likers = [
+            {'user_id': user_id, 'username': username, 'liked': liked}
+            for user_id, (username, liked) in pending['likers'].items()
+        ]
+        latest = likers[-1]
+        await pending['channel_layer'].group_send(f'post_{post_id}', {
+            'type': 'like_update',
+            'user_id': latest['user_id'],
+            'username': latest['username'],
+            'liked': latest['liked'],
+            'like_count': like_count,
+            'likers': likers,
+            'events': pending['events'],
+        })
+
+
+like_broadcaster = LikeBroadcaster()
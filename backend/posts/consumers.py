@@ -1,16 +1,22 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.db import transaction
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
-from .models import Post, Comment
+from accounts.models import Follow
+from .models import Comment
+from . import counters, likes, post_meta
+from .broadcast import like_broadcaster
+from uploads.images import avatar_url
 
 User = get_user_model()
 
 class PostConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.post_id = self.scope['url_route']['kwargs']['post_id']
-        self.room_group_name = f'post_{self.post_id}'
+        self.post_pk = post_meta.post_pk(self.post_id)
+        self.room_group_name = f'post_{self.post_pk}'
         
         # Use user from middleware
         self.user = self.scope.get('user')
@@ -19,10 +25,16 @@ class PostConsumer(AsyncWebsocketConsumer):
             await self.close(code=4001)
             return
 
-        post = await self.get_post(self.post_id)
-        if not post:
+        meta = await post_meta.aget_meta(self.post_pk)
+        if not meta['active']:
             await self.close(code=4002)
             return
+        # Follow state is only needed for friends-only posts by someone else, and
+        # is resolved at most once per connection; actions re-check cached metadata
+        self.follows_author = None
+        if not await self.may_view(meta):
+            await self.close(code=4003)
+            return
 
         await self.channel_layer.group_add(
             self.room_group_name,
@@ -56,7 +68,8 @@ class PostConsumer(AsyncWebsocketConsumer):
                 return
 
             if action == 'like':
-                await self.handle_like()
+                liked = text_data_json.get('liked')
+                await self.handle_like(liked if isinstance(liked, bool) else None)
             elif action == 'comment':
                 content = text_data_json.get('content')
                 if content:
@@ -67,40 +80,28 @@ class PostConsumer(AsyncWebsocketConsumer):
         except Exception:
             pass
 
-    async def handle_like(self):
+    async def handle_like(self, liked=None):
         try:
-            post = await self.get_post(self.post_id)
             user = self.user
             
-            if post and user:
-                liked = await self.toggle_like(post, user)
-                like_count = await self.get_like_count(post)
+            if user and await self.can_act():
+                liked = await self.set_like(user, liked)
                 
-                # print(f"User {user.username} {'liked' if liked else 'unliked'} post {post.id}")
+                # print(f"User {user.username} {'liked' if liked else 'unliked'} post {self.post_pk}")
                 
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        'type': 'like_update',
-                        'user_id': str(user.id),
-                        'username': user.username,
-                        'liked': liked,
-                        'like_count': like_count,
-                    }
-                )
+                await like_broadcaster.add(self.channel_layer, self.post_pk, str(user.id), user.username, liked)
         except Exception as e:
             pass
             # print(f"Error handling like: {e}")
 
     async def handle_comment(self, content):
         try:
-            post = await self.get_post(self.post_id)
             user = self.user
             
-            if post and user:
-                comment = await self.create_comment(post, user, content)
+            if user and await self.can_act():
+                comment = await self.create_comment(user, content)
                 
-                # print(f"User {user.username} commented on post {post.id}")
+                # print(f"User {user.username} commented on post {self.post_pk}")
                 
                 await self.channel_layer.group_send(
                     self.room_group_name,
@@ -112,7 +113,7 @@ class PostConsumer(AsyncWebsocketConsumer):
                             'author': {
                                 'id': str(user.id),
                                 'username': user.username,
-                                'profile_picture': user.profile_picture.url if user.profile_picture else None,
+                                'profile_picture': avatar_url(user),
                             },
                             'created_at': comment.created_at.isoformat(),
                         }
@@ -129,6 +130,8 @@ class PostConsumer(AsyncWebsocketConsumer):
             'username': event['username'],
             'liked': event['liked'],
             'like_count': event['like_count'],
+            'likers': event.get('likers', []),
+            'events': event.get('events', 1),
         }))
 
     async def new_comment(self, event):
@@ -145,29 +148,34 @@ class PostConsumer(AsyncWebsocketConsumer):
             return None
 
     @database_sync_to_async
-    def get_post(self, post_id):
-        try:
-            return Post.objects.get(id=post_id, is_active=True)
-        except Post.DoesNotExist:
-            return None
+    def get_follows_author(self, author_id):
+        return Follow.objects.filter(follower=self.user, following_id=author_id).exists()
+
+    async def may_view(self, meta):
+        if (self.follows_author is None and meta['active'] and meta['privacy'] == 'friends'
+                and meta['author_id'] != self.user.id):
+            self.follows_author = await self.get_follows_author(meta['author_id'])
+        return post_meta.can_view(meta, self.user.id, self.follows_author)
+
+    async def can_act(self):
+        """Whether the post is still active and visible to this user (cached metadata only)."""
+        return await self.may_view(await post_meta.aget_meta(self.post_pk))
 
     @database_sync_to_async
-    def toggle_like(self, post, user):
-        if post.likes.filter(id=user.id).exists():
-            post.likes.remove(user)
-            return False
-        else:
-            post.likes.add(user)
-            return True
+    def set_like(self, user, liked=None):
+        return likes.set_liked(user, self.post_pk, liked)
 
     @database_sync_to_async
-    def get_like_count(self, post):
-        return post.likes.count()
+    def get_like_count(self):
+        return counters.get_like_count(self.post_pk)
 
     @database_sync_to_async
-    def create_comment(self, post, user, content):
-        return Comment.objects.create(
-            post=post,
-            author=user,
-            content=content
-        )
\ No newline at end of file
+    def create_comment(self, user, content):
+        with transaction.atomic():
+            comment = Comment.objects.create(
+                post_id=self.post_pk,
+                author=user,
+                content=content
+            )
+            counters.adjust(self.post_pk, comments=1)
+        return comment
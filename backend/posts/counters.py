@@ -0,0 +1,144 @@
+import random
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from .models import Post, Comment, PostCounterShard
+from . import engagement
+
+
+def shard_count():
+    """Number of counter shards per post; 0 updates the Post row directly."""
+    return getattr(settings, 'POST_COUNTER_SHARDS', 0)
+
+
+def adjust(post_id, likes=0, comments=0):
+    """Apply a like/comment delta to a post's counters.
+
+    Call this inside the same transaction as the write being counted.
+    """
+    if not likes and not comments:
+        return
+
+    transaction.on_commit(lambda: engagement.record(post_id, likes=likes, comments=comments))
+
+    shards = shard_count()
+    if not shards:
+        Post.objects.filter(pk=post_id).update(
+            like_count=F('like_count') + likes,
+            comment_count=F('comment_count') + comments,
+        )
+        return
+
+    shard = random.randrange(shards)
+    deltas = {'likes': F('likes') + likes, 'comments': F('comments') + comments}
+    if PostCounterShard.objects.filter(post_id=post_id, shard=shard).update(**deltas):
+        return
+    try:
+        with transaction.atomic():
+            PostCounterShard.objects.create(post_id=post_id, shard=shard, likes=likes, comments=comments)
+    except IntegrityError:
+        # Another writer created the shard row first
+        PostCounterShard.objects.filter(post_id=post_id, shard=shard).update(**deltas)
+
+
+def adjust_many(post_ids, likes=0, comments=0):
+    """Apply the same delta to several posts, in one UPDATE when counters are unsharded."""
+    post_ids = list(post_ids)
+    if not post_ids or (not likes and not comments):
+        return
+
+    if shard_count():
+        for post_id in post_ids:
+            adjust(post_id, likes=likes, comments=comments)
+        return
+
+    for post_id in post_ids:
+        transaction.on_commit(lambda post_id=post_id: engagement.record(post_id, likes=likes, comments=comments))
+    Post.objects.filter(pk__in=post_ids).update(
+        like_count=F('like_count') + likes,
+        comment_count=F('comment_count') + comments,
+    )
+
+
+def pending_counts(post_ids):
+    """``{post_id: (likes, comments)}`` held in shards and not yet rolled up (no query when unsharded)."""
+    if not shard_count():
+        return {}
+    pending = (
+        PostCounterShard.objects.filter(post_id__in=list(post_ids))
+        .values('post_id')
+        .annotate(likes=Sum('likes'), comments=Sum('comments'))
+    )
+    return {row['post_id']: (row['likes'], row['comments']) for row in pending}
+
+
+def with_pending(post_id, like_count, comment_count, pending):
+    """Add a post's entry from ``pending_counts`` to its stored counters."""
+    likes, comments = pending.get(post_id, (0, 0))
+    return like_count + likes, comment_count + comments
+
+
+def get_counts(post_ids, active_only=False):
+    """Return ``{post_id: (like_count, comment_count)}`` including deltas not yet rolled up."""
+    posts = Post.objects.filter(pk__in=post_ids)
+    if active_only:
+        posts = posts.filter(is_active=True)
+    counts = {
+        post_id: (likes, comments)
+        for post_id, likes, comments in posts.values_list('id', 'like_count', 'comment_count')
+    }
+    pending = pending_counts(counts)
+    return {post_id: with_pending(post_id, likes, comments, pending) for post_id, (likes, comments) in counts.items()}
+
+
+def get_like_count(post_id):
+    return get_counts([post_id]).get(post_id, (0, 0))[0]
+
+
+def rollup():
+    """Fold sharded deltas into the Post rows. Returns the number of posts updated."""
+    post_ids = list(PostCounterShard.objects.values_list('post_id', flat=True).distinct())
+    for post_id in post_ids:
+        with transaction.atomic():
+            shards = list(PostCounterShard.objects.select_for_update().filter(post_id=post_id))
+            Post.objects.filter(pk=post_id).update(
+                like_count=F('like_count') + sum(shard.likes for shard in shards),
+                comment_count=F('comment_count') + sum(shard.comments for shard in shards),
+            )
+            PostCounterShard.objects.filter(pk__in=[shard.pk for shard in shards]).delete()
+    return len(post_ids)
+
+
+def reconcile():
+    """Recompute every post's counters from the likes and active comments tables.
+
+    Returns the number of posts whose stored counters had drifted.
+    """
+    like_totals = (
+        Post.likes.through.objects.filter(post_id=OuterRef('pk'))
+        .values('post_id')
+        .annotate(n=Count('*'))
+        .values('n')
+    )
+    comment_totals = (
+        Comment.objects.filter(post_id=OuterRef('pk'), is_active=True)
+        .values('post_id')
+        .annotate(n=Count('*'))
+        .values('n')
+    )
+
+    with transaction.atomic():
+        PostCounterShard.objects.all().delete()
+        drifted = (
+            Post.objects.annotate(
+                actual_likes=Coalesce(Subquery(like_totals), 0),
+                actual_comments=Coalesce(Subquery(comment_totals), 0),
+            )
+            .filter(~Q(like_count=F('actual_likes')) | ~Q(comment_count=F('actual_comments')))
+            .values_list('pk', 'actual_likes', 'actual_comments')
+        )
+        drifted = list(drifted)
+        for post_id, likes, comments in drifted:
+            Post.objects.filter(pk=post_id).update(like_count=likes, comment_count=comments)
+    return len(drifted)
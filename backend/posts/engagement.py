@@ -0,0 +1,66 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+
+def bucket_seconds():
+    return getattr(settings, 'ENGAGEMENT_BUCKET_SECONDS', 300)
+
+
+def bucket_count():
+    return getattr(settings, 'ENGAGEMENT_BUCKETS', 12)
+
+
+def _key(post_id):
+    return f'engagement:{post_id}'
+
+
+def _empty_ring():
+    # Each slot is [bucket_number, likes, comments]; a slot whose bucket_number is
+    # not the current one for its position holds stale data and reads as zero.
+    return [[-1, 0, 0] for _ in range(bucket_count())]
+
+
+def record(post_id, likes=0, comments=0, now=None):
+    """Add a like/comment delta to the post's current time bucket.
+
+    The ring is one cache value per post, so this is a read-modify-write; under
+    concurrent writers an update can occasionally be lost, which is acceptable
+    for a ranking signal (lifetime totals live in ``posts.counters``).
+    """
+    if not likes and not comments:
+        return
+
+    size = bucket_seconds()
+    bucket = int((now if now is not None else time.time()) // size)
+    ring = cache.get(_key(post_id))
+    if ring is None or len(ring) != bucket_count():
+        ring = _empty_ring()
+
+    slot = ring[bucket % len(ring)]
+    if slot[0] != bucket:
+        slot[:] = [bucket, 0, 0]
+    slot[1] += likes
+    slot[2] += comments
+    cache.set(_key(post_id), ring, size * len(ring))
+
+
+def recent_counts(post_ids, window_seconds=3600, now=None):
+    """Return ``{post_id: (likes, comments)}`` for the trailing window.
+
+    One ``get_many`` for the whole batch and O(1) work per post.
+    """
+    size = bucket_seconds()
+    current = int((now if now is not None else time.time()) // size)
+    oldest = current - min(bucket_count(), max(1, window_seconds // size)) + 1
+
+    rings = cache.get_many([_key(post_id) for post_id in post_ids])
+    counts = {}
+    for post_id in post_ids:
+        likes = comments = 0
+        for bucket, bucket_likes, bucket_comments in rings.get(_key(post_id), ()):
+            if oldest <= bucket <= current:
+                likes += bucket_likes
+                comments += bucket_comments
+        counts[post_id] = (max(likes, 0), max(comments, 0))
+    return counts
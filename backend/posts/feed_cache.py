@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .models import Post
+from .ranking import score_batch, top_k
+from . import counters, engagement, timeline
+
+
+def cache_ttl():
+    return getattr(settings, 'RANKED_FEED_CACHE_TTL', 300)
+
+
+def snapshot_size():
+    return getattr(settings, 'RANKED_FEED_SNAPSHOT_SIZE', 500)
+
+
+def cache_key(user_id):
+    return f'ranked_feed:{user_id}'
+
+
+def invalidate(user_id):
+    cache.delete(cache_key(user_id))
+
+
+def _fetch_features(post_ids):
+    """``{post_id: [author_id, created_at, likes, comments]}`` for visible posts."""
+    rows = list(
+        Post.objects.filter(id__in=post_ids, is_active=True, privacy__in=timeline.FEED_PRIVACY)
+        .values_list('id', 'author_id', 'created_at', 'like_count', 'comment_count')
+    )
+    pending = counters.pending_counts([row[0] for row in rows])
+    return {
+        post_id: [author_id, created_at, *counters.with_pending(post_id, likes, comments, pending)]
+        for post_id, author_id, created_at, likes, comments in rows
+    }
+
+
+def _rank(snapshot, following_ids, recent=None):
+    """(Re-)apply the time decay and engagement terms and store the ranked order."""
+    now = timezone.now()
+    post_ids = list(snapshot['features'])
+    features = [snapshot['features'][post_id] for post_id in post_ids]
+    if recent is None:
+        recent = engagement.recent_counts(post_ids)
+    scores = score_batch(
+        [(now - created_at).total_seconds() / 3600.0 for _, created_at, _, _ in features],
+        [likes for _, _, likes, _ in features],
+        [comments for _, _, _, comments in features],
+        [author_id in following_ids for author_id, _, _, _ in features],
+        recent_likes=[recent[post_id][0] for post_id in post_ids],
+        recent_comments=[recent[post_id][1] for post_id in post_ids],
+    )
+    snapshot['order'] = [post_ids[i] for i in top_k(scores, snapshot_size())]
+    snapshot['recent'] = {post_id: recent[post_id] for post_id in post_ids}
+    snapshot['scored_at'] = now
+    return snapshot
+
+
+def _newest(features):
+    if not features:
+        return None
+    post_id, (_, created_at, _, _) = max(features.items(), key=lambda item: (item[1][1], item[0]))
+    return created_at, post_id
+
+
+def build(user, following_ids, candidate_limit):
+    candidate_ids = [post_id for _, post_id in timeline.read_timeline(user, candidate_limit, following_ids=following_ids)]
+    snapshot = {
+        'candidate_limit': candidate_limit,
+        'features': _fetch_features(candidate_ids),
+    }
+    snapshot['newest'] = _newest(snapshot['features'])
+    return _rank(snapshot, following_ids)
+
+
+def merge(snapshot, user, following_ids):
+    """Fold new posts and fresh engagement counts into an existing snapshot."""
+    limit = snapshot['candidate_limit']
+    new_ids = [
+        post_id for _, post_id in
+        timeline.read_timeline(user, limit, following_ids=following_ids, after=snapshot['newest'])
+    ]
+
+    # Only posts whose engagement ring moved since the last scoring have new
+    # counters, so only those (and new posts) are re-read. Cached posts deleted
+    # or hidden meanwhile are filtered out when a page is hydrated.
+    features = dict(snapshot['features'])
+    recent = engagement.recent_counts(list(features) + new_ids)
+    previous = snapshot.get('recent', {})
+    stale_ids = [post_id for post_id in features if recent[post_id] != previous.get(post_id)]
+    for post_id in stale_ids:
+        del features[post_id]
+    features.update(_fetch_features(stale_ids + new_ids))
+    if len(features) > limit:
+        newest_first = sorted(features.items(), key=lambda item: (item[1][1], item[0]), reverse=True)
+        features = dict(newest_first[:limit])
+
+    snapshot['features'] = features
+    snapshot['newest'] = _newest(features) or snapshot['newest']
+    return _rank(snapshot, following_ids, recent=recent)
+
+
+def get_ranked_ids(user, following_ids, candidate_limit, refresh=False):
+    """Ranked post ids for a user's feed, served from a cached snapshot.
+
+    The snapshot is rebuilt when missing or expired and merged incrementally
+    when ``refresh`` is set (first page loads); other pages are slices of the
+    same snapshot, so ordering stays stable while the client scrolls.
+    """
+    key = cache_key(user.id)
+    snapshot = cache.get(key)
+
+    if snapshot is None or snapshot['candidate_limit'] != candidate_limit:
+        snapshot = build(user, following_ids, candidate_limit)
+    elif refresh:
+        snapshot = merge(snapshot, user, following_ids)
+    else:
+        return snapshot['order']
+
+    cache.set(key, snapshot, cache_ttl())
+    return snapshot['order']
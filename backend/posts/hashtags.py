@@ -0,0 +1,167 @@
+import heapq
+import re
+import time
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Count
+from .models import Post, Hashtag, PostHashtag
+from .pagination import keyset_filter
+from .search import visible_posts_q
+
+HASHTAG_RE = re.compile(r'(?<![\w#&])#(\w+)', re.UNICODE)
+
+# Hashtag.name max_length; longer tags are dropped rather than truncated into a different tag
+MAX_TAG_LENGTH = 64
+
+BUCKET_SECONDS = 60
+
+
+def trending_window_minutes():
+    """Length of the sliding window (and number of per-minute buckets kept)."""
+    return getattr(settings, 'HASHTAG_TRENDING_WINDOW_MINUTES', 60)
+
+
+def extract(content):
+    """Case-folded hashtags in ``content``, in order of first appearance."""
+    tags = []
+    for match in HASHTAG_RE.finditer(content or ''):
+        tag = match.group(1).casefold()
+        # Skip pure numbers ("#1"), overlong tags and duplicates
+        if not tag.isdigit() and len(tag) <= MAX_TAG_LENGTH and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def _bucket_key(bucket):
+    return f'hashtags:minute:{bucket}'
+
+
+def record(tags, now=None):
+    """Count one use of each tag in the current minute bucket.
+
+    Buckets are separate cache values so a write only touches the current
+    minute. Like ``posts.engagement`` this is a read-modify-write: concurrent
+    writers can occasionally lose an increment, which is fine for trending.
+    """
+    if not tags or not shared_cache():
+        # trending() reads the tag index instead
+        return
+    bucket = int((now if now is not None else time.time()) // BUCKET_SECONDS)
+    key = _bucket_key(bucket)
+    counts = cache.get(key) or {}
+    for tag in tags:
+        counts[tag] = counts.get(tag, 0) + 1
+    cache.set(key, counts, BUCKET_SECONDS * (trending_window_minutes() + 1))
+
+
+def shared_cache():
+    """Whether the default cache is visible to every worker (LocMemCache is per process)."""
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def trending(limit=10, window_minutes=None, now=None):
+    """``[(tag, uses)]`` with the most uses over the trailing window, from at most one cache read per minute bucket.
+
+    Without a shared cache each worker would only count its own posts, so the
+    window is aggregated from the tag index instead (by post creation time).
+    """
+    window = min(window_minutes or trending_window_minutes(), trending_window_minutes())
+    now = now if now is not None else time.time()
+    if not shared_cache():
+        return _trending_from_index(limit, window, now)
+    current = int(now // BUCKET_SECONDS)
+    buckets = cache.get_many([_bucket_key(bucket) for bucket in range(current - window + 1, current + 1)])
+    totals = Counter()
+    for counts in buckets.values():
+        totals.update(counts)
+    return heapq.nlargest(limit, totals.items(), key=lambda item: (item[1], item[0]))
+
+
+def _trending_from_index(limit, window, now):
+    since = datetime.fromtimestamp(now - window * BUCKET_SECONDS, tz=dt_timezone.utc)
+    rows = (
+        PostHashtag.objects.filter(created_at__gte=since, post__is_active=True, post__privacy='public')
+        .values('hashtag__name').annotate(uses=Count('id'))
+        .order_by('-uses', '-hashtag__name')[:limit]
+    )
+    return [(row['hashtag__name'], row['uses']) for row in rows]
+
+
+def is_public(post):
+    return post.is_active and post.privacy == 'public'
+
+
+def count_post(post):
+    """Count every tag of a post that just became public toward trending."""
+    tags = extract(post.content)
+    if tags:
+        transaction.on_commit(lambda: record(tags))
+
+
+def sync_post(post, was_public=True):
+    """Bring the post's tag index rows in line with its content.
+
+    Newly added tags of public posts count toward trending, and so do all of
+    its tags when the post was not public before this save (``was_public``).
+    """
+    tags = extract(post.content)
+    with transaction.atomic():
+        current = dict(
+            PostHashtag.objects.filter(post=post).values_list('hashtag__name', 'id')
+        )
+        removed = [link_id for name, link_id in current.items() if name not in tags]
+        added = [tag for tag in tags if tag not in current]
+        if removed:
+            PostHashtag.objects.filter(id__in=removed).delete()
+        if added:
+            Hashtag.objects.bulk_create([Hashtag(name=tag) for tag in added], ignore_conflicts=True)
+            hashtag_ids = Hashtag.objects.filter(name__in=added).values_list('id', flat=True)
+            PostHashtag.objects.bulk_create(
+                [PostHashtag(hashtag_id=hashtag_id, post=post, created_at=post.created_at) for hashtag_id in hashtag_ids],
+                ignore_conflicts=True,
+            )
+
+    if not is_public(post):
+        return
+    if not was_public:
+        count_post(post)
+    elif added:
+        transaction.on_commit(lambda: record(added))
+
+
+def rebuild(batch_size=2000):
+    """Re-extract tags for every post (rows bulk-created elsewhere bypass the save signal)."""
+    with transaction.atomic():
+        PostHashtag.objects.all().delete()
+        hashtag_ids = dict(Hashtag.objects.values_list('name', 'id'))
+        linked = 0
+        batch = []
+        posts = Post.objects.values_list('id', 'content', 'created_at').iterator(chunk_size=batch_size)
+        for post_id, content, created_at in posts:
+            tags = extract(content)
+            missing = [tag for tag in tags if tag not in hashtag_ids]
+            if missing:
+                Hashtag.objects.bulk_create([Hashtag(name=tag) for tag in missing], ignore_conflicts=True)
+                hashtag_ids.update(Hashtag.objects.filter(name__in=missing).values_list('name', 'id'))
+            batch.extend(PostHashtag(hashtag_id=hashtag_ids[tag], post_id=post_id, created_at=created_at) for tag in tags)
+            if len(batch) >= batch_size:
+                PostHashtag.objects.bulk_create(batch, ignore_conflicts=True)
+                linked += len(batch)
+                batch = []
+        PostHashtag.objects.bulk_create(batch, ignore_conflicts=True)
+    return linked + len(batch)
+
+
+def tag_timeline(tag, user, limit, before=None):
+    """``(created_at, post_id)`` pairs for posts tagged ``tag`` that ``user`` may see, newest first.
+
+    Walks the ``['hashtag', '-created_at', '-post']`` index; ``before`` is a keyset position.
+    """
+    links = PostHashtag.objects.filter(visible_posts_q(user, prefix='post__'), hashtag__name=tag.lstrip('#').casefold())
+    if before is not None:
+        links = links.filter(keyset_filter(before, pk_field='post_id'))
+    return list(links.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[:limit])
@@ -0,0 +1,142 @@
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models.signals import m2m_changed
+from .models import Post
+from . import counters
+
+User = get_user_model()
+
+
+def _supports_returning():
+    # INSERT ... ON CONFLICT DO NOTHING / DELETE ... RETURNING (SQLite 3.35+, PostgreSQL)
+    return connection.vendor in ('sqlite', 'postgresql') and connection.features.can_return_rows_from_bulk_insert
+
+
+def _sql_names():
+    field = Post.likes.field
+    quote = connection.ops.quote_name
+    return (
+        quote(Post.likes.through._meta.db_table),
+        quote(field.m2m_column_name()),
+        quote(field.m2m_reverse_name()),
+    )
+
+
+def _prep(post_ids, user):
+    pk_field = Post._meta.pk
+    post_params = [pk_field.get_db_prep_value(pk_field.to_python(post_id), connection) for post_id in post_ids]
+    user_param = User._meta.pk.get_db_prep_value(user.pk, connection)
+    return post_params, user_param
+
+
+def _insert(user, post_ids):
+    """Insert missing like rows for active posts; return the post ids that were actually inserted."""
+    if not _supports_returning():
+        existing = set(
+            Post.likes.through.objects.filter(customuser_id=user.pk, post_id__in=post_ids).values_list('post_id', flat=True)
+        )
+        active = set(Post.objects.filter(pk__in=post_ids, is_active=True).values_list('pk', flat=True))
+        new_ids = active - existing
+        Post.likes.through.objects.bulk_create(
+            [Post.likes.through(post_id=post_id, customuser_id=user.pk) for post_id in new_ids],
+            ignore_conflicts=True,
+        )
+        return new_ids
+
+    table, post_col, user_col = _sql_names()
+    quote = connection.ops.quote_name
+    post_params, user_param = _prep(post_ids, user)
+    sql = (
+        f"INSERT INTO {table} ({post_col}, {user_col}) "
+        f"SELECT {quote(Post._meta.pk.column)}, %s FROM {quote(Post._meta.db_table)} "
+        f"WHERE {quote(Post._meta.pk.column)} IN ({', '.join(['%s'] * len(post_params))}) AND {quote(Post._meta.get_field('is_active').column)} = %s "
+        f"ON CONFLICT DO NOTHING RETURNING {post_col}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_param, *post_params, True])
+        return {Post._meta.pk.to_python(row[0]) for row in cursor.fetchall()}
+
+
+def _delete(user, post_ids):
+    """Delete existing like rows; return the post ids that were actually removed."""
+    if not _supports_returning():
+        rows = Post.likes.through.objects.filter(customuser_id=user.pk, post_id__in=post_ids)
+        removed = set(rows.values_list('post_id', flat=True))
+        rows.delete()
+        return removed
+
+    table, post_col, user_col = _sql_names()
+    post_params, user_param = _prep(post_ids, user)
+    sql = (
+        f"DELETE FROM {table} WHERE {user_col} = %s "
+        f"AND {post_col} IN ({', '.join(['%s'] * len(post_params))}) "
+        f"RETURNING {post_col}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_param, *post_params])
+        return {Post._meta.pk.to_python(row[0]) for row in cursor.fetchall()}
+
+
+def _send_changed(user, action, post_ids, posts):
+    # Writing the through table directly bypasses RelatedManager.add/remove, so
+    # emit the m2m_changed signal ourselves (like notifications hang off it).
+    through = Post.likes.through
+    if not post_ids or not m2m_changed.has_listeners(through):
+        return
+    posts = dict(posts or {})
+    missing = [post_id for post_id in post_ids if post_id not in posts]
+    if missing:
+        posts.update(Post.objects.select_related('author').in_bulk(missing))
+    for post_id in post_ids:
+        m2m_changed.send(
+            sender=through, instance=posts[post_id], action=action, reverse=False,
+            model=User, pk_set={user.pk}, using=connection.alias,
+        )
+
+
+def like(user, post_ids, posts=None):
+    """Like ``post_ids`` as ``user`` with one conflict-ignoring insert.
+
+    Already-liked and inactive posts are skipped. ``posts`` optionally maps ids to
+    loaded instances so the signal does not refetch them. Returns the ids whose
+    like was newly recorded.
+    """
+    post_ids = list(post_ids)
+    if not post_ids:
+        return set()
+    with transaction.atomic():
+        added = _insert(user, post_ids)
+        counters.adjust_many(added, likes=1)
+        _send_changed(user, 'post_add', added, posts)
+    return added
+
+
+def unlike(user, post_ids, posts=None):
+    """Remove ``user``'s likes from ``post_ids`` with one delete. Returns the ids actually unliked."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return set()
+    with transaction.atomic():
+        removed = _delete(user, post_ids)
+        counters.adjust_many(removed, likes=-1)
+        _send_changed(user, 'post_remove', removed, posts)
+    return removed
+
+
+def set_liked(user, post_id, liked=None, post=None):
+    """Set (``True``), clear (``False``) or toggle (``None``) ``user``'s like on a post.
+
+    Returns the resulting state. Repeating an explicit set is a no-op, so
+    double-taps and retried offline actions cannot flip the like back.
+    ``post`` optionally passes the loaded instance so the signal does not refetch it.
+    """
+    posts = {post_id: post} if post is not None else None
+    if liked is None:
+        if unlike(user, [post_id], posts=posts):
+            return False
+        liked = True
+    if liked:
+        like(user, [post_id], posts=posts)
+    else:
+        unlike(user, [post_id], posts=posts)
+    return liked
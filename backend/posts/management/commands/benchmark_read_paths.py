@@ -0,0 +1,132 @@
+import json
+import platform
+import random
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from accounts.models import Follow
+from accounts.views import FollowersListView
+from chat.models import Conversation, Message
+from chat.views import ConversationListView
+from notifications.models import Notification
+from notifications.views import NotificationListView
+from posts.models import Post, Comment
+from posts.views import FeedView, RankedFeedView
+
+User = get_user_model()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Measure latency percentiles and query counts of the hot read endpoints'
+
+    ENDPOINTS = {
+        'feed': (FeedView, '/api/feed/', lambda user: {}),
+        'ranked_feed': (RankedFeedView, '/api/feed/ranked/', lambda user: {}),
+        'conversations': (ConversationListView, '/api/chat/conversations/', lambda user: {}),
+        'notifications': (NotificationListView, '/api/notifications/', lambda user: {}),
+        'followers': (FollowersListView, '/api/auth/users/{user_id}/followers/', lambda user: {'user_id': user.id}),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Number of users to sample as viewers')
+        parser.add_argument('--iterations', type=int, default=5, help='Requests per endpoint per user')
+        parser.add_argument('--warmup', type=int, default=1, help='Unmeasured requests per endpoint per user')
+        parser.add_argument('--prefix', default='bench', help='Only sample users whose username starts with this')
+        parser.add_argument('--endpoint', action='append', choices=sorted(self.ENDPOINTS), help='Limit to these endpoints (repeatable)')
+        parser.add_argument('--output', default='benchmark_results.json')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        users = self.sample_users(options['users'], options['prefix'], options['seed'])
+        if not users:
+            self.stdout.write(self.style.ERROR('No users to benchmark; run seed_social_data first'))
+            return
+
+        factory = APIRequestFactory()
+        results = {}
+        for name in options['endpoint'] or self.ENDPOINTS:
+            view_class, path, get_kwargs = self.ENDPOINTS[name]
+            view = view_class.as_view()
+            latencies = []
+            queries = []
+            for user in users:
+                kwargs = get_kwargs(user)
+                url = path.format(**kwargs)
+                for i in range(options['warmup'] + options['iterations']):
+                    # A host from ALLOWED_HOSTS; the factory's default 'testserver' is
+                    # rejected as soon as a paginator builds an absolute next link
+                    request = factory.get(url, HTTP_HOST='localhost')
+                    force_authenticate(request, user=user)
+                    # The debug query log is a bounded deque; start each request from empty
+                    reset_queries()
+                    with CaptureQueriesContext(connection) as ctx:
+                        started = time.perf_counter()
+                        response = view(request, **kwargs)
+                        response.render()
+                        elapsed = (time.perf_counter() - started) * 1000
+                    if response.status_code != 200:
+                        raise RuntimeError(f'{name} returned {response.status_code} for {user.username}')
+                    if i >= options['warmup']:
+                        latencies.append(elapsed)
+                        queries.append(len(ctx.captured_queries))
+
+            results[name] = {
+                'requests': len(latencies),
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p95_ms': round(percentile(latencies, 95), 3),
+                'p99_ms': round(percentile(latencies, 99), 3),
+                'mean_ms': round(statistics.fmean(latencies), 3),
+                'max_ms': round(max(latencies), 3),
+                'queries_mean': round(statistics.fmean(queries), 2),
+                'queries_max': max(queries),
+            }
+            row = results[name]
+            self.stdout.write(
+                f"{name:<14} p50 {row['p50_ms']:>9.2f}ms  p95 {row['p95_ms']:>9.2f}ms  "
+                f"p99 {row['p99_ms']:>9.2f}ms  queries {row['queries_mean']:.1f} (max {row['queries_max']})"
+            )
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'options': {key: options[key] for key in ('users', 'iterations', 'warmup', 'prefix', 'seed')},
+            'dataset': {
+                'users': User.objects.count(),
+                'follows': Follow.objects.count(),
+                'posts': Post.objects.count(),
+                'likes': Post.likes.through.objects.count(),
+                'comments': Comment.objects.count(),
+                'conversations': Conversation.objects.count(),
+                'messages': Message.objects.count(),
+                'notifications': Notification.objects.count(),
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def sample_users(self, count, prefix, seed):
+        """Half the most-followed users (worst case for followers lists), half at random."""
+        candidates = User.objects.filter(username__startswith=prefix)
+        heavy = list(
+            candidates.annotate(n=Count('followers_set')).order_by('-n').values_list('id', flat=True)[:count // 2]
+        )
+        rest = list(candidates.exclude(id__in=heavy).values_list('id', flat=True))
+        random.Random(seed).shuffle(rest)
+        return list(User.objects.filter(id__in=heavy + rest[:count - len(heavy)]))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from posts import hashtags
+
+
+class Command(BaseCommand):
+    help = 'Re-extract hashtags from every post into the tag index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        linked = hashtags.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {linked} post hashtags"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the post/comment full-text search index from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        indexed = backend.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} posts and comments with {type(backend).__name__}"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from posts import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or trim) materialized home timelines from the follow graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='users', help='Only rebuild the timeline of this user id (repeatable)')
+        parser.add_argument('--trim', action='store_true', help='Only drop entries beyond TIMELINE_MAX_ENTRIES')
+
+    def handle(self, *args, **options):
+        user_ids = options['users'] or User.objects.values_list('id', flat=True).iterator()
+        action = timeline.trim if options['trim'] else timeline.rebuild
+
+        processed = 0
+        for user_id in user_ids:
+            action(user_id)
+            processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{'Trimmed' if options['trim'] else 'Rebuilt'} {processed} timelines"))
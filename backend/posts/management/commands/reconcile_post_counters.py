@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute like/comment counters from the source tables and fix any drift'
+
+    def handle(self, *args, **options):
+        drifted = counters.reconcile()
+        if drifted:
+            self.stdout.write(self.style.WARNING(f"Fixed counter drift on {drifted} posts"))
+        else:
+            self.stdout.write(self.style.SUCCESS("All post counters are in sync"))
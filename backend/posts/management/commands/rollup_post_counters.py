@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Fold sharded like/comment counter deltas into the Post rows'
+
+    def handle(self, *args, **options):
+        updated = counters.rollup()
+        self.stdout.write(self.style.SUCCESS(f"Rolled up counters for {updated} posts"))
@@ -0,0 +1,275 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from accounts.models import Follow
+from chat.models import Conversation, ConversationReadState, Message
+from chat import messages as chat_messages, unread as chat_unread
+from notifications.models import Notification
+from posts.models import Post, Comment
+from posts import counters, hashtags, search, timeline
+
+User = get_user_model()
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values we generate."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def zipf_weights(n, exponent):
+    return [1.0 / (rank ** exponent) for rank in range(1, n + 1)]
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate a synthetic social graph (users, follows, posts, likes, comments, chats, notifications)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000, help='e.g. 10000, 100000, 1000000')
+        parser.add_argument('--avg-follows', type=int, default=50, help='Mean follows per user (power-law distributed)')
+        parser.add_argument('--avg-likes', type=float, default=5.0, help='Mean likes per post (power-law distributed)')
+        parser.add_argument('--avg-comments', type=float, default=1.5, help='Mean comments per post (power-law distributed)')
+        parser.add_argument('--conversations', type=int, default=500)
+        parser.add_argument('--messages-per-conversation', type=int, default=40)
+        parser.add_argument('--notifications-per-user', type=int, default=20)
+        parser.add_argument('--days', type=int, default=30, help='Spread content over this many past days')
+        parser.add_argument('--exponent', type=float, default=1.1, help='Zipf exponent for popularity/activity')
+        parser.add_argument('--prefix', default='bench', help='Username prefix of generated users')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.span_seconds = options['days'] * 86400
+
+        with explicit_timestamps(User, Follow, Post, Comment, Conversation, Message, Notification):
+            user_ids = self.create_users(options['users'], options['prefix'])
+            # Popularity (who gets followed/liked) and activity (who posts) both follow a power law
+            self.rng.shuffle(user_ids)
+            self.popular = (user_ids, self._cumulative(zipf_weights(len(user_ids), options['exponent'])))
+            follows = self.create_follows(user_ids, options['avg_follows'])
+            self.create_posts(user_ids, options['posts'], options['avg_likes'], options['avg_comments'], options['exponent'])
+            self.create_conversations(follows, options['conversations'], options['messages_per_conversation'])
+            self.create_notifications(user_ids, options['notifications_per_user'])
+
+        self.stdout.write('Reconciling post counters...')
+        counters.reconcile()
+        self.stdout.write('Rebuilding home timelines...')
+        for user_id in user_ids:
+            timeline.rebuild(user_id)
+        self.stdout.write('Indexing hashtags...')
+        hashtags.rebuild(batch_size=self.batch_size)
+        self.stdout.write('Rebuilding search index...')
+        search.get_backend().rebuild(batch_size=self.batch_size)
+
+        self.stdout.write(self.style.SUCCESS('Synthetic data generated'))
+
+    # Helpers
+
+    def _cumulative(self, weights):
+        total = 0.0
+        cumulative = []
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        return cumulative
+
+    def _pick_popular(self, k):
+        population, cum_weights = self.popular
+        return self.rng.choices(population, cum_weights=cum_weights, k=k)
+
+    def _power_law_count(self, mean, cap):
+        # Pareto with alpha=2 has mean 2 * xmin
+        return min(cap, int(self.rng.paretovariate(2.0) * mean / 2.0))
+
+    def _timestamp(self, after=None):
+        if after is None:
+            return self.now - timedelta(seconds=self.rng.uniform(0, self.span_seconds))
+        remaining = max(1.0, (self.now - after).total_seconds())
+        return after + timedelta(seconds=self.rng.uniform(0, remaining))
+
+    def _bulk(self, model, objs, **kwargs):
+        model.objects.bulk_create(objs, batch_size=self.batch_size, **kwargs)
+
+    # Generators
+
+    def create_users(self, count, prefix):
+        password = make_password('benchmark-password')
+        run = self.rng.randrange(16 ** 6)
+        users = []
+        for i in range(count):
+            joined = self._timestamp()
+            users.append(User(
+                username=f'{prefix}_{run:06x}_{i}',
+                email=f'{prefix}_{run:06x}_{i}@example.com',
+                first_name=f'First{i}',
+                last_name=f'Last{i}',
+                password=password,
+                is_email_verified=True,
+                date_joined=joined,
+                created_at=joined,
+                updated_at=joined,
+            ))
+        self._bulk(User, users)
+        self.stdout.write(f'Created {count} users')
+        return [user.id for user in users]
+
+    def create_follows(self, user_ids, avg_follows):
+        follows = set()
+        batch = []
+        for follower_id in user_ids:
+            wanted = self._power_law_count(avg_follows, len(user_ids) - 1)
+            for following_id in set(self._pick_popular(wanted)):
+                if following_id == follower_id or (follower_id, following_id) in follows:
+                    continue
+                follows.add((follower_id, following_id))
+                created = self._timestamp()
+                batch.append(Follow(follower_id=follower_id, following_id=following_id, created_at=created))
+            if len(batch) >= self.batch_size:
+                self._bulk(Follow, batch, ignore_conflicts=True)
+                batch = []
+        self._bulk(Follow, batch, ignore_conflicts=True)
+        self.stdout.write(f'Created {len(follows)} follows')
+        return list(follows)
+
+    def create_posts(self, user_ids, count, avg_likes, avg_comments, exponent):
+        # Activity is skewed independently of popularity
+        authors = list(user_ids)
+        self.rng.shuffle(authors)
+        author_weights = self._cumulative(zipf_weights(len(authors), exponent))
+        likes_through = Post.likes.through
+        privacy_choices = ['public'] * 8 + ['friends'] + ['private']
+
+        created_posts = created_likes = created_comments = 0
+        while created_posts < count:
+            size = min(self.batch_size, count - created_posts)
+            posts = []
+            for author_id in self.rng.choices(authors, cum_weights=author_weights, k=size):
+                created = self._timestamp()
+                posts.append(Post(
+                    author_id=author_id,
+                    content=f'Synthetic post #{created_posts + len(posts)} ' + ' '.join(
+                        self.rng.choice(['lorem', 'ipsum', 'dolor', 'sit', 'amet', '#news', '#django', '#music'])
+                        for _ in range(self.rng.randint(3, 30))
+                    ),
+                    privacy=self.rng.choice(privacy_choices),
+                    created_at=created,
+                    updated_at=created,
+                ))
+            self._bulk(Post, posts)
+
+            likes = []
+            comments = []
+            for post in posts:
+                for user_id in set(self._pick_popular(self._power_law_count(avg_likes, len(user_ids)))):
+                    likes.append(likes_through(post_id=post.id, customuser_id=user_id))
+                for author_id in self._pick_popular(self._power_law_count(avg_comments, 500)):
+                    created = self._timestamp(after=post.created_at)
+                    comments.append(Comment(
+                        post_id=post.id, author_id=author_id, content='Synthetic comment',
+                        created_at=created, updated_at=created,
+                    ))
+            self._bulk(likes_through, likes, ignore_conflicts=True)
+            self._bulk(Comment, comments)
+
+            created_posts += size
+            created_likes += len(likes)
+            created_comments += len(comments)
+            self.stdout.write(f'Created {created_posts}/{count} posts')
+
+        self.stdout.write(f'Created {created_likes} likes and {created_comments} comments')
+
+    def create_conversations(self, follows, count, messages_per_conversation):
+        pairs = set()
+        for follower_id, following_id in self.rng.sample(follows, min(count * 2, len(follows))):
+            pairs.add((min(follower_id, following_id), max(follower_id, following_id)))
+            if len(pairs) >= count:
+                break
+
+        conversations = []
+        for participant1_id, participant2_id in pairs:
+            created = self._timestamp()
+            conversations.append(Conversation(
+                participant1_id=participant1_id, participant2_id=participant2_id,
+                created_at=created, updated_at=created,
+            ))
+        self._bulk(Conversation, conversations)
+
+        messages = []
+        read_states = []
+        total = 0
+        for conversation in conversations:
+            participants = [conversation.participant1_id, conversation.participant2_id]
+            timestamps = sorted(self._timestamp(after=conversation.created_at) for _ in range(messages_per_conversation))
+            for i, timestamp in enumerate(timestamps):
+                messages.append(Message(
+                    conversation_id=conversation.id,
+                    sender_id=self.rng.choice(participants),
+                    content=f'Synthetic message {i}',
+                    created_at=timestamp,
+                    updated_at=timestamp,
+                ))
+            # Both participants have read all but the last three messages
+            if len(timestamps) > 3:
+                last_read = messages[-4]
+                read_states.extend(
+                    ConversationReadState(
+                        conversation_id=conversation.id, user_id=user_id,
+                        last_read_message_id=last_read.id, last_read_at=last_read.created_at,
+                    )
+                    for user_id in participants
+                )
+            if len(messages) >= self.batch_size:
+                self._bulk(Message, messages)
+                total += len(messages)
+                messages = []
+        self._bulk(Message, messages)
+        total += len(messages)
+        self._bulk(ConversationReadState, read_states)
+        conversation_ids = [conversation.id for conversation in conversations]
+        chat_messages.rebuild_snapshots(Conversation.objects.filter(id__in=conversation_ids))
+        chat_unread.rebuild(conversation_ids)
+        self.stdout.write(f'Created {len(conversations)} conversations and {total} messages')
+
+    def create_notifications(self, user_ids, per_user):
+        post_ids = list(Post.objects.order_by('-created_at').values_list('id', flat=True)[:10000])
+        notifications = []
+        total = 0
+        for recipient_id in user_ids:
+            for _ in range(per_user):
+                notification_type = self.rng.choice(['like', 'comment', 'follow', 'post'])
+                created = self._timestamp()
+                notifications.append(Notification(
+                    recipient_id=recipient_id,
+                    sender_id=self.rng.choice(user_ids),
+                    notification_type=notification_type,
+                    post_id=self.rng.choice(post_ids) if post_ids and notification_type != 'follow' else None,
+                    is_read=self.rng.random() < 0.7,
+                    message=f'Synthetic {notification_type} notification',
+                    created_at=created,
+                ))
+            if len(notifications) >= self.batch_size:
+                self._bulk(Notification, notifications)
+                total += len(notifications)
+                notifications = []
+        self._bulk(Notification, notifications)
+        total += len(notifications)
+        self.stdout.write(f'Created {total} notifications')
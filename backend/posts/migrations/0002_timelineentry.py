@@ -0,0 +1,70 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_timelines(apps, schema_editor):
+    """Build every reader's timeline the way ``posts.timeline.rebuild`` does.
+
+    Authors over the fan-out limit are merged at read time, so only posts by
+    the reader and by push authors they follow are stored, newest first and
+    capped at the timeline size.
+    """
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('accounts', 'Follow')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    follower_limit = getattr(settings, 'TIMELINE_FANOUT_FOLLOWER_LIMIT', 1000)
+    max_entries = getattr(settings, 'TIMELINE_MAX_ENTRIES', 800)
+
+    pull_ids = set(
+        Follow.objects.values('following_id').annotate(n=models.Count('id'))
+        .filter(n__gt=follower_limit).values_list('following_id', flat=True)
+    )
+    following = {}
+    for follower_id, following_id in Follow.objects.values_list('follower_id', 'following_id'):
+        following.setdefault(follower_id, set()).add(following_id)
+
+    visible = Post.objects.filter(is_active=True, privacy__in=['public', 'friends']).order_by('-created_at')
+    entries = []
+    for reader_id in User.objects.values_list('pk', flat=True).iterator():
+        push_ids = (following.get(reader_id, set()) - pull_ids) | {reader_id}
+        posts = visible.filter(author_id__in=push_ids).values_list('id', 'author_id', 'created_at')[:max_entries]
+        entries += [
+            TimelineEntry(user_id=reader_id, post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, author_id, created_at in posts
+        ]
+        if len(entries) >= 1000:
+            TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+            entries = []
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_follow'),
+        ('posts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(help_text="Copy of the post's created_at, used as the sort key")),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='posts_timel_user_id_efcfd5_idx'), models.Index(fields=['user', 'author'], name='posts_timel_user_id_b036fb_idx')],
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
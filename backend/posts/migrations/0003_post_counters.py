@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+
+    like_totals = Post.likes.through.objects.filter(post_id=OuterRef('pk')).values('post_id').annotate(n=Count('*')).values('n')
+    comment_totals = Comment.objects.filter(post_id=OuterRef('pk'), is_active=True).values('post_id').annotate(n=Count('*')).values('n')
+    Post.objects.update(
+        like_count=Coalesce(Subquery(like_totals), 0),
+        comment_count=Coalesce(Subquery(comment_totals), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='PostCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('likes', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='posts.post')),
+            ],
+            options={
+                'unique_together': {('post', 'shard')},
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
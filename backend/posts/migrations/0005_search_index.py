@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Spelled out rather than imported from posts.search: migrations must keep
+# working however that module changes later
+SEARCH_TABLES = ['posts_post_search', 'posts_comment_search']
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+
+def create_search_tables(apps, schema_editor):
+    if not fts5_available(schema_editor.connection):
+        return
+    for table in SEARCH_TABLES:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+            f"body, object_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in SEARCH_TABLES:
+        schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
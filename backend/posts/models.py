@@ -15,6 +15,8 @@ class Post(models.Model):
     content = models.TextField()
     image = models.ImageField(upload_to='post_images/', blank=True, null=True)
     video = models.FileField(upload_to='post_videos/', blank=True, null=True)
+    # Resized copies of ``image``, written by uploads.images once processing finishes
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     
@@ -23,6 +25,10 @@ class Post(models.Model):
     
     likes = models.ManyToManyField(User, related_name='liked_posts', blank=True)
     
+    # Denormalized counters, maintained by posts.counters alongside the writes they count
+    like_count = models.IntegerField(default=0, editable=False)
+    comment_count = models.IntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -37,13 +43,16 @@ class Post(models.Model):
     def __str__(self):
         return f"{self.author.username}: {self.content[:50]}..."
     
-    @property
-    def like_count(self):
-        return self.likes.count()
-    
-    @property
-    def comment_count(self):
-        return self.comments.count()
+    def save(self, *args, **kwargs):
+        # Counters are only written through posts.counters (and variants by
+        # uploads.images); a full save of a stale instance must not overwrite
+        # changes made since it was loaded.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('like_count', 'comment_count', 'image_variants')
+            ]
+        super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -72,4 +81,64 @@ class Comment(models.Model):
     
     # @property
     # def is_reply(self):
-    #     return self.parent is not None
\ No newline at end of file
+    #     return self.parent is not None
+
+
+class PostCounterShard(models.Model):
+    """Pending counter deltas for a post, spread over shards to avoid a hot row.
+
+    Folded into ``Post.like_count``/``comment_count`` by ``rollup_post_counters``.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='counter_shards')
+    shard = models.PositiveSmallIntegerField()
+    likes = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('post', 'shard')
+
+    def __str__(self):
+        return f"{self.post_id} shard {self.shard}: {self.likes} likes, {self.comments} comments"
+
+
+class TimelineEntry(models.Model):
+    """Materialized home timeline row: one per (reader, post) pushed on write."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(help_text="Copy of the post's created_at, used as the sort key")
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'author']),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} in timeline of {self.user_id}"
+
+
+class Hashtag(models.Model):
+    name = models.CharField(max_length=64, unique=True, help_text="Case-folded tag without the leading #")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class PostHashtag(models.Model):
+    """Tag -> post index row, maintained by posts.hashtags when a post is saved."""
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='post_links')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='hashtag_links')
+    created_at = models.DateTimeField(help_text="Copy of the post's created_at, used as the sort key")
+
+    class Meta:
+        unique_together = ('hashtag', 'post')
+        indexes = [
+            models.Index(fields=['hashtag', '-created_at', '-post']),
+        ]
+
+    def __str__(self):
+        return f"Tag {self.hashtag_id} on {self.post_id}"
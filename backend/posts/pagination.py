@@ -0,0 +1,108 @@
+import base64
+from datetime import datetime
+from uuid import UUID
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(created_at), UUID(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise NotFound('Invalid cursor')
+
+
+def keyset_filter(position, created_field='created_at', pk_field='id', descending=True):
+    """Rows strictly after ``position`` in ``(created_at, id)`` order."""
+    created_at, pk = position
+    lookup = 'lt' if descending else 'gt'
+    return (
+        Q(**{f'{created_field}__{lookup}': created_at})
+        | Q(**{created_field: created_at, f'{pk_field}__{lookup}': pk})
+    )
+
+
+class KeysetPagination(BasePagination):
+    """Opaque ``(created_at, id)`` cursor pagination.
+
+    Each page is a bounded index range scan, so its cost does not depend on how
+    far the client has scrolled (unlike offset pagination).
+    """
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    descending = True
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_position(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        return decode_cursor(cursor) if cursor else None
+
+    def paginate_positions(self, rows, request, key):
+        """Trim rows fetched with ``page_size + 1`` and remember where the next page starts."""
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.next_position = key(rows[page_size - 1]) if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        position = self.get_position(request)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(position, descending=self.descending))
+
+        ordering = ('-created_at', '-id') if self.descending else ('created_at', 'id')
+        rows = list(queryset.order_by(*ordering)[:self.get_page_size(request) + 1])
+        return self.paginate_positions(rows, request, key=lambda obj: (obj.created_at, obj.pk))
+
+    def get_next_cursor(self):
+        if self.next_position is None:
+            return None
+        return encode_cursor(*self.next_position)
+
+    def get_next_link(self):
+        cursor = self.get_next_cursor()
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.get_next_cursor(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class CommentPagination(KeysetPagination):
+    """Oldest-first comment threads, served from the ``['post', 'created_at']`` index."""
+    page_size = 50
+    descending = False
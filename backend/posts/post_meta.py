@@ -0,0 +1,73 @@
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from .hashtags import shared_cache
+from .models import Post
+
+MISSING = {'active': False, 'author_id': None, 'privacy': None}
+
+
+def cache_ttl():
+    # Signals only clear the entry in the process that saved the post, so a
+    # per-process cache must expire quickly for other workers to see the change
+    if not shared_cache():
+        return getattr(settings, 'POST_META_LOCAL_CACHE_TTL', 5)
+    return getattr(settings, 'POST_META_CACHE_TTL', 3600)
+
+
+def post_pk(post_id):
+    """The post's UUID for ids given as strings (URL kwargs) or UUIDs; None if malformed."""
+    try:
+        return Post._meta.pk.to_python(post_id)
+    except ValidationError:
+        return None
+
+
+def cache_key(post_pk):
+    return f'post_meta:{post_pk}'
+
+
+def meta_for(post):
+    return {'active': post.is_active, 'author_id': post.author_id, 'privacy': post.privacy}
+
+
+def store(post):
+    cache.set(cache_key(post.pk), meta_for(post), cache_ttl())
+
+
+def invalidate(post_id):
+    cache.delete(cache_key(post_pk(post_id)))
+
+
+def get_meta(post_id):
+    """``{'active', 'author_id', 'privacy'}`` for a post; unknown ids come back inactive."""
+    pk = post_pk(post_id)
+    if pk is None:
+        return MISSING
+    key = cache_key(pk)
+    meta = cache.get(key)
+    if meta is None:
+        row = Post.objects.filter(pk=pk).values('is_active', 'author_id', 'privacy').first()
+        meta = {'active': row['is_active'], 'author_id': row['author_id'], 'privacy': row['privacy']} if row else MISSING
+        cache.set(key, meta, cache_ttl())
+    return meta
+
+
+async def aget_meta(post_id):
+    pk = post_pk(post_id)
+    if pk is None:
+        return MISSING
+    meta = await cache.aget(cache_key(pk))
+    if meta is None:
+        meta = await database_sync_to_async(get_meta)(pk)
+    return meta
+
+
+def can_view(meta, user_id, follows_author):
+    """Whether a user may see (and like/comment on) a post with this metadata."""
+    if not meta['active']:
+        return False
+    if meta['privacy'] == 'public' or meta['author_id'] == user_id:
+        return True
+    return meta['privacy'] == 'friends' and follows_author
@@ -0,0 +1,210 @@
+import base64
+import re
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import NotFound
+from accounts.models import Follow
+from .models import Post, Comment
+from .pagination import decode_cursor, encode_cursor, keyset_filter
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+MAX_TERMS = 8
+
+
+def terms(query):
+    return TERM_RE.findall(query or '')[:MAX_TERMS]
+
+
+def visible_posts_q(user, prefix=''):
+    """Posts ``user`` may see: public ones, their own, and friends-only posts of authors they follow."""
+    following = Follow.objects.filter(follower=user).values('following_id')
+    return Q(**{f'{prefix}is_active': True}) & (
+        Q(**{f'{prefix}privacy': 'public'})
+        | Q(**{f'{prefix}author_id': user.pk})
+        | Q(**{f'{prefix}privacy': 'friends', f'{prefix}author_id__in': following})
+    )
+
+
+class DatabaseSearchBackend:
+    """Unindexed fallback: every term must occur in the content; newest matches first.
+
+    Works on any database but scans the table, so it is only meant for
+    backends without a full-text index wired up.
+    """
+
+    def index(self, obj):
+        pass
+
+    def remove(self, model, pk):
+        pass
+
+    def rebuild(self, batch_size=2000):
+        return 0
+
+    def search(self, model, query, user, limit, cursor=None):
+        if model is Post:
+            queryset = Post.objects.filter(visible_posts_q(user))
+        else:
+            queryset = Comment.objects.filter(visible_posts_q(user, prefix='post__'), is_active=True)
+        for term in terms(query):
+            queryset = queryset.filter(content__icontains=term)
+        if cursor:
+            queryset = queryset.filter(keyset_filter(decode_cursor(cursor)))
+
+        rows = list(queryset.order_by('-created_at', '-id').values_list('created_at', 'id')[:limit + 1])
+        next_cursor = encode_cursor(*rows[limit - 1]) if len(rows) > limit else None
+        return [pk for _, pk in rows[:limit]], next_cursor
+
+
+class SQLiteFTSBackend:
+    """BM25-ranked search over SQLite FTS5 tables (created by posts migration 0005).
+
+    Each post/comment is one FTS row whose rowid is derived from its UUID, so
+    re-indexing and removal are rowid lookups rather than table scans.
+    ``object_id`` holds the primary key in its stored form for the join back.
+    """
+    TABLES = {Post: 'posts_post_search', Comment: 'posts_comment_search'}
+
+    def _rowid(self, pk):
+        return Post._meta.pk.to_python(pk).int & (2 ** 63 - 1)
+
+    def _db_pk(self, pk):
+        return Post._meta.pk.get_db_prep_value(Post._meta.pk.to_python(pk), connection)
+
+    def index(self, obj):
+        table = self.TABLES[type(obj)]
+        rowid = self._rowid(obj.pk)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [rowid])
+            if obj.is_active:
+                cursor.execute(
+                    f'INSERT INTO {table} (rowid, body, object_id) VALUES (%s, %s, %s)',
+                    [rowid, obj.content, self._db_pk(obj.pk)],
+                )
+
+    def remove(self, model, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.TABLES[model]} WHERE rowid = %s', [self._rowid(pk)])
+
+    def rebuild(self, batch_size=2000):
+        indexed = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model, table in self.TABLES.items():
+                cursor.execute(f'DELETE FROM {table}')
+                rows = model.objects.filter(is_active=True).values_list('pk', 'content').iterator(chunk_size=batch_size)
+                batch = []
+                for pk, content in rows:
+                    batch.append((self._rowid(pk), content, self._db_pk(pk)))
+                    if len(batch) >= batch_size:
+                        cursor.executemany(f'INSERT INTO {table} (rowid, body, object_id) VALUES (%s, %s, %s)', batch)
+                        indexed += len(batch)
+                        batch = []
+                if batch:
+                    cursor.executemany(f'INSERT INTO {table} (rowid, body, object_id) VALUES (%s, %s, %s)', batch)
+                    indexed += len(batch)
+                cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+        return indexed
+
+    def _match(self, query):
+        # Quote every term so user input cannot inject FTS5 syntax; the last
+        # term is a prefix so results update while the user is still typing.
+        quoted = [f'"{term}"' for term in terms(query)]
+        if quoted:
+            quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def _encode(self, score, pk):
+        return base64.urlsafe_b64encode(f'{score!r}|{pk}'.encode()).decode().rstrip('=')
+
+    def _decode(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            score, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+            return float(score), self._db_pk(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor')
+
+    def search(self, model, query, user, limit, cursor=None):
+        match = self._match(query)
+        if not match:
+            return [], None
+
+        # Visibility is expressed with the ORM so the rule lives in one place
+        # (visible_posts_q) for both backends. It is joined on the primary key
+        # rather than used as ``IN (...)``: SQLite flattens the join, so each
+        # FTS match is checked with one index lookup instead of the whole
+        # visible set being materialised first.
+        if model is Post:
+            visible = Post.objects.filter(visible_posts_q(user))
+        else:
+            visible = Comment.objects.filter(visible_posts_q(user, prefix='post__'), is_active=True)
+        visible_sql, visible_params = visible.values(visible_id=F('pk')).query.sql_with_params()
+
+        table = self.TABLES[model]
+        sql = (
+            f'SELECT object_id, score FROM ('
+            f'SELECT {table}.object_id AS object_id, bm25({table}) AS score FROM {table} '
+            f'JOIN ({visible_sql}) AS visible ON visible.visible_id = {table}.object_id '
+            f'WHERE {table} MATCH %s'
+            f')'
+        )
+        params = [*visible_params, match]
+        if cursor:
+            score, pk = self._decode(cursor)
+            sql += ' WHERE score > %s OR (score = %s AND object_id > %s)'
+            params += [score, score, pk]
+        sql += ' ORDER BY score, object_id LIMIT %s'
+        params.append(limit + 1)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        pk_field = model._meta.pk
+        next_cursor = None
+        if len(rows) > limit:
+            object_id, score = rows[limit - 1]
+            next_cursor = self._encode(score, pk_field.to_python(object_id))
+        return [pk_field.to_python(object_id) for object_id, _ in rows[:limit]], next_cursor
+
+
+def fts5_available(conn=None):
+    conn = conn or connection
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+
+_backend = None
+
+
+def get_backend():
+    """The configured ``POST_SEARCH_BACKEND``, or FTS5 when the database supports it."""
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'POST_SEARCH_BACKEND', '')
+        if path:
+            _backend = import_string(path)()
+        elif fts5_available():
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = DatabaseSearchBackend()
+    return _backend
+
+
+def index(obj):
+    get_backend().index(obj)
+
+
+def remove(model, pk):
+    get_backend().remove(model, pk)
+
+
+def search(model, query, user, limit, cursor=None):
+    """Return ``(pks, next_cursor)`` for ``model`` objects matching ``query`` that ``user`` may see."""
+    return get_backend().search(model, query, user, limit, cursor=cursor)
@@ -1,12 +1,38 @@
+from django.conf import settings
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Post, Comment
+from . import counters
 from accounts.models import CustomUser
+from uploads.images import avatar_url, variant_urls
+
+
+def comment_preview_size():
+    return getattr(settings, 'COMMENT_PREVIEW_SIZE', 3)
+
+
+def comment_preview_prefetch():
+    """Prefetch only the latest active comments of each post.
+
+    Django turns the sliced queryset into a single ROW_NUMBER() window query
+    partitioned by post, so a viral post no longer loads its whole thread.
+    """
+    return Prefetch(
+        'comments',
+        queryset=Comment.objects.filter(is_active=True).select_related('author').order_by('-created_at')[:comment_preview_size()],
+        to_attr='preview_comments',
+    )
 
 class UserSerializer(serializers.ModelSerializer):
+    profile_picture = serializers.SerializerMethodField()
+
     class Meta:
         model = CustomUser
         fields = ['id', 'username', 'email', 'profile_picture', 'full_name']
 
+    def get_profile_picture(self, obj):
+        return avatar_url(obj, self.context.get('request'))
+
 class CommentSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     
@@ -15,44 +41,103 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'content', 'author', 'created_at', 'updated_at']
         read_only_fields = ['id', 'author', 'created_at', 'updated_at']
 
+class SearchCommentSerializer(CommentSerializer):
+    post = serializers.UUIDField(source='post_id', read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ['post']
+
 class PostSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
-    like_count = serializers.ReadOnlyField()
-    comment_count = serializers.ReadOnlyField()
+    comments = serializers.SerializerMethodField()
+    like_count = serializers.SerializerMethodField()
+    comment_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
         fields = [
-            'id', 'content', 'image', 'video', 'author', 'privacy',
+            'id', 'content', 'image', 'image_variants', 'video', 'author', 'privacy',
             'created_at', 'updated_at', 'like_count', 'comment_count',
             'is_liked', 'comments'
         ]
         read_only_fields = ['id', 'author', 'created_at', 'updated_at']
     
+    def get_comments(self, obj):
+        """Latest comments only; the full thread is paginated at posts/<id>/comments/"""
+        comments = getattr(obj, 'preview_comments', None)
+        if comments is None:
+            comments = obj.comments.filter(is_active=True).select_related('author').order_by('-created_at')[:comment_preview_size()]
+        return CommentSerializer(reversed(list(comments)), many=True, context=self.context).data
+    
+    def get_counts(self, obj):
+        # Stored counters plus any sharded deltas not rolled up yet
+        pending = self.context.get('pending_counts')
+        if pending is None:
+            pending = counters.pending_counts([obj.id])
+        return counters.with_pending(obj.id, obj.like_count, obj.comment_count, pending)
+
+    def get_like_count(self, obj):
+        return self.get_counts(obj)[0]
+
+    def get_comment_count(self, obj):
+        return self.get_counts(obj)[1]
+
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image, obj.image_variants, self.context.get('request'))
+    
     def get_is_liked(self, obj):
+        liked_post_ids = self.context.get('liked_post_ids')
+        if liked_post_ids is not None:
+            return obj.id in liked_post_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.likes.filter(id=request.user.id).exists()
         return False
 
-from accounts.serializers import UserProfileSerializer
+from accounts.serializers import UserProfileSerializer, get_profile_context
+
+
+def get_page_context(request, posts, serializer_class):
+    """Batch the per-post lookups of a page so serializing it costs a fixed number of queries.
+
+    Follow counts and state are only fetched for serializers that nest the
+    author's full profile.
+    """
+    liked_post_ids = set()
+    if request and request.user.is_authenticated:
+        liked_post_ids = set(
+            Post.likes.through.objects.filter(
+                customuser_id=request.user.id,
+                post_id__in=[post.id for post in posts]
+            ).values_list('post_id', flat=True)
+        )
+    context = {
+        'liked_post_ids': liked_post_ids,
+        'pending_counts': counters.pending_counts([post.id for post in posts]),
+    }
+    if isinstance(serializer_class._declared_fields.get('author'), UserProfileSerializer):
+        context.update(get_profile_context(request, {post.author_id for post in posts}))
+    return context
 
 class FeedPostSerializer(PostSerializer):
     author = UserProfileSerializer(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
-    like_count = serializers.ReadOnlyField()
-    comment_count = serializers.ReadOnlyField()
+    comments = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = ['id', 'content', 'image', 'video', 'author', 'privacy', 'created_at', 'like_count', 'comment_count', 'is_liked', 'comments']
+        fields = ['id', 'content', 'image', 'image_variants', 'video', 'author', 'privacy', 'created_at', 'like_count', 'comment_count', 'is_liked', 'comments']
         read_only_fields = ['id', 'author', 'created_at']
 
-    def get_is_liked(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.likes.filter(id=request.user.id).exists()
-        return False
\ No newline at end of file
+class LikeBatchSerializer(serializers.Serializer):
+    like = serializers.ListField(child=serializers.UUIDField(), required=False, default=list, max_length=100)
+    unlike = serializers.ListField(child=serializers.UUIDField(), required=False, default=list, max_length=100)
+
+    def validate(self, attrs):
+        if not attrs['like'] and not attrs['unlike']:
+            raise serializers.ValidationError('Provide post ids to like or unlike')
+        if set(attrs['like']) & set(attrs['unlike']):
+            raise serializers.ValidationError('A post cannot be both liked and unliked in one batch')
+        return attrs
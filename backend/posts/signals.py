@@ -0,0 +1,93 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from accounts.models import Follow
+from .models import Post, Comment
+from . import feed_cache, hashtags, post_meta, search, timeline
+
+
+def _feed_state(post):
+    # Read from __dict__ so deferred fields are not loaded just to be remembered
+    return post.__dict__.get('is_active'), post.__dict__.get('privacy')
+
+
+@receiver(post_init, sender=Post)
+def remember_feed_state(sender, instance, **kwargs):
+    instance._loaded_feed_state = _feed_state(instance)
+
+
+def _was_public(instance, created):
+    if created:
+        return False
+    is_active, privacy = instance._loaded_feed_state
+    # Unknown (deferred) state counts as public so nothing is counted twice
+    return (is_active is None or is_active) and (privacy is None or privacy == 'public')
+
+
+@receiver(post_save, sender=Post)
+def update_timelines_on_post_save(sender, instance, created, **kwargs):
+    loaded = instance._loaded_feed_state
+    if created:
+        timeline.push_post(instance)
+        return
+    if None not in loaded and loaded == _feed_state(instance):
+        # Plain edits (content, counters) leave the timelines alone
+        return
+
+    if not timeline.is_feed_visible(instance):
+        timeline.remove_post(instance)
+    elif not timeline.is_pushed(instance):
+        # A post that became visible again (privacy change, restore) is pushed like a new one
+        timeline.push_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def refresh_post_meta_on_save(sender, instance, **kwargs):
+    post_meta.store(instance)
+
+
+@receiver(post_delete, sender=Post)
+def drop_post_meta_on_delete(sender, instance, **kwargs):
+    post_meta.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def update_search_index_on_save(sender, instance, **kwargs):
+    # Soft-deleted rows are dropped from the index by the backend
+    search.index(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_hashtags_on_save(sender, instance, created, update_fields=None, **kwargs):
+    was_public = _was_public(instance, created)
+    if created or update_fields is None or 'content' in update_fields:
+        hashtags.sync_post(instance, was_public=was_public)
+    elif not was_public and hashtags.is_public(instance):
+        # Made public without touching the content: its tags start trending now
+        hashtags.count_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def drop_search_index_on_delete(sender, instance, **kwargs):
+    search.remove(sender, instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    if created:
+        timeline.add_author(instance.follower_id, instance.following_id)
+        feed_cache.invalidate(instance.follower_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline_on_unfollow(sender, instance, **kwargs):
+    timeline.remove_author(instance.follower_id, instance.following_id)
+    timeline.author_lost_follower(instance.following_id)
+    feed_cache.invalidate(instance.follower_id)
+
+
+@receiver(post_save, sender=Post)
+def roll_feed_state(sender, instance, **kwargs):
+    # Connected last, so every receiver above compares against the state before this save
+    instance._loaded_feed_state = _feed_state(instance)
@@ -1,3 +1,645 @@
-from django.test import TestCase
+import random
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+import asyncio
+import json
+import os
+import tempfile
+import time
+from importlib import import_module
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.utils import timezone
+from accounts.models import Follow
+from notifications.models import Notification
+from .models import Comment, Post, PostCounterShard, TimelineEntry
+from .ranking import score_batch, top_k
+from .utils import compute_post_score
+from . import counters, engagement, feed_cache, hashtags, likes, post_meta, search, timeline
+from .routing import websocket_urlpatterns
+from .broadcast import LikeBroadcaster
+from .consumers import PostConsumer
 
-# Create your tests here.
+User = get_user_model()
+
+# Signals push notifications over the channel layer; keep them in memory
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+def make_user(username):
+    return User.objects.create_user(username=username, email=f'{username}@example.com', password='pw')
+
+
+class BatchScoringTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        self.now = timezone.now()
+        self.following_ids = {1, 2, 3}
+        self.posts = [
+            SimpleNamespace(
+                created_at=self.now - timedelta(minutes=rng.randint(0, 60 * 24 * 7)),
+                like_count=rng.choice([0, 0, 1, 5, 40, 1200]),
+                comment_count=rng.choice([0, 0, 2, 17, 300]),
+                author_id=rng.randint(1, 6),
+                recent_likes=rng.choice([0, 0, 3, 25]),
+                recent_comments=rng.choice([0, 1, 8]),
+            )
+            for _ in range(500)
+        ]
+
+    def batch_scores(self):
+        return score_batch(
+            [(self.now - p.created_at).total_seconds() / 3600.0 for p in self.posts],
+            [p.like_count for p in self.posts],
+            [p.comment_count for p in self.posts],
+            [p.author_id in self.following_ids for p in self.posts],
+            recent_likes=[p.recent_likes for p in self.posts],
+            recent_comments=[p.recent_comments for p in self.posts],
+        )
+
+    def test_matches_scalar_scores(self):
+        expected = [
+            compute_post_score(p, self.following_ids, now=self.now, recent_likes=p.recent_likes, recent_comments=p.recent_comments)
+            for p in self.posts
+        ]
+        for batch, scalar in zip(self.batch_scores(), expected):
+            self.assertAlmostEqual(float(batch), scalar, places=12)
+
+    def test_top_k_matches_full_sort(self):
+        scores = self.batch_scores()
+        expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        for k in (1, 10, 137, 500, 900):
+            self.assertEqual(top_k(scores, k), expected[:k])
+
+
+
+@override_settings(ENGAGEMENT_BUCKET_SECONDS=60, ENGAGEMENT_BUCKETS=5)
+class EngagementRingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000_000 * 60.0
+
+    def test_record_accumulates_within_window(self):
+        engagement.record('p1', likes=2, now=self.now)
+        engagement.record('p1', likes=1, comments=1, now=self.now + 61)
+        engagement.record('p2', comments=4, now=self.now)
+        counts = engagement.recent_counts(['p1', 'p2', 'p3'], window_seconds=300, now=self.now + 61)
+        self.assertEqual(counts, {'p1': (3, 1), 'p2': (0, 4), 'p3': (0, 0)})
+
+    def test_window_limits_buckets_read(self):
+        engagement.record('p1', likes=5, now=self.now)
+        engagement.record('p1', likes=1, now=self.now + 120)
+        self.assertEqual(engagement.recent_counts(['p1'], window_seconds=60, now=self.now + 120), {'p1': (1, 0)})
+
+    def test_old_buckets_expire_from_the_ring(self):
+        engagement.record('p1', likes=5, now=self.now)
+        # Five buckets later the first slot is reused; the old likes must not leak in
+        engagement.record('p1', likes=1, now=self.now + 5 * 60)
+        self.assertEqual(engagement.recent_counts(['p1'], window_seconds=300, now=self.now + 5 * 60), {'p1': (1, 0)})
+        # And buckets past the window read as zero even if never overwritten
+        self.assertEqual(engagement.recent_counts(['p1'], window_seconds=300, now=self.now + 11 * 60), {'p1': (0, 0)})
+
+    def test_unlikes_never_read_negative(self):
+        engagement.record('p1', likes=-2, now=self.now)
+        self.assertEqual(engagement.recent_counts(['p1'], now=self.now), {'p1': (0, 0)})
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.reader = make_user('reader')
+        Follow.objects.create(follower=self.reader, following=self.author)
+
+    def timeline_post_ids(self, user):
+        return list(TimelineEntry.objects.filter(user=user).order_by('-created_at').values_list('post_id', flat=True))
+
+    @override_settings(TIMELINE_MAX_ENTRIES=3)
+    def test_fan_out_trims_to_max_entries(self):
+        posts = [Post.objects.create(author=self.author, content=f'post {i}') for i in range(5)]
+        self.assertEqual(self.timeline_post_ids(self.reader), [post.id for post in reversed(posts[2:])])
+        self.assertEqual(len(self.timeline_post_ids(self.author)), 3)
+
+    @override_settings(TIMELINE_FANOUT_FOLLOWER_LIMIT=1)
+    def test_author_back_under_limit_is_backfilled(self):
+        other = make_user('other')
+        Follow.objects.create(follower=other, following=self.author)
+        post = Post.objects.create(author=self.author, content='while pulled')
+        self.assertNotIn(post.id, self.timeline_post_ids(self.reader))
+
+        Follow.objects.filter(follower=other).delete()
+        self.assertIn(post.id, self.timeline_post_ids(self.reader))
+
+    def test_privacy_change_removes_and_restores_entries(self):
+        post = Post.objects.create(author=self.author, content='hello')
+        post.privacy = 'private'
+        post.save()
+        self.assertNotIn(post.id, self.timeline_post_ids(self.reader))
+
+        post.privacy = 'public'
+        post.save()
+        self.assertIn(post.id, self.timeline_post_ids(self.reader))
+
+    @override_settings(TIMELINE_FANOUT_FOLLOWER_LIMIT=1, TIMELINE_MAX_ENTRIES=3)
+    def test_migration_backfill_matches_rebuild(self):
+        backfill = import_module('posts.migrations.0002_timelineentry').backfill_timelines
+        pulled = make_user('pulled')
+        Follow.objects.create(follower=self.reader, following=pulled)
+        Follow.objects.create(follower=self.author, following=pulled)
+        for i in range(4):
+            Post.objects.create(author=self.author, content=f'post {i}')
+        Post.objects.create(author=pulled, content='merged at read time')
+
+        for user in (self.author, self.reader, pulled):
+            timeline.rebuild(user.pk)
+        rebuilt = {user: self.timeline_post_ids(user) for user in (self.author, self.reader, pulled)}
+        TimelineEntry.objects.all().delete()
+        backfill(apps, None)
+        self.assertEqual({user: self.timeline_post_ids(user) for user in rebuilt}, rebuilt)
+        self.assertEqual(len(rebuilt[self.reader]), 3)
+        self.assertFalse(TimelineEntry.objects.filter(author=pulled).exclude(user=pulled).exists())
+
+    def test_plain_edit_skips_timeline_queries(self):
+        post = Post.objects.create(author=self.author, content='hello')
+        post = Post.objects.get(pk=post.pk)
+        post.content = 'edited'
+        with mock.patch.object(timeline, 'is_pushed') as is_pushed, mock.patch.object(timeline, 'remove_post') as remove_post:
+            post.save()
+        is_pushed.assert_not_called()
+        remove_post.assert_not_called()
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.reader = make_user('reader')
+        Follow.objects.create(follower=self.reader, following=self.author)
+        self.posts = [Post.objects.create(author=self.author, content=f'post {i}') for i in range(12)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def collect(self, url):
+        ids, cursor = [], None
+        while True:
+            response = self.client.get(url, {'page_size': 5, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 5)
+            ids += [post['id'] for post in response.data['results']]
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_feed_pages_cover_timeline_newest_first(self):
+        self.assertEqual(self.collect('/api/feed/'), [str(post.id) for post in reversed(self.posts)])
+
+    def test_post_list_pages_cover_all_posts_newest_first(self):
+        self.assertEqual(self.collect('/api/posts/'), [str(post.id) for post in reversed(self.posts)])
+
+    def test_new_posts_do_not_shift_later_pages(self):
+        first = self.client.get('/api/feed/', {'page_size': 5}).data
+        Post.objects.create(author=self.author, content='newer')
+        second = self.client.get('/api/feed/', {'page_size': 5, 'cursor': first['next_cursor']}).data
+        self.assertEqual([post['id'] for post in second['results']], [str(post.id) for post in reversed(self.posts[2:7])])
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/feed/', {'cursor': 'not-a-cursor'}).status_code, 404)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, POST_COUNTER_SHARDS=4)
+class ShardedCounterTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.reader = make_user('reader')
+        Follow.objects.create(follower=self.reader, following=self.author)
+        self.post = Post.objects.create(author=self.author, content='hello')
+        for _ in range(3):
+            counters.adjust(self.post.id, likes=1, comments=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def assert_counts(self, data):
+        self.assertEqual((data['like_count'], data['comment_count']), (3, 6))
+
+    def test_payloads_include_pending_shards(self):
+        self.assertEqual(Post.objects.get(pk=self.post.pk).like_count, 0)
+        self.assert_counts(self.client.get(f'/api/posts/{self.post.id}/').data)
+        self.assert_counts(self.client.get('/api/feed/').data['results'][0])
+        self.assertEqual(feed_cache._fetch_features([self.post.id])[self.post.id][2:], [3, 6])
+
+    def test_rollup_keeps_totals(self):
+        counters.rollup()
+        self.assertFalse(PostCounterShard.objects.exists())
+        self.assertEqual(counters.get_counts([self.post.id]), {self.post.id: (3, 6)})
+        self.assert_counts(self.client.get(f'/api/posts/{self.post.id}/').data)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class PageContextQueryTests(TestCase):
+    def setUp(self):
+        self.reader = make_user('reader')
+        self.liked = set()
+        for a in range(4):
+            author = make_user(f'author{a}')
+            Follow.objects.create(follower=self.reader, following=author)
+            for i in range(4):
+                post = Post.objects.create(author=author, content=f'post {a}/{i}')
+                Comment.objects.create(post=post, author=author, content='first')
+                if i % 2:
+                    post.likes.add(self.reader)
+                    self.liked.add(str(post.id))
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def query_count(self, url, page_size):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page_size': page_size})
+        self.assertEqual(len(response.data['results']), page_size)
+        for post in response.data['results']:
+            self.assertEqual(post['is_liked'], post['id'] in self.liked)
+            self.assertTrue(post['author'].get('is_following', True))
+        return len(queries)
+
+    def test_feed_query_count_does_not_grow_with_page_size(self):
+        # Warm the cached pull-author flags so both requests read them the same way
+        self.client.get('/api/feed/')
+        self.assertEqual(self.query_count('/api/feed/', 3), self.query_count('/api/feed/', 10))
+
+    def test_post_list_query_count_does_not_grow_with_page_size(self):
+        self.assertEqual(self.query_count('/api/posts/', 3), self.query_count('/api/posts/', 10))
+
+    def follow_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url, {'page_size': 3}).status_code, 200)
+        return [query for query in queries if f'"{Follow._meta.db_table}"' in query['sql']]
+
+    def test_profile_context_is_only_built_for_profile_authors(self):
+        # PostSerializer nests the plain UserSerializer: no follow counts or state
+        self.assertEqual(self.follow_queries('/api/posts/'), [])
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class RankedFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = make_user('reader')
+        self.posts = []
+        for a in range(3):
+            author = make_user(f'author{a}')
+            Follow.objects.create(follower=self.reader, following=author)
+            self.posts += [Post.objects.create(author=author, content=f'post {a}/{i}') for i in range(4)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def page(self, number, page_size=5):
+        response = self.client.get('/api/feed/ranked/', {'page': number, 'page_size': page_size})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_slice_one_ranking_without_overlap(self):
+        first = self.page(1)
+        self.assertEqual((first['count'], first['num_pages']), (12, 3))
+        ids = [post['id'] for number in (1, 2, 3) for post in self.page(number)['results']]
+        self.assertEqual(sorted(ids), sorted(str(post.id) for post in self.posts))
+
+    def test_later_pages_hydrate_only_their_posts(self):
+        self.page(1)
+
+        def query_count(page_size):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(len(self.page(2, page_size)['results']), page_size)
+            return len(queries)
+
+        self.assertEqual(query_count(2), query_count(5))
+
+    def test_post_made_private_after_snapshot_is_not_served(self):
+        self.page(1)
+        hidden = self.posts[0]
+        hidden.privacy = 'private'
+        hidden.save()
+        ids = [post['id'] for number in (1, 2, 3) for post in self.page(number)['results']]
+        self.assertNotIn(str(hidden.id), ids)
+
+    def test_merge_rereads_only_new_and_engaged_posts(self):
+        self.page(1)
+        engaged = self.posts[0]
+        Post.objects.filter(pk=engaged.pk).update(like_count=F('like_count') + 1)
+        engagement.record(engaged.id, likes=1)
+        new = Post.objects.create(author=self.posts[-1].author, content='fresh')
+
+        with mock.patch.object(feed_cache, '_fetch_features', wraps=feed_cache._fetch_features) as fetch:
+            self.page(1)
+        self.assertEqual(set(fetch.call_args.args[0]), {engaged.id, new.id})
+        snapshot = cache.get(feed_cache.cache_key(self.reader.id))
+        self.assertEqual(snapshot['features'][engaged.id][2], 1)
+        self.assertIn(new.id, snapshot['order'])
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, ALLOWED_HOSTS=['localhost'])
+class BenchmarkCommandTests(TestCase):
+    def test_seed_then_benchmark_every_endpoint(self):
+        call_command(
+            'seed_social_data', users=20, posts=300, avg_follows=10, conversations=10,
+            messages_per_conversation=5, notifications_per_user=2, stdout=open(os.devnull, 'w'),
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'results.json')
+            call_command('benchmark_read_paths', users=4, iterations=2, output=output, stdout=open(os.devnull, 'w'))
+            with open(output) as fh:
+                report = json.load(fh)
+        self.assertEqual(set(report['results']), {'feed', 'ranked_feed', 'conversations', 'notifications', 'followers'})
+        self.assertEqual(report['dataset']['posts'], 300)
+        for row in report['results'].values():
+            self.assertEqual(row['requests'], 8)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class LikeTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.reader = make_user('reader')
+        self.posts = [Post.objects.create(author=self.author, content=f'post {i}') for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def like_count(self, post):
+        return Post.objects.get(pk=post.pk).like_count
+
+    def test_explicit_like_and_unlike_are_idempotent(self):
+        post = self.posts[0]
+        for _ in range(2):
+            response = self.client.post(f'/api/posts/{post.id}/like/', {'liked': True}, format='json')
+            self.assertEqual(response.data, {'liked': True, 'like_count': 1})
+        self.assertEqual(self.like_count(post), 1)
+        self.assertEqual(Notification.objects.filter(notification_type='like').count(), 1)
+
+        for _ in range(2):
+            response = self.client.post(f'/api/posts/{post.id}/like/', {'liked': False}, format='json')
+            self.assertEqual(response.data, {'liked': False, 'like_count': 0})
+        self.assertEqual(self.like_count(post), 0)
+
+    def test_toggle_flips_state(self):
+        post = self.posts[0]
+        self.assertTrue(self.client.post(f'/api/posts/{post.id}/like/').data['liked'])
+        self.assertFalse(self.client.post(f'/api/posts/{post.id}/like/').data['liked'])
+        self.assertEqual(self.like_count(post), 0)
+
+    def test_like_skips_inactive_posts(self):
+        post = self.posts[0]
+        Post.objects.filter(pk=post.pk).update(is_active=False)
+        self.assertEqual(likes.like(self.reader, [post.pk]), set())
+        self.assertFalse(post.likes.filter(pk=self.reader.pk).exists())
+
+    def test_batch_applies_likes_and_unlikes(self):
+        first, second, third = self.posts
+        likes.like(self.reader, [second.pk])
+        response = self.client.post('/api/posts/likes/', {
+            'like': [str(first.id), str(second.id)],
+            'unlike': [str(second.id), str(third.id)],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/posts/likes/', {
+            'like': [str(first.id), str(first.id)],
+            'unlike': [str(second.id), str(third.id)],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {(row['post_id'], row['liked'], row['like_count']) for row in response.data['results']},
+            {(str(first.id), True, 1), (str(second.id), False, 0), (str(third.id), False, 0)},
+        )
+        self.assertEqual([self.like_count(post) for post in self.posts], [1, 0, 0])
+
+    def test_batch_requires_ids(self):
+        self.assertEqual(self.client.post('/api/posts/likes/', {}, format='json').status_code, 400)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, POST_LIKE_BROADCAST_INTERVAL=0.05)
+class LikeBroadcastTests(TestCase):
+    def setUp(self):
+        self.post = Post.objects.create(author=make_user('author'), content='hello')
+        Post.objects.filter(pk=self.post.pk).update(like_count=2)
+
+    async def test_events_coalesce_into_one_update_with_the_stored_count(self):
+        channel_layer = get_channel_layer()
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add(f'post_{self.post.id}', channel)
+
+        broadcaster = LikeBroadcaster()
+        # The consumer passes the id from the URL, a string
+        await broadcaster.add(channel_layer, str(self.post.id), 'u1', 'ann', True)
+        await broadcaster.add(channel_layer, self.post.id, 'u2', 'bob', True)
+        event = await asyncio.wait_for(channel_layer.receive(channel), timeout=2)
+
+        self.assertEqual(event['type'], 'like_update')
+        self.assertEqual((event['like_count'], event['events'], event['username']), (2, 2, 'bob'))
+        self.assertEqual([liker['username'] for liker in event['likers']], ['ann', 'bob'])
+
+    async def test_failed_flush_is_logged(self):
+        broadcaster = LikeBroadcaster()
+        with mock.patch.object(counters, 'get_like_count', side_effect=RuntimeError('boom')), \
+                self.assertLogs('posts.broadcast', level='ERROR'):
+            await broadcaster.add(get_channel_layer(), self.post.id, 'u1', 'ann', True)
+            await asyncio.sleep(0.1)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class PostConsumerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = make_user('author')
+        self.follower = make_user('follower')
+        self.stranger = make_user('stranger')
+        Follow.objects.create(follower=self.follower, following=self.author)
+        self.post = Post.objects.create(author=self.author, content='hello', privacy='friends')
+
+    async def connect(self, user, post_id=None):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/posts/{post_id or self.post.id}/')
+        communicator.scope['user'] = user
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    async def test_follow_state_is_only_queried_for_friends_posts_of_others(self):
+        public = await Post.objects.acreate(author=self.author, content='open')
+        cases = [(self.stranger, public.id, 0), (self.author, self.post.id, 0), (self.follower, self.post.id, 1)]
+        for user, post_id, queries in cases:
+            with self.subTest(user=user.username, post_id=post_id), \
+                    mock.patch.object(PostConsumer, 'get_follows_author', mock.AsyncMock(return_value=True)) as follows:
+                communicator, connected, _ = await self.connect(user, post_id)
+                self.assertTrue(connected)
+                await communicator.receive_json_from()
+                await communicator.send_json_to({'action': 'like', 'liked': True})
+                await communicator.receive_json_from(timeout=2)
+                await communicator.disconnect()
+                self.assertEqual(follows.await_count, queries)
+
+    def test_meta_ttl_is_short_without_a_shared_cache(self):
+        self.assertEqual(post_meta.cache_ttl(), 5)
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            self.assertEqual(post_meta.cache_ttl(), 3600)
+
+    def test_meta_cache_is_shared_by_string_and_uuid_ids(self):
+        post_meta.get_meta(str(self.post.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(post_meta.get_meta(self.post.id)['active'])
+        self.assertFalse(post_meta.get_meta('not-a-uuid')['active'])
+
+    async def test_privacy_is_enforced_on_connect(self):
+        communicator, connected, _ = await self.connect(self.follower)
+        self.assertTrue(connected)
+        await communicator.disconnect()
+
+        communicator, connected, code = await self.connect(self.stranger)
+        self.assertFalse(connected)
+        self.assertEqual(code, 4003)
+
+        _, connected, code = await self.connect(self.stranger, post_id='not-a-uuid')
+        self.assertEqual((connected, code), (False, 4002))
+
+    async def test_like_and_comment_write_against_the_real_post(self):
+        communicator, _, _ = await self.connect(self.follower)
+        await communicator.receive_json_from()  # connection_established
+
+        await communicator.send_json_to({'action': 'comment', 'content': 'nice'})
+        event = await communicator.receive_json_from(timeout=2)
+        self.assertEqual(event['comment']['content'], 'nice')
+
+        await communicator.send_json_to({'action': 'like', 'liked': True})
+        event = await communicator.receive_json_from(timeout=2)
+        self.assertEqual((event['type'], event['like_count']), ('like_update', 1))
+        await communicator.disconnect()
+
+        post = await Post.objects.aget(pk=self.post.pk)
+        self.assertEqual((post.like_count, post.comment_count, post.content), (1, 1, 'hello'))
+        self.assertEqual(await Notification.objects.filter(recipient=self.author, notification_type__in=['like', 'comment']).acount(), 2)
+
+    async def test_actions_stop_when_post_becomes_private(self):
+        communicator, _, _ = await self.connect(self.follower)
+        await communicator.receive_json_from()
+        await Post.objects.filter(pk=self.post.pk).aupdate(privacy='private')
+        await database_sync_to_async(post_meta.invalidate)(self.post.pk)
+
+        await communicator.send_json_to({'action': 'comment', 'content': 'late'})
+        self.assertTrue(await communicator.receive_nothing(timeout=0.3))
+        await communicator.disconnect()
+        self.assertFalse(await Comment.objects.filter(content='late').aexists())
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.follower = make_user('follower')
+        self.stranger = make_user('stranger')
+        Follow.objects.create(follower=self.follower, following=self.author)
+        self.public = Post.objects.create(author=self.author, content='gardening tips public')
+        self.friends = Post.objects.create(author=self.author, content='gardening tips friends', privacy='friends')
+        self.private = Post.objects.create(author=self.author, content='gardening tips private', privacy='private')
+        self.hidden = Post.objects.create(author=self.author, content='gardening tips removed', is_active=False)
+        self.client = APIClient()
+
+    def search(self, user, query, kind='posts', **params):
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/search/', {'q': query, 'type': kind, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def found(self, user, query, kind='posts'):
+        return {item['id'] for item in self.search(user, query, kind)['results']}
+
+    def check_visibility(self):
+        self.assertEqual(self.found(self.stranger, 'gardening'), {str(self.public.id)})
+        self.assertEqual(self.found(self.follower, 'garden'), {str(self.public.id), str(self.friends.id)})
+        self.assertEqual(
+            self.found(self.author, 'gardening tips'),
+            {str(self.public.id), str(self.friends.id), str(self.private.id)},
+        )
+
+        on_public = Comment.objects.create(post=self.public, author=self.stranger, content='lovely tomatoes')
+        Comment.objects.create(post=self.private, author=self.author, content='secret tomatoes')
+        self.assertEqual(self.found(self.stranger, 'tomatoes', kind='comments'), {str(on_public.id)})
+
+    def test_visibility(self):
+        self.assertIsInstance(search.get_backend(), search.SQLiteFTSBackend)
+        self.check_visibility()
+
+    def test_unindexed_backend_applies_the_same_rules(self):
+        with mock.patch.object(search, '_backend', search.DatabaseSearchBackend()):
+            self.check_visibility()
+
+    def test_cursor_pages_cover_every_match_once(self):
+        posts = [Post.objects.create(author=self.stranger, content=f'compost {"compost " * i}') for i in range(7)]
+        seen, cursor = [], None
+        while True:
+            data = self.search(self.follower, 'compost', page_size=3, **({'cursor': cursor} if cursor else {}))
+            seen += [item['id'] for item in data['results']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(sorted(seen), sorted(str(post.id) for post in posts))
+        self.assertEqual(len(seen), len(set(seen)))
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class HashtagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = make_user('author')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def test_extract(self):
+        self.assertEqual(hashtags.extract('#Django and #django, #1, a#b, &#39; #Ünïcode'), ['django', 'ünïcode'])
+        long_tag = 'a' * (hashtags.MAX_TAG_LENGTH + 1)
+        self.assertEqual(hashtags.extract(f'#{long_tag} #{long_tag[:-1]}'), [long_tag[:-1]])
+
+    def trending(self):
+        return dict(hashtags.trending(10))
+
+    def check_trending(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(author=self.author, content='#garden #tomato')
+            hidden = Post.objects.create(author=self.author, content='#garden later', privacy='private')
+        self.assertEqual(self.trending(), {'garden': 1, 'tomato': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            hidden.privacy = 'public'
+            hidden.save(update_fields=['privacy'])
+        self.assertEqual(self.trending(), {'garden': 2, 'tomato': 1})
+
+        # Later edits only count newly added tags
+        with self.captureOnCommitCallbacks(execute=True):
+            hidden.content = '#garden #compost'
+            hidden.save()
+        self.assertEqual(self.trending(), {'garden': 2, 'tomato': 1, 'compost': 1})
+
+    def test_trending_buckets_count_posts_made_public_later(self):
+        with mock.patch.object(hashtags, 'shared_cache', return_value=True):
+            self.check_trending()
+
+    def test_trending_without_a_shared_cache_reads_the_index(self):
+        self.assertFalse(hashtags.shared_cache())
+        self.check_trending()
+        self.assertEqual(cache.get_many([hashtags._bucket_key(int(time.time() // 60))]), {})
+
+    def test_tag_timeline_pages(self):
+        posts = [Post.objects.create(author=self.author, content=f'#Garden day {i}') for i in range(5)]
+        Post.objects.create(author=self.author, content='#other')
+        first = self.client.get('/api/tags/garden/', {'page_size': 3}).data
+        second = self.client.get('/api/tags/%23garden/', {'page_size': 3, 'cursor': first['next_cursor']}).data
+        self.assertEqual(
+            [post['id'] for post in first['results'] + second['results']],
+            [str(post.id) for post in reversed(posts)],
+        )
+        self.assertIsNone(second['next_cursor'])
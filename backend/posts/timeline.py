@@ -0,0 +1,248 @@
+import heapq
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Q, Subquery
+from accounts.models import Follow
+from .models import Post, TimelineEntry
+from .pagination import keyset_filter
+
+User = get_user_model()
+
+FEED_PRIVACY = ['public', 'friends']
+
+PULL_AUTHOR_CACHE_TTL = 600
+
+
+def fanout_follower_limit():
+    return getattr(settings, 'TIMELINE_FANOUT_FOLLOWER_LIMIT', 1000)
+
+
+def max_entries():
+    return getattr(settings, 'TIMELINE_MAX_ENTRIES', 800)
+
+
+def is_feed_visible(post):
+    return post.is_active and post.privacy in FEED_PRIVACY
+
+
+def is_pull_author(author_id):
+    """Authors with more followers than the fan-out limit are merged at read time instead of pushed."""
+    limit = fanout_follower_limit()
+    return Follow.objects.filter(following_id=author_id)[limit:limit + 1].exists()
+
+
+def pull_cache_key(author_id):
+    return f'timeline:pull:{author_id}'
+
+
+def pull_author_ids(author_ids):
+    """Return the subset of ``author_ids`` that are read-time (pull) authors.
+
+    Results are cached per author so a warm read costs a single cache round trip.
+    """
+    author_ids = list(author_ids)
+    if not author_ids:
+        return set()
+
+    keys = {pull_cache_key(author_id): author_id for author_id in author_ids}
+    cached = cache.get_many(keys.keys())
+    pulled = {keys[key] for key, is_pull in cached.items() if is_pull}
+
+    missing = [author_id for key, author_id in keys.items() if key not in cached]
+    if missing:
+        limit = fanout_follower_limit()
+        over_limit = set(
+            Follow.objects.filter(following_id__in=missing)
+            .values('following_id')
+            .annotate(n=Count('id'))
+            .filter(n__gt=limit)
+            .values_list('following_id', flat=True)
+        )
+        cache.set_many(
+            {pull_cache_key(author_id): author_id in over_limit for author_id in missing},
+            PULL_AUTHOR_CACHE_TTL,
+        )
+        pulled |= over_limit
+
+    return pulled
+
+
+def push_post(post):
+    """Fan a newly visible post out to its author's and followers' timelines."""
+    if not is_feed_visible(post):
+        return
+
+    reader_ids = [post.author_id]
+    if not is_pull_author(post.author_id):
+        reader_ids += list(
+            Follow.objects.filter(following_id=post.author_id).values_list('follower_id', flat=True)
+        )
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=reader_id, post_id=post.id, author_id=post.author_id, created_at=post.created_at)
+            for reader_id in reader_ids
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    trim_readers(reader_ids)
+
+
+def is_pushed(post):
+    return TimelineEntry.objects.filter(user_id=post.author_id, post_id=post.id).exists()
+
+
+def remove_post(post):
+    TimelineEntry.objects.filter(post_id=post.id).delete()
+
+
+def add_author(user_id, author_id):
+    """Backfill the latest posts of a newly followed author into a reader's timeline."""
+    if is_pull_author(author_id):
+        return
+
+    posts = (
+        Post.objects.filter(author_id=author_id, is_active=True, privacy__in=FEED_PRIVACY)
+        .order_by('-created_at')
+        .values_list('id', 'created_at')[:max_entries()]
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, created_at in posts
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    trim(user_id)
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def author_lost_follower(author_id):
+    """Switch an author back to push mode when an unfollow takes them down to the fan-out limit.
+
+    While over the limit their posts were only merged in at read time, so
+    followers' timelines are missing them; push the latest ones now.
+    """
+    limit = fanout_follower_limit()
+    if Follow.objects.filter(following_id=author_id)[:limit + 1].count() != limit:
+        return
+
+    cache.delete(pull_cache_key(author_id))
+    follower_ids = list(Follow.objects.filter(following_id=author_id).values_list('follower_id', flat=True))
+    posts = list(
+        Post.objects.filter(author_id=author_id, is_active=True, privacy__in=FEED_PRIVACY)
+        .order_by('-created_at')
+        .values_list('id', 'created_at')[:max_entries()]
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=follower_id, post_id=post_id, author_id=author_id, created_at=created_at)
+            for follower_id in follower_ids
+            for post_id, created_at in posts
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    trim_readers(follower_ids)
+
+
+def rebuild(user_id):
+    """Recreate a reader's timeline from scratch using the current follow graph."""
+    following_ids = set(Follow.objects.filter(follower_id=user_id).values_list('following_id', flat=True))
+    push_ids = (following_ids - pull_author_ids(following_ids)) | {user_id}
+
+    posts = (
+        Post.objects.filter(author_id__in=push_ids, is_active=True, privacy__in=FEED_PRIVACY)
+        .order_by('-created_at')
+        .values_list('id', 'author_id', 'created_at')[:max_entries()]
+    )
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, author_id, created_at in posts
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def trim(user_id):
+    """Drop entries beyond ``TIMELINE_MAX_ENTRIES`` for a reader."""
+    trim_readers([user_id])
+
+
+def trim_readers(user_ids):
+    """Drop entries beyond ``TIMELINE_MAX_ENTRIES`` for each of the readers.
+
+    One query finds each reader's cutoff (an offset walk of the
+    ``(user, -created_at)`` index) and one delete removes the overflow of
+    the readers that have any.
+    """
+    cutoffs = (
+        TimelineEntry.objects.filter(user_id=OuterRef('pk'))
+        .order_by('-created_at')
+        .values('created_at')[max_entries():max_entries() + 1]
+    )
+    over = (
+        User.objects.filter(pk__in=user_ids)
+        .annotate(cutoff=Subquery(cutoffs))
+        .filter(cutoff__isnull=False)
+        .values_list('pk', 'cutoff')
+    )
+    overflow = Q()
+    for user_id, cutoff in over:
+        overflow |= Q(user_id=user_id, created_at__lte=cutoff)
+    if overflow:
+        TimelineEntry.objects.filter(overflow).delete()
+
+
+def read_timeline(user, limit, following_ids=None, before=None, after=None):
+    """Return up to ``limit`` ``(created_at, post_id)`` pairs, newest first.
+
+    Pushed entries come from the reader's materialized timeline; posts by pull
+    authors are merged in at read time from the ``['author', '-created_at']`` index.
+    ``before``/``after`` are optional ``(created_at, post_id)`` keyset positions.
+    """
+    if following_ids is None:
+        following_ids = Follow.objects.filter(follower=user).values_list('following_id', flat=True)
+    pulled = pull_author_ids(following_ids)
+
+    entries = TimelineEntry.objects.filter(user=user)
+    if before is not None:
+        entries = entries.filter(keyset_filter(before, pk_field='post_id'))
+    if after is not None:
+        entries = entries.filter(keyset_filter(after, pk_field='post_id', descending=False))
+    pushed = list(
+        entries.order_by('-created_at', '-post_id')
+        .values_list('created_at', 'post_id')[:limit]
+    )
+    if not pulled:
+        return pushed
+
+    posts = Post.objects.filter(author_id__in=pulled, is_active=True, privacy__in=FEED_PRIVACY)
+    if before is not None:
+        posts = posts.filter(keyset_filter(before))
+    if after is not None:
+        posts = posts.filter(keyset_filter(after, descending=False))
+    pulled_posts = list(
+        posts.order_by('-created_at', '-id')
+        .values_list('created_at', 'id')[:limit]
+    )
+
+    merged = []
+    seen = set()
+    for created_at, post_id in heapq.merge(pushed, pulled_posts, reverse=True):
+        if post_id in seen:
+            continue
+        seen.add(post_id)
+        merged.append((created_at, post_id))
+        if len(merged) == limit:
+            break
+    return merged
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import FeedView, PostViewSet, CommentViewSet, RankedFeedView
+from .views import FeedView, PostViewSet, CommentViewSet, RankedFeedView, SearchView, TrendingTagsView, TagTimelineView
 
 router = DefaultRouter()
 router.register(r'posts', PostViewSet, basename='post')
@@ -10,4 +10,7 @@ urlpatterns = [
     path('', include(router.urls)),
     path('feed/', FeedView.as_view(), name='feed'),
     path('feed/ranked/', RankedFeedView.as_view(), name='ranked-feed'),
+    path('search/', SearchView.as_view(), name='post-search'),
+    path('tags/trending/', TrendingTagsView.as_view(), name='trending-tags'),
+    path('tags/<str:tag>/', TagTimelineView.as_view(), name='tag-timeline'),
 ]
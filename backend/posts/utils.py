@@ -2,7 +2,8 @@ from math import log
 from django.utils import timezone
 from typing import Set
 
-def compute_post_score(post, user_following_ids: Set[int], now=None, w_freshness=1.0, w_like=2.0, w_comment=3.0, w_follow_boost=5.0):
+def compute_post_score(post, user_following_ids: Set[int], now=None, w_freshness=1.0, w_like=2.0, w_comment=3.0, w_follow_boost=5.0,
+                       recent_likes=0, recent_comments=0, w_recent_like=2.0, w_recent_comment=3.0):
     if now is None:
         now = timezone.now()
 
@@ -40,6 +41,13 @@ def compute_post_score(post, user_following_ids: Set[int], now=None, w_freshness
     if comments > 0:
         engagement += w_comment * log(comments + 1)
 
+    # velocity: engagement in the trailing window (posts.engagement), log-scaled
+    velocity = 0.0
+    if recent_likes > 0:
+        velocity += w_recent_like * log(recent_likes + 1)
+    if recent_comments > 0:
+        velocity += w_recent_comment * log(recent_comments + 1)
+
     follow_boost = w_follow_boost if post.author_id in user_following_ids else 0.0
 
-    return freshness + engagement + follow_boost
+    return freshness + engagement + velocity + follow_boost
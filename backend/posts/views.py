@@ -1,42 +1,75 @@
-from rest_framework import viewsets, permissions, generics
+from django.db import transaction
+from rest_framework import viewsets, permissions, generics, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Post, Comment
-from .serializers import PostSerializer, CommentSerializer
+from . import counters, likes
+from .serializers import PostSerializer, CommentSerializer, LikeBatchSerializer, get_page_context, comment_preview_prefetch
+from .pagination import KeysetPagination, CommentPagination
 
 class PostViewSet(viewsets.ModelViewSet):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        return Post.objects.filter(is_active=True).select_related('author').prefetch_related('likes', 'comments')
+        queryset = Post.objects.filter(is_active=True).select_related('author')
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related(comment_preview_prefetch())
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        context = self.get_serializer_context()
+        context.update(get_page_context(request, page, self.get_serializer_class()))
+        serializer = self.get_serializer(page, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
     
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
     
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
+        """Toggle the like, or set it explicitly with ``{"liked": true|false}``."""
         post = self.get_object()
-        user = request.user
-        
-        if post.likes.filter(id=user.id).exists():
-            post.likes.remove(user)
-            liked = False
-        else:
-            post.likes.add(user)
-            liked = True
+        liked = request.data.get('liked')
+        if liked is not None:
+            liked = serializers.BooleanField().run_validation(liked)
+        liked = likes.set_liked(request.user, post.pk, liked, post=post)
         
         return Response({
             'liked': liked,
-            'like_count': post.likes.count()
+            'like_count': counters.get_like_count(post.id)
         })
     
+    @action(detail=False, methods=['post'], url_path='likes')
+    def like_batch(self, request):
+        """Apply queued likes/unlikes: ``{"like": [ids], "unlike": [ids]}``."""
+        serializer = LikeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        liked_ids = serializer.validated_data['like']
+        unliked_ids = serializer.validated_data['unlike']
+
+        with transaction.atomic():
+            likes.like(request.user, liked_ids)
+            likes.unlike(request.user, unliked_ids)
+
+        counts = counters.get_counts(liked_ids + unliked_ids, active_only=True)
+        results = [
+            {'post_id': str(post_id), 'liked': liked, 'like_count': counts[post_id][0]}
+            for post_ids, liked in ((liked_ids, True), (unliked_ids, False))
+            for post_id in post_ids
+            if post_id in counts
+        ]
+        return Response({'results': results})
+    
     @action(detail=True, methods=['get'])
     def comments(self, request, pk=None):
         post = self.get_object()
-        comments = post.comments.filter(is_active=True).select_related('author')
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        paginator = CommentPagination()
+        page = paginator.paginate_queryset(post.comments.filter(is_active=True).select_related('author'), request, view=self)
+        serializer = CommentSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
@@ -46,45 +79,57 @@ class CommentViewSet(viewsets.ModelViewSet):
         return Comment.objects.filter(is_active=True).select_related('author')
     
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user)
+            counters.adjust(comment.post_id, comments=1)
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.is_active = False
+            instance.save(update_fields=['is_active', 'updated_at'])
+            counters.adjust(instance.post_id, comments=-1)
 
 from django.contrib.auth import get_user_model
 from accounts.models import Follow
 from .serializers import FeedPostSerializer
+from . import timeline
 
 User = get_user_model()
 
 class FeedView(generics.ListAPIView):
     serializer_class = FeedPostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        user = self.request.user
-        following_ids = Follow.objects.filter(follower=user).values_list('following_id', flat=True)
-        author_ids = list(following_ids) + [user.id]
-        queryset = Post.objects.filter(author_id__in=author_ids,is_active=True,privacy__in=['public', 'friends']).select_related('author').prefetch_related('likes','comments').order_by('-created_at')
-        
-        return queryset
+        return Post.objects.filter(is_active=True,privacy__in=timeline.FEED_PRIVACY).select_related('author').prefetch_related(comment_preview_prefetch())
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        
-        if not queryset.exists():
+        paginator = self.paginator
+        position = paginator.get_position(request)
+        entries = timeline.read_timeline(request.user, paginator.get_page_size(request) + 1, before=position)
+        entries = paginator.paginate_positions(entries, request, key=lambda entry: entry)
+
+        if not entries and position is None:
             return Response({
                 'results': [],
+                'next': None,
+                'next_cursor': None,
                 'message': 'Your feed is empty. Follow some users to see their posts!'
             })
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+
+        posts = self.get_queryset().in_bulk([post_id for _, post_id in entries])
+        page = [posts[post_id] for _, post_id in entries if post_id in posts]
+
+        context = self.get_serializer_context()
+        context.update(get_page_context(request, page, self.get_serializer_class()))
+        serializer = self.get_serializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
     
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count
-from django.core.paginator import Paginator
-from django.utils import timezone
-from .utils import compute_post_score
+from . import feed_cache
 
 class RankedFeedView(APIView):
     permission_classes = [IsAuthenticated]
@@ -97,27 +142,104 @@ class RankedFeedView(APIView):
         following_ids_qs = Follow.objects.filter(follower=user).values_list('following_id', flat=True)
         following_ids = set(following_ids_qs)
 
-        author_ids = list(following_ids) + [user.id]
-
         candidate_limit = int(request.query_params.get('candidate_limit', 250))
+        # The first page refreshes the cached snapshot; later pages slice it so
+        # ordering stays stable across pages.
+        ranked_ids = feed_cache.get_ranked_ids(user, following_ids, candidate_limit, refresh=page <= 1)
 
-        qs = Post.objects.filter(author_id__in=author_ids, is_active=True, privacy__in=['public', 'friends']).select_related('author').annotate(likes_count=Count('likes', distinct=True), comments_count=Count('comments', distinct=True)).order_by('-created_at')[:candidate_limit]
-        now = timezone.now()
-        scored = []
+        count = len(ranked_ids)
+        num_pages = max(1, -(-count // page_size))
+        page_number = min(max(page, 1), num_pages)
+        page_ids = ranked_ids[(page_number - 1) * page_size:page_number * page_size]
 
-        for p in qs:
-            score = compute_post_score(p, following_ids, now=now)
-            scored.append((score, p))
+        # Hydrate only the posts on the requested page, re-checking visibility
+        # since the cached snapshot may predate a delete or privacy change
+        posts = Post.objects.filter(id__in=page_ids, is_active=True, privacy__in=timeline.FEED_PRIVACY).select_related('author').prefetch_related(comment_preview_prefetch()).in_bulk()
+        page_posts = [posts[post_id] for post_id in page_ids if post_id in posts]
 
-        scored.sort(key=lambda x: x[0], reverse=True)
-        posts_sorted = [p for (_, p) in scored]
-        paginator = Paginator(posts_sorted, page_size)
-        page_obj = paginator.get_page(page)
-        serializer = FeedPostSerializer(page_obj.object_list, many=True, context={'request': request})
+        context = {'request': request}
+        context.update(get_page_context(request, page_posts, FeedPostSerializer))
+        serializer = FeedPostSerializer(page_posts, many=True, context=context)
         return Response({
-            'count': paginator.count,
+            'count': count,
             'page': page,
             'page_size': page_size,
-            'num_pages': paginator.num_pages,
+            'num_pages': num_pages,
             'results': serializer.data
         })
+
+from rest_framework import status
+from rest_framework.utils.urls import replace_query_param
+from .serializers import SearchCommentSerializer
+from . import search
+
+class SearchView(APIView):
+    """``?q=<terms>&type=posts|comments&cursor=&page_size=``: ranked full-text search."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type', 'posts')
+        if kind not in ('posts', 'comments'):
+            return Response({'detail': "type must be 'posts' or 'comments'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        page_size = KeysetPagination().get_page_size(request)
+        model = Post if kind == 'posts' else Comment
+        ids, next_cursor = search.search(model, query, request.user, page_size, cursor=request.query_params.get('cursor'))
+
+        if model is Post:
+            objects = Post.objects.select_related('author').prefetch_related(comment_preview_prefetch()).in_bulk(ids)
+            page = [objects[pk] for pk in ids if pk in objects]
+            context = {'request': request}
+            context.update(get_page_context(request, page, FeedPostSerializer))
+            data = FeedPostSerializer(page, many=True, context=context).data
+        else:
+            objects = Comment.objects.select_related('author').in_bulk(ids)
+            page = [objects[pk] for pk in ids if pk in objects]
+            data = SearchCommentSerializer(page, many=True, context={'request': request}).data
+
+        next_link = None
+        if next_cursor:
+            next_link = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+        return Response({'next': next_link, 'next_cursor': next_cursor, 'results': data})
+
+from . import hashtags
+
+class TrendingTagsView(APIView):
+    """``?limit=N&window=<minutes>``: most used hashtags on public posts over the trailing window."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+            window = max(1, int(request.query_params.get('window', hashtags.trending_window_minutes())))
+        except ValueError:
+            return Response({'detail': 'limit and window must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'window_minutes': min(window, hashtags.trending_window_minutes()),
+            'results': [{'tag': tag, 'count': count} for tag, count in hashtags.trending(limit, window_minutes=window)],
+        })
+
+class TagTimelineView(generics.ListAPIView):
+    """Newest visible posts carrying ``#tag``."""
+    serializer_class = FeedPostSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        # Hydrates the page; which posts carry the tag comes from hashtags.tag_timeline
+        return Post.objects.filter(is_active=True).select_related('author').prefetch_related(comment_preview_prefetch())
+
+    def list(self, request, tag):
+        paginator = self.paginator
+        position = paginator.get_position(request)
+        entries = hashtags.tag_timeline(tag, request.user, paginator.get_page_size(request) + 1, before=position)
+        entries = paginator.paginate_positions(entries, request, key=lambda entry: entry)
+
+        posts = self.get_queryset().in_bulk([post_id for _, post_id in entries])
+        page = [posts[post_id] for _, post_id in entries if post_id in posts]
+
+        context = self.get_serializer_context()
+        context.update(get_page_context(request, page, self.get_serializer_class()))
+        serializer = self.get_serializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
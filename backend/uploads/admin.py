@@ -0,0 +1,5 @@
+from django.contrib import admin
+from .models import Blob, ChunkedUpload
+
+admin.site.register(ChunkedUpload)
+admin.site.register(Blob)
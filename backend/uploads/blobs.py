@@ -0,0 +1,84 @@
+from collections import Counter
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from posts.models import Post
+from .models import Blob
+from .storage import is_blob
+
+User = get_user_model()
+
+# File fields whose blobs are reference counted, and the JSON field holding their variants
+TRACKED_FIELDS = {
+    Post: (('image', 'image_variants'), ('video', None)),
+    User: (('profile_picture', 'profile_picture_variants'),),
+}
+
+
+def variant_names(variants):
+    return [
+        path for name, formats in (variants or {}).items() if name != 'source'
+        for path in formats.values()
+    ]
+
+
+def _names(values, model):
+    names = []
+    for field_name, variants_field in TRACKED_FIELDS[model]:
+        names.append(values[field_name])
+        if variants_field:
+            names.extend(variant_names(values[variants_field]))
+    return [name for name in names if is_blob(name)]
+
+
+def tracked_columns(model):
+    return [name for pair in TRACKED_FIELDS[model] for name in pair if name]
+
+
+def instance_references(instance):
+    """Blob names an in-memory instance references."""
+    model = type(instance)
+    values = {}
+    for field_name, variants_field in TRACKED_FIELDS[model]:
+        values[field_name] = getattr(instance, field_name).name
+        if variants_field:
+            values[variants_field] = getattr(instance, variants_field)
+    return _names(values, model)
+
+
+def stored_references(model, pk):
+    """Blob names a row references, read from the database."""
+    values = model.objects.filter(pk=pk).values(*tracked_columns(model)).first()
+    return _names(values, model) if values else []
+
+
+def update_refs(old_names, new_names):
+    """Move reference counts from ``old_names`` to ``new_names`` (multisets)."""
+    delta = Counter(new_names)
+    delta.subtract(Counter(old_names))
+    changes = {name: count for name, count in delta.items() if count}
+    if not changes:
+        return
+
+    with transaction.atomic():
+        Blob.objects.bulk_create([Blob(name=name) for name in changes], ignore_conflicts=True)
+        for name, count in changes.items():
+            Blob.objects.filter(name=name).update(ref_count=F('ref_count') + count)
+
+
+def recount():
+    """Rebuild every blob's count from the rows that reference it. Returns the number corrected."""
+    counts = Counter()
+    for model in TRACKED_FIELDS:
+        for values in model.objects.values(*tracked_columns(model)).iterator():
+            counts.update(_names(values, model))
+
+    corrected = 0
+    with transaction.atomic():
+        Blob.objects.bulk_create([Blob(name=name) for name in counts], ignore_conflicts=True)
+        for blob in Blob.objects.all().iterator():
+            actual = counts.get(blob.name, 0)
+            if blob.ref_count != actual:
+                Blob.objects.filter(pk=blob.pk).update(ref_count=actual)
+                corrected += 1
+    return corrected
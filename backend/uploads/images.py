@@ -0,0 +1,203 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels; images are never upscaled
+VARIANT_SIZES = {'thumb': 160, 'medium': 640, 'full': 1600}
+VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+_executor = None
+
+
+def worker_count():
+    """Size of the process pool; 0 renders variants inline (development/tests)."""
+    return getattr(settings, 'IMAGE_VARIANT_WORKERS', 2)
+
+
+def quality():
+    return getattr(settings, 'IMAGE_VARIANT_QUALITY', 82)
+
+
+def get_executor():
+    global _executor
+    # A worker killed mid-task (OOM on a huge image) breaks the whole pool; start a new one
+    if _executor is None or getattr(_executor, '_broken', False):
+        # spawn: forking an ASGI worker that already runs threads is not safe
+        _executor = ProcessPoolExecutor(max_workers=max(1, worker_count()), mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+def render_variants(source, image_quality=82):
+    """Decode an uploaded image and encode every size/format variant.
+
+    ``source`` is a local file path or the file's bytes. Runs in a pool worker:
+    it only touches files and bytes, never Django storage or the DB. EXIF
+    orientation is applied to the pixels and no metadata is written back out.
+    """
+    from PIL import Image, ImageOps
+
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with Image.open(source) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    rendered = {}
+    for name, edge in VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.LANCZOS)
+        rendered[name] = {}
+        for extension, pil_format in VARIANT_FORMATS.items():
+            frame = resized
+            if pil_format == 'JPEG' and frame.mode == 'RGBA':
+                background = Image.new('RGB', frame.size, (255, 255, 255))
+                background.paste(frame, mask=frame.getchannel('A'))
+                frame = background
+            buffer = io.BytesIO()
+            if pil_format == 'JPEG':
+                frame.save(buffer, 'JPEG', quality=image_quality, optimize=True, progressive=True)
+            else:
+                frame.save(buffer, 'WEBP', quality=image_quality, method=4)
+            rendered[name][extension] = buffer.getvalue()
+    return rendered
+
+
+def variant_path(source_name, name, extension, content):
+    """Content-hashed path, so served variants can be cached as immutable.
+
+    Used as-is by plain storages; ContentAddressedStorage only keeps the
+    extension and stores the bytes under their full digest instead.
+    """
+    directory, filename = os.path.split(source_name)
+    stem = os.path.splitext(filename)[0]
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    return f'{directory}/variants/{stem}_{name}.{digest}.{extension}'
+
+
+def store_variants(model, pk, field_name, variants_field, source_name, rendered):
+    """Save rendered variants and record them, unless the source was replaced meanwhile."""
+    # Imported here: pool workers import this module without a configured Django
+    from . import blobs
+    from .storage import ContentAddressedStorage
+
+    storage = model._meta.get_field(field_name).storage
+    # Blob names differ from variant_path, so only the storage itself can find a
+    # duplicate; it does, and refreshes the blob so gc_blobs leaves it alone
+    deduplicates = isinstance(storage, ContentAddressedStorage)
+    variants = {'source': source_name}
+    for name, formats in rendered.items():
+        variants[name] = {}
+        for extension, content in formats.items():
+            path = variant_path(source_name, name, extension, content)
+            # Same name means same bytes; re-rendering must not create name_<suffix> copies
+            if deduplicates or not storage.exists(path):
+                path = storage.save(path, ContentFile(content))
+            variants[name][extension] = path
+    with transaction.atomic():
+        current = list(
+            model.objects.select_for_update().filter(pk=pk, **{field_name: source_name})
+            .values_list(variants_field, flat=True)
+        )
+        if not current:
+            # Source replaced or row deleted; the files written above are left for gc_blobs
+            return
+        model.objects.filter(pk=pk).update(**{variants_field: variants})
+        blobs.update_refs(blobs.variant_names(current[0]), blobs.variant_names(variants))
+
+
+def clear_variants(model, pk, variants_field):
+    from . import blobs
+
+    with transaction.atomic():
+        current = list(model.objects.select_for_update().filter(pk=pk).values_list(variants_field, flat=True))
+        if current and current[0]:
+            model.objects.filter(pk=pk).update(**{variants_field: {}})
+            blobs.update_refs(blobs.variant_names(current[0]), [])
+
+
+def _finish(future, model, pk, field_name, variants_field, source_name):
+    # Runs on the executor's callback thread, which has its own DB connection
+    close_old_connections()
+    try:
+        store_variants(model, pk, field_name, variants_field, source_name, future.result())
+    except Exception:
+        logger.exception('Image variants failed for %s %s (%s)', model.__name__, pk, source_name)
+    finally:
+        close_old_connections()
+
+
+def read_source(instance, field_name):
+    """``(name, source)`` to hand to ``render_variants``.
+
+    Local storages give the file path so the pool worker does the reading;
+    other storages have no path and are read here.
+    """
+    source = getattr(instance, field_name)
+    try:
+        return source.name, source.storage.path(source.name)
+    except NotImplementedError:
+        with source.storage.open(source.name, 'rb') as fh:
+            return source.name, fh.read()
+
+
+def schedule(instance, field_name, variants_field):
+    """Queue variant generation for ``instance.<field_name>`` off the request path."""
+    model = type(instance)
+    source_name, source = read_source(instance, field_name)
+
+    if not worker_count():
+        try:
+            store_variants(model, instance.pk, field_name, variants_field, source_name, render_variants(source, quality()))
+        except Exception:
+            logger.exception('Image variants failed for %s %s (%s)', model.__name__, instance.pk, source_name)
+        return
+
+    future = get_executor().submit(render_variants, source, quality())
+    future.add_done_callback(
+        lambda done: _finish(done, model, instance.pk, field_name, variants_field, source_name)
+    )
+
+
+def needs_variants(instance, field_name, variants_field):
+    source = getattr(instance, field_name)
+    variants = getattr(instance, variants_field) or {}
+    return bool(source) and variants.get('source') != source.name
+
+
+def variant_url(field, variants, name='thumb', extension='webp'):
+    """URL of one variant, falling back to the original file until variants exist."""
+    if not field:
+        return
+    if variants and variants.get('source') == field.name and name in variants:
+        return field.storage.url(variants[name][extension])
+    return field.url
+
+
+def variant_urls(field, variants, request=None):
+    """``{size: {format: url}}`` for every rendered variant of ``field``."""
+    if not field or not variants or variants.get('source') != field.name:
+        return {}
+    build = request.build_absolute_uri if request is not None else (lambda url: url)
+    return {
+        name: {extension: build(field.storage.url(path)) for extension, path in variants[name].items()}
+        for name in VARIANT_SIZES if name in variants
+    }
+
+
+def avatar_url(user, request=None, name='thumb'):
+    """Small profile picture URL for embedding in feed, chat and notification payloads."""
+    url = variant_url(user.profile_picture, user.profile_picture_variants, name=name)
+    if url and request is not None:
+        return request.build_absolute_uri(url)
+    return url
@@ -0,0 +1,56 @@
+import os
+import time
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from uploads import blobs
+from uploads.models import Blob
+from uploads.storage import BLOB_PREFIX, ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = 'Delete content-addressed blobs that no post or user references any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help='Keep unreferenced files younger than this (uploads still being attached)')
+        parser.add_argument('--recount', action='store_true', help='Rebuild reference counts from the database first')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError('The default storage is not uploads.storage.ContentAddressedStorage')
+
+        if options['recount']:
+            corrected = blobs.recount()
+            self.stdout.write(f"Corrected {corrected} reference counts")
+
+        cutoff = time.time() - options['grace_hours'] * 3600
+        referenced = set(Blob.objects.filter(ref_count__gt=0).values_list('name', flat=True))
+        root = default_storage.path(BLOB_PREFIX.rstrip('/'))
+
+        deleted = freed = 0
+        collected = []
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                full_path = os.path.join(directory, filename)
+                name = os.path.relpath(full_path, default_storage.location).replace(os.sep, '/')
+                if name in referenced:
+                    continue
+                stat = os.stat(full_path)
+                if stat.st_mtime > cutoff:
+                    continue
+                deleted += 1
+                freed += stat.st_size
+                collected.append(name)
+                if not options['dry_run']:
+                    os.remove(full_path)
+
+        if not options['dry_run']:
+            Blob.objects.filter(name__in=collected, ref_count__lte=0).delete()
+            # Rows whose file is already gone
+            stale = [name for name in Blob.objects.filter(ref_count__lte=0).values_list('name', flat=True)
+                     if not default_storage.exists(name)]
+            Blob.objects.filter(name__in=stale).delete()
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} blobs ({freed} bytes)"))
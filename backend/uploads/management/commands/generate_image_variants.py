@@ -0,0 +1,40 @@
+from concurrent.futures import as_completed
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from posts.models import Post
+from uploads import images
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Render missing thumb/medium/full variants for post images and profile pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-render variants that already exist')
+
+    def handle(self, *args, **options):
+        targets = [
+            (Post.objects.exclude(image='').exclude(image__isnull=True), 'image', 'image_variants'),
+            (User.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True), 'profile_picture', 'profile_picture_variants'),
+        ]
+        executor = images.get_executor()
+        pending = {}
+        for queryset, field_name, variants_field in targets:
+            for instance in queryset.iterator():
+                if options['force'] or images.needs_variants(instance, field_name, variants_field):
+                    source_name, source = images.read_source(instance, field_name)
+                    future = executor.submit(images.render_variants, source, images.quality())
+                    pending[future] = (type(instance), instance.pk, field_name, variants_field, source_name)
+
+        rendered = failed = 0
+        for future in as_completed(pending):
+            model, pk, field_name, variants_field, source_name = pending[future]
+            try:
+                images.store_variants(model, pk, field_name, variants_field, source_name, future.result())
+                rendered += 1
+            except Exception as exc:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f"{model.__name__} {pk}: {exc}"))
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered variants for {rendered} files ({failed} failed)"))
@@ -0,0 +1,22 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from uploads.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = 'Delete expired resumable uploads: abandoned partial files and finished upload records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None, help='Age threshold (default CHUNKED_UPLOAD_EXPIRY_HOURS)')
+
+    def handle(self, *args, **options):
+        hours = options['hours'] if options['hours'] is not None else getattr(settings, 'CHUNKED_UPLOAD_EXPIRY_HOURS', 24)
+        stale = ChunkedUpload.objects.filter(updated_at__lt=timezone.now() - timedelta(hours=hours))
+        purged = 0
+        for upload in stale.iterator():
+            upload.discard_file()
+            purged += 1
+        stale.delete()
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} uploads older than {hours}h"))
@@ -0,0 +1,65 @@
+import os
+import tempfile
+from uuid import uuid4
+from django.conf import settings
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+def chunked_upload_dir():
+    return getattr(settings, 'CHUNKED_UPLOAD_DIR', None) or os.path.join(tempfile.gettempdir(), 'chunked_uploads')
+
+
+class ChunkedUpload(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('complete', 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    user = models.ForeignKey(User, related_name='chunked_uploads', on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.BigIntegerField(help_text='Total size in bytes announced at initiation')
+    offset = models.BigIntegerField(default=0, help_text='Bytes received so far')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    post = models.ForeignKey('posts.Post', null=True, blank=True, related_name='+', on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size}) by {self.user.username}"
+
+    @property
+    def temp_path(self):
+        return os.path.join(chunked_upload_dir(), f'{self.id}.part')
+
+    def discard_file(self):
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+class Blob(models.Model):
+    """Reference count of one content-addressed file (see uploads.storage)."""
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
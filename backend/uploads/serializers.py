@@ -0,0 +1,42 @@
+from django.conf import settings
+from rest_framework import serializers
+from posts.models import Post
+from .models import ChunkedUpload
+
+
+def max_upload_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 2 * 1024 ** 3)
+
+
+def max_chunk_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', 8 * 1024 ** 2)
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'filename', 'content_type', 'size', 'offset', 'chunk_size', 'status', 'post', 'created_at']
+        read_only_fields = ['id', 'offset', 'status', 'post', 'created_at']
+
+    def get_chunk_size(self, obj):
+        return max_chunk_size()
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Upload size must be positive')
+        if value > max_upload_size():
+            raise serializers.ValidationError(f'Uploads are limited to {max_upload_size()} bytes')
+        return value
+
+    def validate_content_type(self, value):
+        if not value.startswith('video/'):
+            raise serializers.ValidationError('Only video uploads are supported')
+        return value
+
+
+class CompleteUploadSerializer(serializers.Serializer):
+    content = serializers.CharField(allow_blank=True, default='')
+    privacy = serializers.ChoiceField(choices=Post.PRIVACY_CHOICES, default='public')
+    image = serializers.ImageField(required=False)
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from posts.models import Post
+from . import blobs, images
+
+User = get_user_model()
+
+
+def sync_variants(instance, field_name, variants_field):
+    if images.needs_variants(instance, field_name, variants_field):
+        transaction.on_commit(lambda: images.schedule(instance, field_name, variants_field))
+    elif not getattr(instance, field_name) and getattr(instance, variants_field):
+        images.clear_variants(type(instance), instance.pk, variants_field)
+
+
+@receiver(post_save, sender=Post)
+def post_image_variants(sender, instance, **kwargs):
+    sync_variants(instance, 'image', 'image_variants')
+
+
+@receiver(post_save, sender=User)
+def profile_picture_variants(sender, instance, **kwargs):
+    sync_variants(instance, 'profile_picture', 'profile_picture_variants')
+
+
+# Blob reference counts follow what each row points at in the database
+
+def touches_blobs(sender, update_fields):
+    return update_fields is None or bool(set(update_fields) & set(blobs.tracked_columns(sender)))
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=User)
+def remember_blob_refs(sender, instance, update_fields=None, **kwargs):
+    if not instance._state.adding and touches_blobs(sender, update_fields):
+        instance._blob_refs = blobs.stored_references(sender, instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=User)
+def count_blob_refs(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        blobs.update_refs([], blobs.instance_references(instance))
+    elif hasattr(instance, '_blob_refs'):
+        blobs.update_refs(instance.__dict__.pop('_blob_refs'), blobs.stored_references(sender, instance.pk))
+
+
+@receiver(pre_delete, sender=Post)
+@receiver(pre_delete, sender=User)
+def remember_blob_refs_on_delete(sender, instance, **kwargs):
+    instance._blob_refs = blobs.stored_references(sender, instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=User)
+def release_blob_refs(sender, instance, **kwargs):
+    blobs.update_refs(instance.__dict__.pop('_blob_refs', []), [])
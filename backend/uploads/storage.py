@@ -0,0 +1,98 @@
+import hashlib
+import os
+import re
+from uuid import uuid4
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+BLOB_PREFIX = 'blobs/'
+_EXTENSION = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+
+def blob_name(digest, original_name):
+    extension = os.path.splitext(original_name)[1].lower()
+    if not _EXTENSION.match(extension):
+        extension = ''
+    return f'{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Store every file once, under ``blobs/ab/cd/<sha256>.<ext>``.
+
+    The digest is computed while the upload is streamed to a temporary file in
+    the staging directory, which is then renamed into place, so identical uploads
+    (a reposted image, the same avatar twice) share one file. ``upload_to`` only
+    contributes the extension. Blobs are never removed here: references are
+    counted in ``uploads.blobs`` and ``gc_blobs`` deletes the unreferenced ones.
+    """
+
+    @property
+    def staging_dir(self):
+        """Where uploads are hashed before being renamed into the blob tree.
+
+        Outside MEDIA_ROOT so half-written files are never served, and next to
+        it by default so the rename stays on one filesystem.
+        """
+        return getattr(settings, 'MEDIA_STAGING_DIR', '') or f'{self.location.rstrip(os.sep)}_staging'
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content in _save; collisions mean identical bytes
+        return name
+
+    def _ensure_dir(self, directory):
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+    def _save(self, name, content):
+        staging = self.staging_dir
+        self._ensure_dir(staging)
+        digest = hashlib.sha256()
+
+        if hasattr(content, 'temporary_file_path'):
+            # Already on disk (large or chunked uploads): hash it, then move rather than copy
+            source = content.temporary_file_path()
+            with open(source, 'rb') as fh:
+                for block in iter(lambda: fh.read(1024 * 1024), b''):
+                    digest.update(block)
+            temp_path = os.path.join(staging, uuid4().hex)
+            file_move_safe(source, temp_path)
+        else:
+            temp_path = os.path.join(staging, uuid4().hex)
+            # 0o666 like FileSystemStorage, so the umask decides the final mode
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    out.write(chunk)
+
+        final_name = blob_name(digest.hexdigest(), name)
+        full_path = self.path(final_name)
+        if os.path.exists(full_path):
+            try:
+                # gc_blobs spares files younger than its grace period, so refreshing the
+                # mtime keeps an unreferenced duplicate alive until this reference is counted
+                os.utime(full_path)
+            except FileNotFoundError:
+                pass
+            else:
+                os.remove(temp_path)
+                return final_name
+
+        self._ensure_dir(os.path.dirname(full_path))
+        os.replace(temp_path, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return final_name
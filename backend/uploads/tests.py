@@ -0,0 +1,294 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+from posts.models import Post
+from . import images, views
+from .models import Blob, ChunkedUpload
+from .storage import ContentAddressedStorage, blob_name
+from .views import serve_media
+
+User = get_user_model()
+
+
+def make_user(username):
+    return User.objects.create_user(username=username, email=f'{username}@example.com', password='pw')
+
+
+def png_upload(name='picture.png', size=(400, 300), color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class MediaRootMixin:
+    """Point MEDIA_ROOT at a throwaway directory for the duration of each test."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, f'{self.media_root}_staging', ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+class ImageVariantTests(MediaRootMixin, TestCase):
+    def upload_avatar(self, user):
+        user.profile_picture = png_upload()
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        user.refresh_from_db()
+
+    @override_settings(IMAGE_VARIANT_WORKERS=0)
+    def test_inline_render_records_every_variant(self):
+        user = make_user('alice')
+        self.upload_avatar(user)
+
+        variants = user.profile_picture_variants
+        self.assertEqual(variants['source'], user.profile_picture.name)
+        for name, edge in images.VARIANT_SIZES.items():
+            with user.profile_picture.storage.open(variants[name]['jpeg']) as fh:
+                self.assertLessEqual(max(Image.open(fh).size), min(edge, 400))
+
+    @override_settings(IMAGE_VARIANT_WORKERS=2)
+    def test_pool_receives_the_file_path_not_its_bytes(self):
+        user = make_user('alice')
+        executor = mock.Mock()
+        with mock.patch.object(images, 'get_executor', return_value=executor):
+            self.upload_avatar(user)
+
+        render, source, _ = executor.submit.call_args.args
+        self.assertIs(render, images.render_variants)
+        self.assertEqual(source, user.profile_picture.path)
+        self.assertEqual(set(images.render_variants(source)), set(images.VARIANT_SIZES))
+
+
+class ServeMediaTests(MediaRootMixin, SimpleTestCase):
+    body = bytes(range(256)) * 40
+
+    def setUp(self):
+        super().setUp()
+        self.write('videos/clip.mp4', self.body)
+
+    def write(self, name, content):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(content)
+
+    def get(self, path, **headers):
+        return serve_media(RequestFactory().get(f'/media/{path}', headers=headers), path)
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_body(self):
+        response = self.get('videos/clip.mp4')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.content(response), self.body)
+
+    def test_range(self):
+        response = self.get('videos/clip.mp4', Range='bytes=100-299')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-299/{len(self.body)}')
+        self.assertEqual(response['Content-Length'], '200')
+        self.assertEqual(self.content(response), self.body[100:300])
+
+        suffix = self.get('videos/clip.mp4', Range='bytes=-10')
+        self.assertEqual(self.content(suffix), self.body[-10:])
+
+    def test_unsatisfiable_range(self):
+        response = self.get('videos/clip.mp4', Range=f'bytes={len(self.body)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.body)}')
+
+    def test_stale_if_range_sends_the_whole_file(self):
+        response = self.get('videos/clip.mp4', Range='bytes=0-9', **{'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), self.body)
+
+    def test_not_modified(self):
+        first = self.get('videos/clip.mp4')
+        self.content(first)
+        self.assertEqual(self.get('videos/clip.mp4', **{'If-None-Match': first['ETag']}).status_code, 304)
+        self.assertEqual(self.get('videos/clip.mp4', **{'If-Modified-Since': first['Last-Modified']}).status_code, 304)
+        self.assertEqual(self.get('videos/clip.mp4', **{'If-None-Match': '"other"'}).status_code, 200)
+
+    def test_cache_control(self):
+        self.write('blobs/ab/cd/' + 'ab' * 32 + '.jpg', b'x')
+        response = self.get('blobs/ab/cd/' + 'ab' * 32 + '.jpg')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertNotIn('immutable', self.get('videos/clip.mp4')['Cache-Control'])
+
+    def test_missing_files_and_traversal_are_not_served(self):
+        for path in ['missing.jpg', 'videos', '../outside', 'videos/../../outside']:
+            with self.subTest(path=path), self.assertRaises(Http404):
+                self.get(path)
+
+
+class ChunkedUploadTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        upload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, upload_dir, ignore_errors=True)
+        uploads = override_settings(CHUNKED_UPLOAD_DIR=upload_dir)
+        uploads.enable()
+        self.addCleanup(uploads.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('alice'))
+        response = self.client.post('/api/uploads/', {'filename': 'clip.mp4', 'content_type': 'video/mp4', 'size': 10}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.upload = ChunkedUpload.objects.get(pk=response.data['id'])
+
+    def put(self, offset, data):
+        return self.client.put(
+            f'/api/uploads/{self.upload.pk}/', data=data,
+            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def stored(self):
+        self.upload.refresh_from_db()
+        with open(self.upload.temp_path, 'rb') as fh:
+            return self.upload.offset, fh.read()
+
+    def test_chunks_append_and_resume(self):
+        self.assertEqual(self.put(0, b'abcd').data['offset'], 4)
+        mismatch = self.put(0, b'abcd')
+        self.assertEqual(mismatch.status_code, 409)
+        self.assertEqual(mismatch.data['offset'], 4)
+        self.assertEqual(self.put(4, b'efghij').data['offset'], 10)
+        self.assertEqual(self.stored(), (10, b'abcdefghij'))
+        self.assertEqual(self.put(10, b'k').status_code, 400)
+
+    def test_concurrent_put_at_the_same_offset_cannot_overwrite_the_winner(self):
+        self.put(0, b'abcd')
+        real_uuid4 = views.uuid4
+        raced = {}
+
+        def competing_put():
+            # The other request lands after this one passed its offset check
+            if not raced:
+                raced['started'] = True
+                raced['response'] = self.put(4, b'WINNER')
+            return real_uuid4()
+
+        with mock.patch.object(views, 'uuid4', side_effect=competing_put):
+            loser = self.put(4, b'loser!')
+
+        self.assertEqual(raced['response'].status_code, 200)
+        self.assertEqual(loser.status_code, 409)
+        self.assertEqual(loser.data['offset'], 10)
+        self.assertEqual(self.stored(), (10, b'abcdWINNER'))
+        self.assertEqual(os.listdir(os.path.dirname(self.upload.temp_path)), [os.path.basename(self.upload.temp_path)])
+
+    def complete(self):
+        return self.client.post(f'/api/uploads/{self.upload.pk}/complete/', {'content': 'clip', 'privacy': 'public'})
+
+    def test_complete_creates_the_post(self):
+        self.put(0, b'abcdefghij')
+        response = self.complete()
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(pk=response.data['id'])
+        with post.video.open('rb') as fh:
+            self.assertEqual(fh.read(), b'abcdefghij')
+        self.assertFalse(os.path.exists(self.upload.temp_path))
+        self.assertEqual(self.complete().status_code, 409)
+
+    def test_complete_after_a_rolled_back_attempt_asks_for_a_new_upload(self):
+        self.put(0, b'abcdefghij')
+        self.client.raise_request_exception = False
+        with mock.patch.object(Post, 'save', side_effect=DatabaseError('boom')):
+            self.assertEqual(self.complete().status_code, 500)
+        self.assertFalse(Post.objects.exists())
+
+        response = self.complete()
+        self.assertEqual(response.status_code, 410)
+        self.assertFalse(ChunkedUpload.objects.filter(pk=self.upload.pk).exists())
+
+
+class ContentAddressedStorageTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.storage = default_storage
+        self.assertIsInstance(self.storage, ContentAddressedStorage)
+
+    def files_under(self, root):
+        return sorted(
+            os.path.relpath(os.path.join(directory, filename), root)
+            for directory, _, filenames in os.walk(root) for filename in filenames
+        )
+
+    def test_identical_content_is_stored_once_and_staged_outside_media_root(self):
+        first = self.storage.save('uploads/a.JPG', ContentFile(b'same bytes'))
+        second = self.storage.save('other/b.jpg', ContentFile(b'same bytes'))
+
+        self.assertEqual(first, second)
+        self.assertEqual(first, blob_name(hashlib.sha256(b'same bytes').hexdigest(), 'x.jpg'))
+        self.assertEqual(self.files_under(self.media_root), [first])
+        staging = self.storage.staging_dir
+        self.assertFalse(os.path.realpath(staging).startswith(os.path.realpath(self.media_root) + os.sep))
+        self.assertEqual(os.listdir(staging), [])
+
+    def test_staging_dir_setting(self):
+        staging = tempfile.mkdtemp(dir=os.path.dirname(self.media_root))
+        self.addCleanup(shutil.rmtree, staging, ignore_errors=True)
+        with override_settings(MEDIA_STAGING_DIR=staging):
+            self.assertEqual(self.storage.staging_dir, staging)
+            self.storage.save('a.txt', ContentFile(b'x'))
+
+    def test_dedup_hit_refreshes_the_blob_for_gc(self):
+        name = self.storage.save('a.jpg', ContentFile(b'orphan'))
+        path = self.storage.path(name)
+        old = time.time() - 48 * 3600
+        os.utime(path, (old, old))
+
+        # Re-uploaded just before a collection: the blob must survive the grace period
+        self.assertEqual(self.storage.save('b.jpg', ContentFile(b'orphan')), name)
+        call_command('gc_blobs', grace_hours=24, stdout=io.StringIO())
+        self.assertTrue(os.path.exists(path))
+
+        os.utime(path, (old, old))
+        call_command('gc_blobs', grace_hours=24, stdout=io.StringIO())
+        self.assertFalse(os.path.exists(path))
+
+    @override_settings(IMAGE_VARIANT_WORKERS=0)
+    def test_variants_are_blobs_and_rerendering_reuses_them(self):
+        user = make_user('alice')
+        user.profile_picture = png_upload()
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        user.refresh_from_db()
+        variants = user.profile_picture_variants
+        names = [path for name, formats in variants.items() if name != 'source' for path in formats.values()]
+        self.assertTrue(all(name.startswith('blobs/') for name in names))
+        files = self.files_under(self.media_root)
+
+        source, data = images.read_source(user, 'profile_picture')
+        images.store_variants(User, user.pk, 'profile_picture', 'profile_picture_variants', source, images.render_variants(data))
+
+        user.refresh_from_db()
+        self.assertEqual(user.profile_picture_variants, variants)
+        self.assertEqual(self.files_under(self.media_root), files)
+        self.assertEqual(
+            dict(Blob.objects.filter(name__in=names).values_list('name', 'ref_count')),
+            # medium and full are identical bytes for a small image, so they share a blob
+            dict(Counter(names)),
+        )
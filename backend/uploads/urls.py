@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import InitiateUploadView, UploadChunkView, CompleteUploadView
+
+urlpatterns = [
+    path('', InitiateUploadView.as_view(), name='upload-initiate'),
+    path('<uuid:upload_id>/', UploadChunkView.as_view(), name='upload-chunk'),
+    path('<uuid:upload_id>/complete/', CompleteUploadView.as_view(), name='upload-complete'),
+]
@@ -0,0 +1,315 @@
+import mimetypes
+import os
+import re
+import shutil
+import stat
+from uuid import uuid4
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from posts.models import Post
+from posts.serializers import PostSerializer
+from .models import ChunkedUpload, chunked_upload_dir
+from .serializers import ChunkedUploadSerializer, CompleteUploadSerializer, max_chunk_size
+
+# Files whose name embeds their content hash (``name.<hex>.ext`` variants,
+# ``blobs/ab/cd/<sha256>.ext``) never change
+HASHED_NAME = re.compile(r'(?:\.[0-9a-f]{12,64}|/[0-9a-f]{64})\.[A-Za-z0-9]+$')
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def media_max_age():
+    """Cache lifetime of media whose name is not content-hashed (revalidated by ETag)."""
+    return getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)
+
+
+class MediaResponse(FileResponse):
+    # Under ASGI there is no sendfile: the file is read and sent in blocks of
+    # this size, so it trades per-request memory against the number of sends
+    block_size = 256 * 1024
+
+
+class RangeFile:
+    """Expose ``length`` bytes of an open file from its current position."""
+
+    def __init__(self, fh, length):
+        self.fh = fh
+        self.remaining = length
+
+    def fileno(self):
+        return self.fh.fileno()
+
+    def tell(self):
+        return self.fh.tell()
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fh.close()
+
+
+def parse_range(header, size):
+    """``(start, end)`` inclusive for a single satisfiable byte range, None to send
+    the whole file, or ``False`` when the range cannot be satisfied."""
+    match = RANGE_HEADER.match(header.strip())
+    if not match:
+        # Malformed or multi-range requests fall back to the full body
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def etag_matches(header, etag):
+    if header.strip() == '*':
+        return True
+    # Weak comparison: W/"x" matches "x"
+    candidates = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return etag in candidates
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file under MEDIA_ROOT with Range, ETag and cache headers.
+
+    Bodies are streamed through Python in ``MediaResponse.block_size`` blocks,
+    which is fine for development and small deployments. Larger ones should let
+    the web server serve MEDIA_ROOT and turn ``SERVE_MEDIA`` off.
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('File not found')
+    try:
+        st = os.stat(fullpath)
+    except OSError:
+        raise Http404('File not found')
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('File not found')
+
+    size = st.st_size
+    etag = f'"{st.st_mtime_ns:x}-{size:x}"'
+    last_modified = http_date(st.st_mtime)
+    if HASHED_NAME.search(path):
+        cache_control = 'public, max-age=31536000, immutable'
+    else:
+        cache_control = f'public, max-age={media_max_age()}'
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        response['Cache-Control'] = cache_control
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        if etag_matches(if_none_match, etag):
+            return finish(HttpResponseNotModified())
+    else:
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if since is not None and int(st.st_mtime) <= since:
+            return finish(HttpResponseNotModified())
+
+    content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if range_header and size:
+        if_range = request.headers.get('If-Range')
+        # A stale If-Range validator means the client's partial copy is outdated: send it all
+        if if_range is None or if_range.strip() in (etag, last_modified):
+            byte_range = parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return finish(response)
+
+    fh = open(fullpath, 'rb')
+    if byte_range is None:
+        response = MediaResponse(fh, content_type=content_type)
+    else:
+        start, end = byte_range
+        fh.seek(start)
+        response = MediaResponse(RangeFile(fh, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    return finish(response)
+
+
+
+class AssembledFile(File):
+    """A fully received upload on local disk; FileSystemStorage moves it into place instead of copying."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class InitiateUploadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = ChunkedUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.save(user=request.user)
+        os.makedirs(chunked_upload_dir(), exist_ok=True)
+        open(upload.temp_path, 'wb').close()
+        return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+
+class UploadChunkView(APIView):
+    """``PUT`` raw bytes at ``Upload-Offset``; ``GET`` reports the offset to resume from."""
+    permission_classes = [IsAuthenticated]
+    read_block_size = 64 * 1024
+
+    def get(self, request, upload_id):
+        upload = get_object_or_404(ChunkedUpload, id=upload_id, user=request.user)
+        return Response(ChunkedUploadSerializer(upload).data)
+
+    def put(self, request, upload_id):
+        upload = get_object_or_404(ChunkedUpload, id=upload_id, user=request.user)
+        if upload.status != 'pending':
+            return Response({'detail': 'Upload already completed'}, status=status.HTTP_409_CONFLICT)
+
+        try:
+            offset = int(request.headers.get('Upload-Offset', request.query_params.get('offset')))
+            length = int(request.headers.get('Content-Length') or 0)
+        except (TypeError, ValueError):
+            return Response({'detail': 'Upload-Offset header is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if offset != upload.offset:
+            # The client lost track (e.g. a dropped response); tell it where to resume
+            return Response(
+                {'detail': 'Offset mismatch', 'offset': upload.offset},
+                status=status.HTTP_409_CONFLICT
+            )
+        if length <= 0:
+            return Response({'detail': 'Empty chunk'}, status=status.HTTP_400_BAD_REQUEST)
+        if length > max_chunk_size():
+            return Response(
+                {'detail': f'Chunks are limited to {max_chunk_size()} bytes'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        if offset + length > upload.size:
+            return Response({'detail': 'Chunk exceeds the announced upload size'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Stream the body to a file of its own first: memory stays at one read
+        # block, and a slow client holds no lock while it sends
+        chunk_path = f'{upload.temp_path}.{uuid4().hex}.chunk'
+        try:
+            written = 0
+            with open(chunk_path, 'wb') as chunk:
+                while written < length:
+                    block = request.stream.read(min(self.read_block_size, length - written))
+                    if not block:
+                        break
+                    chunk.write(block)
+                    written += len(block)
+
+            if written != length:
+                return Response(
+                    {'detail': 'Chunk was cut short', 'offset': upload.offset},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Claim the offset, then append while the row stays locked: a concurrent
+            # PUT at the same offset waits here and then fails the compare-and-set
+            with transaction.atomic():
+                updated = ChunkedUpload.objects.filter(pk=upload.pk, offset=offset, status='pending').update(
+                    offset=offset + written, updated_at=timezone.now()
+                )
+                if updated:
+                    with open(chunk_path, 'rb') as chunk, open(upload.temp_path, 'r+b') as fh:
+                        fh.seek(offset)
+                        fh.truncate()
+                        shutil.copyfileobj(chunk, fh, self.read_block_size)
+        finally:
+            os.remove(chunk_path)
+
+        if not updated:
+            upload.refresh_from_db()
+            return Response(
+                {'detail': 'Offset mismatch', 'offset': upload.offset},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response({'id': str(upload.id), 'offset': offset + written, 'size': upload.size})
+
+    def delete(self, request, upload_id):
+        upload = get_object_or_404(ChunkedUpload, id=upload_id, user=request.user, status='pending')
+        upload.discard_file()
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CompleteUploadView(APIView):
+    """Attach a fully received upload to a new post."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        serializer = CompleteUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            upload = get_object_or_404(
+                ChunkedUpload.objects.select_for_update(), id=upload_id, user=request.user
+            )
+            if upload.status != 'pending':
+                return Response({'detail': 'Upload already completed'}, status=status.HTTP_409_CONFLICT)
+            if upload.offset != upload.size:
+                return Response(
+                    {'detail': 'Upload is incomplete', 'offset': upload.offset, 'size': upload.size},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            post = Post(
+                author=request.user,
+                content=serializer.validated_data['content'],
+                privacy=serializer.validated_data['privacy'],
+                image=serializer.validated_data.get('image'),
+            )
+            try:
+                fh = open(upload.temp_path, 'rb')
+            except FileNotFoundError:
+                # An earlier attempt moved the file into storage, then its transaction rolled back
+                upload.delete()
+                return Response(
+                    {'detail': 'Upload data is no longer available; start a new upload'},
+                    status=status.HTTP_410_GONE
+                )
+            with fh:
+                post.video.save(upload.filename, AssembledFile(fh, name=upload.filename), save=False)
+            post.save()
+
+            upload.status = 'complete'
+            upload.post = post
+            upload.save(update_fields=['status', 'post', 'updated_at'])
+
+        upload.discard_file()
+        return Response(PostSerializer(post, context={'request': request}).data, status=status.HTTP_201_CREATED)
@@ -27,6 +27,8 @@ export default function ChatConversationPage() {
 
   const [conversation, setConversation] = useState<ConversationDetail | null>(null);
   const [messages, setMessages] = useState<MessageType[]>([]);
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
   const [currentUser, setCurrentUser] = useState<any>(null);
   const [inputMessage, setInputMessage] = useState('');
   const [isLoading, setIsLoading] = useState(true);
@@ -40,6 +42,7 @@ export default function ChatConversationPage() {
   const [isRinging, setIsRinging] = useState(false);
 
   const messagesEndRef = useRef<HTMLDivElement>(null);
+  const keepScrollRef = useRef(false);
   const wsServiceRef = useRef(createChatWebSocketService());
   const typingTimeoutRef = useRef<NodeJS.Timeout | null>(null);
   const audioRef = useRef<HTMLAudioElement | null>(null);
@@ -107,10 +110,13 @@ export default function ChatConversationPage() {
           break;
 
         case 'messages_read':
-          if (data.message_ids) {
+          const readerId = currentUser?.pk || currentUser?.id;
+          if (data.last_read_at && data.reader_id !== String(readerId)) {
+            // Everything up to the reader's watermark has been read
+            const readUpTo = new Date(data.last_read_at).getTime();
             setMessages(prev =>
               prev.map(msg =>
-                data.message_ids!.includes(msg.id) ? { ...msg, is_read: true } : msg
+                new Date(msg.created_at).getTime() <= readUpTo ? { ...msg, is_read: true } : msg
               )
             );
           }
@@ -169,6 +175,11 @@ export default function ChatConversationPage() {
   }, [conversationId, currentUser?.pk, router]);
 
   useEffect(() => {
+    // Prepending older history should not jump to the newest message
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
@@ -178,6 +189,7 @@ export default function ChatConversationPage() {
       const data = await chatAPI.getConversation(conversationId);
       setConversation(data);
       setMessages(data.messages);
+      setOlderCursor(data.messages_next_cursor);
     } catch (error) {
       router.push('/chat');
     } finally {
@@ -185,6 +197,21 @@ export default function ChatConversationPage() {
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!olderCursor || isLoadingOlder) return;
+    try {
+      setIsLoadingOlder(true);
+      const page = await chatAPI.getMessages(conversationId, olderCursor);
+      keepScrollRef.current = true;
+      setMessages(prev => [...page.results, ...prev]);
+      setOlderCursor(page.next_cursor);
+    } catch (error) {
+      console.error('Error loading older messages:', error);
+    } finally {
+      setIsLoadingOlder(false);
+    }
+  };
+
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
@@ -361,6 +388,17 @@ export default function ChatConversationPage() {
 
       {/* Messages */}
       <div className="flex-1 overflow-y-auto p-4 space-y-4">
+        {olderCursor && (
+          <div className="flex justify-center">
+            <button
+              onClick={loadOlderMessages}
+              disabled={isLoadingOlder}
+              className="px-4 py-1 text-sm text-blue-600 hover:underline disabled:opacity-50"
+            >
+              {isLoadingOlder ? 'Loading...' : 'Load earlier messages'}
+            </button>
+          </div>
+        )}
         {messages.map((message) => {
           const isOwnMessage = message.sender.id === currentUser?.pk;
 
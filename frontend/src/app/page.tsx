@@ -1,6 +1,6 @@
 'use client';
 
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Post } from '@/types/post';
 import { postAPI } from '@/service/api';
 import PostCard from '@/components/PostCard';
@@ -10,16 +10,38 @@ export default function HomePage() {
   const [posts, setPosts] = useState<Post[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  const loaderRef = useRef<HTMLDivElement>(null);
 
   useEffect(() => {
     fetchPosts();
   }, []);
 
+  useEffect(() => {
+    const observer = new IntersectionObserver(
+      (entries) => {
+        if (entries[0].isIntersecting && nextCursor && !isLoadingMore) {
+          loadMore();
+        }
+      },
+      { threshold: 0.1 }
+    );
+
+    if (loaderRef.current) {
+      observer.observe(loaderRef.current);
+    }
+
+    return () => observer.disconnect();
+  }, [nextCursor, isLoadingMore]);
+
   const fetchPosts = async () => {
     try {
       setIsLoading(true);
+      setError(null);
       const postsData = await postAPI.getPosts();
-      setPosts(postsData);
+      setPosts(postsData.results);
+      setNextCursor(postsData.next_cursor);
     } catch (err) {
       setError('Failed to load posts. Please try again later.');
     } finally {
@@ -27,6 +49,24 @@ export default function HomePage() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor || isLoadingMore) return;
+
+    try {
+      setIsLoadingMore(true);
+      const postsData = await postAPI.getPosts(nextCursor);
+      // Posts created on this page were prepended already; skip them when their page arrives
+      setPosts(prev => {
+        const seen = new Set(prev.map(post => post.id));
+        return [...prev, ...postsData.results.filter(post => !seen.has(post.id))];
+      });
+      setNextCursor(postsData.next_cursor);
+    } catch (err) {
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const handlePostCreated = (newPost: Post) => {
     setPosts(prev => [newPost, ...prev]);
   };
@@ -82,12 +122,23 @@ export default function HomePage() {
               <p className="text-gray-600">Be the first to share something!</p>
             </div>
           ) : (
-            posts.map((post) => (
-              <PostCard 
-                key={post.id} 
-                post={post}
-              />
-            ))
+            <>
+              {posts.map((post) => (
+                <PostCard 
+                  key={post.id} 
+                  post={post}
+                />
+              ))}
+
+              {/* Infinite Scroll Trigger */}
+              <div ref={loaderRef} className="py-4">
+                {isLoadingMore && (
+                  <div className="flex justify-center">
+                    <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-blue-600"></div>
+                  </div>
+                )}
+              </div>
+            </>
           )}
         </div>
       </div>
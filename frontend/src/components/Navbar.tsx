@@ -6,6 +6,7 @@ import { useRouter, usePathname } from 'next/navigation';
 import axios from 'axios';
 import { chatAPI } from '@/service/chatApi';
 import { notificationAPI } from '@/service/notificationApi';
+import notificationSocket from '@/service/notificationWebsocket';
 
 const NavBar: React.FC = () => {
   const [user, setUser] = useState<any>(null);
@@ -34,11 +35,24 @@ const NavBar: React.FC = () => {
       fetchUnreadCount();
       fetchUnreadNotifications();
 
-      const interval = setInterval(() => {
-        fetchUnreadCount();
-        fetchUnreadNotifications();
-      }, 30000);
-      return () => clearInterval(interval);
+      // Chat unread totals are pushed on the shared notifications socket;
+      // refetch on every (re)connect since pushes sent while it was down are lost
+      const unsubscribe = notificationSocket.subscribe((data) => {
+        if (data.type === 'chat_unread' && data.unread_count !== undefined) {
+          setUnreadCount(data.unread_count);
+        } else if (data.type === 'connected') {
+          fetchUnreadCount();
+        }
+      });
+
+      const interval = setInterval(fetchUnreadNotifications, 30000);
+      // Slow fallback for when the socket cannot connect at all
+      const unreadInterval = setInterval(fetchUnreadCount, 120000);
+      return () => {
+        clearInterval(interval);
+        clearInterval(unreadInterval);
+        unsubscribe();
+      };
     }
   }, [user]);
 
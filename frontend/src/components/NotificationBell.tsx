@@ -2,6 +2,7 @@
 
 import React, { useState, useEffect } from 'react';
 import { notificationAPI } from '@/service/notificationApi';
+import notificationSocket, { NotificationSocketMessage } from '@/service/notificationWebsocket';
 import Link from 'next/link';
 
 export default function NotificationBell() {
@@ -11,11 +12,11 @@ export default function NotificationBell() {
   useEffect(() => {
     fetchUnreadCount();
     const interval = setInterval(fetchUnreadCount, 30000);
-    connectToNotifications();
+    const unsubscribe = notificationSocket.subscribe(handleSocketMessage);
     
     return () => {
       clearInterval(interval);
-      disconnectFromNotifications();
+      unsubscribe();
     };
     
   }, []);
@@ -30,37 +31,15 @@ export default function NotificationBell() {
     }
   };
 
-  const connectToNotifications = () => {
-    const ws = new WebSocket('ws://localhost:8000/ws/notifications/');
-    ws.onopen = () => {
-    };
-    
-    ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      if (data.type === 'notification') {
-        setUnreadCount(prev => prev + 1);
-        if (Notification.permission === 'granted') {
-          new Notification('New Notification', {
-            body: data.notification.message,
-            icon: '/logo.png'
-          });
-        }
+  const handleSocketMessage = (data: NotificationSocketMessage) => {
+    if (data.type === 'notification') {
+      setUnreadCount(prev => prev + 1);
+      if (Notification.permission === 'granted' && data.notification) {
+        new Notification('New Notification', {
+          body: data.notification.message,
+          icon: '/logo.png'
+        });
       }
-    };
-    
-    ws.onerror = (error) => {
-    };
-    
-    ws.onclose = () => {
-    };
-    
-    (window as any).notificationWs = ws;
-  };
-
-  const disconnectFromNotifications = () => {
-    const ws = (window as any).notificationWs;
-    if (ws) {
-      ws.close();
     }
   };
 
@@ -16,6 +16,9 @@ const PostCard: React.FC<PostCardProps> = ({ post }) => {
   const [isCommenting, setIsCommenting] = useState(false);
   const [isLiking, setIsLiking] = useState(false);
   const [showComments, setShowComments] = useState(false);
+  // Cursor of the next page of the full thread: undefined until it is first opened, null once exhausted
+  const [threadCursor, setThreadCursor] = useState<string | null | undefined>(undefined);
+  const [isLoadingComments, setIsLoadingComments] = useState(false);
   const [connectionStatus, setConnectionStatus] = useState<'connecting' | 'connected' | 'disconnected' | 'unauthorized'>('connecting');
   
   const webSocketServiceRef = useRef(createWebSocketService());
@@ -158,6 +161,31 @@ const PostCard: React.FC<PostCardProps> = ({ post }) => {
     }
   };
 
+  const loadMoreComments = async () => {
+    if (isLoadingComments || threadCursor === null) return;
+
+    setIsLoadingComments(true);
+    try {
+      const page = await postAPI.getComments(post.id, threadCursor);
+      setCurrentPost(prev => {
+        // The first page replaces the embedded preview with the start of the thread
+        const loaded = threadCursor === undefined ? [] : (prev.comments || []);
+        const seen = new Set(loaded.map(comment => comment.id));
+        return { ...prev, comments: [...loaded, ...page.results.filter(comment => !seen.has(comment.id))] };
+      });
+      setThreadCursor(page.next_cursor);
+    } catch (error) {
+      console.error('Error loading comments:', error);
+    } finally {
+      setIsLoadingComments(false);
+    }
+  };
+
+  const loadedComments = currentPost.comments?.length || 0;
+  const hasMoreComments = threadCursor === undefined
+    ? (currentPost.comment_count || 0) > loadedComments
+    : threadCursor !== null;
+
   const formatDate = (dateString: string) => {
     return new Date(dateString).toLocaleDateString('en-US', {
       month: 'short',
@@ -176,10 +204,11 @@ const PostCard: React.FC<PostCardProps> = ({ post }) => {
     const sizeClasses = size === 'large' ? 'w-10 h-10' : 'w-8 h-8';
     const textSize = size === 'large' ? 'text-base' : 'text-sm';
     
-    if (user?.profile_picture) {
+    const avatar = user?.avatar || user?.profile_picture;
+    if (avatar) {
       return (
         <img 
-          src={user.profile_picture} 
+          src={avatar} 
           alt={user.username || 'User'} 
           className={`${sizeClasses} rounded-full object-cover`}
           onError={(e) => {
@@ -238,7 +267,11 @@ const PostCard: React.FC<PostCardProps> = ({ post }) => {
         {currentPost.image && (
           <div className="mt-3 rounded-lg overflow-hidden">
             <img 
-              src={currentPost.image} 
+              src={currentPost.image_variants?.medium?.webp ?? currentPost.image} 
+              srcSet={currentPost.image_variants?.full
+                ? `${currentPost.image_variants.medium?.webp} 640w, ${currentPost.image_variants.full.webp} 1600w`
+                : undefined}
+              sizes="(max-width: 768px) 100vw, 640px"
               alt="Post image" 
               className="w-full h-auto max-h-96 object-cover"
               onError={(e) => {
@@ -254,7 +287,7 @@ const PostCard: React.FC<PostCardProps> = ({ post }) => {
             <video 
               controls 
               className="w-full h-auto max-h-96"
-              poster={currentPost.image || undefined}
+              poster={currentPost.image_variants?.medium?.webp ?? currentPost.image ?? undefined}
             >
               <source src={currentPost.video} type="video/mp4" />
               Your browser does not support the video tag.
@@ -389,6 +422,20 @@ const PostCard: React.FC<PostCardProps> = ({ post }) => {
               ))
             )}
           </div>
+
+          {hasMoreComments && (
+            <button
+              onClick={loadMoreComments}
+              disabled={isLoadingComments}
+              className="mt-3 text-sm font-medium text-blue-600 hover:text-blue-700 disabled:opacity-50"
+            >
+              {isLoadingComments
+                ? 'Loading comments...'
+                : threadCursor === undefined
+                  ? `View all ${currentPost.comment_count} comments`
+                  : 'Load more comments'}
+            </button>
+          )}
         </div>
       )}
     </div>
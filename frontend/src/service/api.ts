@@ -7,9 +7,9 @@ const api = axios.create({
 });
 
 export const postAPI = {
-  async getPosts() {
-    const response = await api.get('/posts/');
-    return response.data as Post[];
+  async getPosts(cursor?: string | null) {
+    const response = await api.get('/posts/', { params: cursor ? { cursor } : undefined });
+    return response.data as { results: Post[]; next: string | null; next_cursor: string | null };
   },
 
   async getPost(id: string) {
@@ -18,6 +18,8 @@ export const postAPI = {
   },
 
   async createPost(data: { content: string; image?: File; video?: File; privacy?: string }) {
+    if (data.video) return this.createVideoPost({ ...data, video: data.video });
+
     const formData = new FormData();
     formData.append('content', data.content);
     if (data.image) formData.append('image', data.image);
@@ -30,14 +32,51 @@ export const postAPI = {
     return response.data as Post;
   },
 
+  // Videos go through the resumable upload API: chunks are retried from the
+  // server's offset, so a dropped connection does not restart the whole file.
+  async createVideoPost(data: { content: string; image?: File; video: File; privacy?: string }) {
+    const video = data.video;
+    const initiated = await api.post('/uploads/', {
+      filename: video.name,
+      content_type: video.type || 'video/mp4',
+      size: video.size,
+    });
+    const { id, chunk_size: chunkSize } = initiated.data as { id: string; chunk_size: number };
+
+    let offset = 0;
+    let failures = 0;
+    while (offset < video.size) {
+      try {
+        const response = await api.put(`/uploads/${id}/`, video.slice(offset, offset + chunkSize), {
+          headers: { 'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset) },
+        });
+        offset = response.data.offset;
+        failures = 0;
+      } catch (error) {
+        if (++failures > 3) throw error;
+        const status = await api.get(`/uploads/${id}/`);
+        offset = status.data.offset;
+      }
+    }
+
+    const formData = new FormData();
+    formData.append('content', data.content);
+    if (data.image) formData.append('image', data.image);
+    if (data.privacy) formData.append('privacy', data.privacy);
+    const response = await api.post(`/uploads/${id}/complete/`, formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data as Post;
+  },
+
   async likePost(postId: string) {
     const response = await api.post(`/posts/${postId}/like/`);
     return response.data as { liked: boolean; like_count: number };
   },
 
-  async getComments(postId: string) {
-    const response = await api.get(`/posts/${postId}/comments/`);
-    return response.data as Comment[];
+  async getComments(postId: string, cursor?: string | null) {
+    const response = await api.get(`/posts/${postId}/comments/`, { params: cursor ? { cursor } : undefined });
+    return response.data as { results: Comment[]; next: string | null; next_cursor: string | null };
   },
 
   async createComment(postId: string, content: string) {
@@ -46,6 +46,7 @@ export interface ConversationDetail {
   participant2: User;
   other_participant: User;
   messages: Message[];
+  messages_next_cursor: string | null;
   created_at: string;
   updated_at: string;
 }
@@ -61,6 +62,11 @@ export const chatAPI = {
     return response.data;
   },
 
+  async getMessages(conversationId: string, before: string, limit = 50): Promise<{ results: Message[]; next_cursor: string | null }> {
+    const response = await api.get(`/chat/conversations/${conversationId}/messages/`, { params: { before, limit } });
+    return response.data;
+  },
+
   async startConversation(userId: string): Promise<{ conversation: ConversationDetail; created: boolean }> {
     const response = await api.post('/chat/conversations/start/', { user_id: userId });
     return response.data;
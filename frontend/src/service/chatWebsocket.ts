@@ -7,6 +7,7 @@ export interface WebSocketMessage {
   sender_username?: string;
   sender_profile_picture?: string;
   timestamp?: string;
+  sequence?: number;
   is_read?: boolean;
   user_id?: string;
   username?: string;
@@ -14,6 +15,8 @@ export interface WebSocketMessage {
   is_typing?: boolean;
   message_ids?: string[];
   reader_id?: string;
+  last_read_message_id?: string;
+  last_read_at?: string;
 
   call_id?: string;
   call_type?: 'video' | 'audio';
@@ -0,0 +1,102 @@
+export interface NotificationSocketMessage {
+  // 'connected' is emitted locally on every (re)connect so listeners can resync counts
+  type: 'connected' | 'notification' | 'chat_unread' | string;
+  notification?: { message: string; [key: string]: any };
+  conversation_id?: string;
+  conversation_unread?: number;
+  unread_count?: number;
+}
+
+type Listener = (data: NotificationSocketMessage) => void;
+
+/**
+ * One /ws/notifications/ socket per tab, shared by every component that needs
+ * pushed notifications or chat unread totals. It opens with the first
+ * subscriber, closes after the last one leaves, and reconnects with backoff.
+ */
+class NotificationWebSocketService {
+  private socket: WebSocket | null = null;
+  private listeners = new Set<Listener>();
+  private reconnectAttempts = 0;
+  private reconnectDelay = 1000;
+  private maxReconnectDelay = 30000;
+  private reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+
+  subscribe(listener: Listener): () => void {
+    this.listeners.add(listener);
+    if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+      listener({ type: 'connected' });
+    } else {
+      this.connect();
+    }
+    return () => {
+      this.listeners.delete(listener);
+      if (this.listeners.size === 0) {
+        this.disconnect();
+      }
+    };
+  }
+
+  private connect() {
+    if (this.socket || this.reconnectTimer) {
+      return;
+    }
+
+    const socket = new WebSocket('ws://localhost:8000/ws/notifications/');
+    this.socket = socket;
+
+    socket.onopen = () => {
+      this.reconnectAttempts = 0;
+      this.notify({ type: 'connected' });
+    };
+
+    socket.onmessage = (event) => {
+      try {
+        this.notify(JSON.parse(event.data));
+      } catch (error) {
+      }
+    };
+
+    socket.onclose = (event) => {
+      if (this.socket === socket) {
+        this.socket = null;
+      }
+      // 4001: not authenticated; retrying cannot help until the page reloads
+      if (event.code !== 1000 && event.code !== 4001 && this.listeners.size > 0) {
+        this.attemptReconnect();
+      }
+    };
+  }
+
+  private attemptReconnect() {
+    this.reconnectAttempts++;
+    const delay = Math.min(this.reconnectDelay * 2 ** (this.reconnectAttempts - 1), this.maxReconnectDelay);
+    this.reconnectTimer = setTimeout(() => {
+      this.reconnectTimer = null;
+      if (this.listeners.size > 0) this.connect();
+    }, delay);
+  }
+
+  private notify(data: NotificationSocketMessage) {
+    this.listeners.forEach(listener => {
+      try {
+        listener(data);
+      } catch (error) {
+      }
+    });
+  }
+
+  private disconnect() {
+    if (this.reconnectTimer) {
+      clearTimeout(this.reconnectTimer);
+      this.reconnectTimer = null;
+    }
+    if (this.socket) {
+      this.socket.close(1000, 'Normal closure');
+      this.socket = null;
+    }
+    this.reconnectAttempts = 0;
+  }
+}
+
+export default new NotificationWebSocketService();
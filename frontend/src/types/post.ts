@@ -3,9 +3,12 @@ export interface User {
   username: string;
   email: string;
   profile_picture?: string | null;
+  avatar?: string | null;
   full_name?: string;
 }
 
+export type ImageVariants = Partial<Record<'thumb' | 'medium' | 'full', { webp: string; jpeg: string }>>;
+
 export interface Comment {
   id: string;
   content: string;
@@ -18,6 +21,7 @@ export interface Post {
   id: string;
   content: string;
   image?: string | null;
+  image_variants?: ImageVariants;
   video?: string | null;
   author: User;
   privacy: string;
@@ -35,6 +39,8 @@ export interface LikeUpdateData {
   username: string;
   liked: boolean;
   like_count: number;
+  likers?: { user_id: string; username: string; liked: boolean }[];
+  events?: number;
 }
 
 export interface NewCommentData {